@@ -3,10 +3,23 @@ from flask import Blueprint
 # Create a blueprint for API routes
 api_bp = Blueprint('api', __name__)
 
+# Read-only, Hub-compatible file endpoint for peer instances
+mirror_bp = Blueprint('mirror', __name__)
+
 # Import all API modules to register their routes
 from . import cache
 from . import downloads
+from . import history
+from . import manifests
+from . import verify
+from . import mirror
+from . import archive
+from . import search
+from . import weights
+from . import gc
+from . import batch
 
 # Register the blueprints in the main application
 def register_blueprints(app):
-    app.register_blueprint(api_bp, url_prefix='/api')
\ No newline at end of file
+    app.register_blueprint(api_bp, url_prefix='/api')
+    app.register_blueprint(mirror_bp, url_prefix='/mirror')
\ No newline at end of file
@@ -0,0 +1,61 @@
+from flask import Response, jsonify, request, stream_with_context
+import logging
+import tarfile
+
+from utils.archive import export_repo, import_archive
+from utils.cache_roots import QuotaExceeded
+
+# Routes register on the shared package blueprint
+from . import api_bp
+from .cache import find_repo, root_indexes
+
+logger = logging.getLogger(__name__)
+
+@api_bp.route('/cache/export/<repo_path>', methods=['GET'])
+def export_repository(repo_path):
+    """Stream a cached repository (or ?revision= snapshots) as a tar archive"""
+    try:
+        _, _, repo = find_repo(repo_path, request.args.get('root'))
+    except KeyError:
+        return jsonify({'error': 'Cache root not found'}), 404
+    if repo is None:
+        return jsonify({'error': 'Repository not found in cache'}), 404
+
+    revisions = request.args.getlist('revision')
+    known = {revision.commit_hash for revision in repo.revisions} | set(repo.refs)
+    unknown = [revision for revision in revisions if revision not in known]
+    if unknown:
+        return jsonify({'error': f'Revisions not found in cache: {", ".join(unknown)}'}), 404
+
+    response = Response(stream_with_context(export_repo(repo, revisions)), mimetype='application/x-tar')
+    response.headers['Content-Disposition'] = f'attachment; filename={repo.repo_path.name}.tar'
+    return response
+
+@api_bp.route('/cache/import', methods=['POST'])
+def import_repositories():
+    """Unpack a tar archive streamed in the request body into the cache (or ?root=)"""
+    try:
+        # Without ?root= the first entry is the default root
+        root, index = root_indexes(request.args.get('root'))[0]
+    except KeyError:
+        return jsonify({'error': 'Cache root not found'}), 404
+    if request.content_length and not root.has_room_for(request.content_length, index):
+        return jsonify({'error': 'Cache root quota exceeded'}), 507
+    # Chunked uploads have no Content-Length, so the quota is also enforced member by member
+    max_bytes = max(root.quota - index.size_on_disk, 0) if root.quota else None
+
+    try:
+        # Each repo shows up in the index as soon as its last member lands
+        result = import_archive(request.stream, root.path, on_repo=index.update_repo, max_bytes=max_bytes)
+        logger.info(f"Imported {len(result['repos'])} repositories into {root.path}")
+        return jsonify({'message': 'Import completed', 'root': root.name, **result})
+    except QuotaExceeded as e:
+        index.invalidate()
+        return jsonify({'error': f'Cache root quota exceeded: {e}'}), 507
+    except (ValueError, tarfile.TarError) as e:
+        index.invalidate()
+        return jsonify({'error': f'Invalid archive: {e}'}), 400
+    except Exception as e:
+        index.invalidate()
+        logger.error(f"Error importing archive: {str(e)}")
+        return jsonify({'error': str(e)}), 500
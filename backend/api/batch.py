@@ -0,0 +1,321 @@
+from flask import jsonify, request
+from collections import deque
+from datetime import datetime
+import shutil
+import threading
+import time
+import uuid
+import logging
+
+from huggingface_hub.constants import REPO_TYPES
+from huggingface_hub.file_download import repo_folder_name
+
+from utils.state import save_json
+
+# Routes register on the shared package blueprint
+from . import api_bp
+from .cache import find_repo, root_indexes
+from .downloads import downloads, queue_download
+from .manifests import MANIFESTS_FILE, entry_root, is_pinned, manifest_status, manifests, normalize_entry, reconciler
+
+logger = logging.getLogger(__name__)
+
+# Global dictionary to store batch job groups
+batches = {}
+
+# Largest number of operations accepted in one batch
+MAX_BATCH_OPERATIONS = 10000
+
+# Downloads of one batch running at once; the rest wait their turn
+BATCH_CONCURRENCY = 4
+
+# Seconds between checks on a batch's running downloads
+BATCH_POLL_INTERVAL = 1
+
+# Manifest that pin/unpin operations edit unless they name another
+DEFAULT_PIN_MANIFEST = 'pinned'
+
+# Download states as batch operation states
+_DOWNLOAD_STATUS = {'downloading': 'running', 'completed': 'completed', 'failed': 'failed', 'cancelled': 'cancelled'}
+
+
+def _pin_state():
+    """Which repos (on which root) each manifest pins, as a copy a batch's validation can play its pins and unpins on"""
+    return {
+        name: {(entry['repo_id'], entry['repo_type'], entry_root(entry)) for entry in manifest['entries']}
+        for name, manifest in manifests.items()
+    }
+
+
+def validate_operation(operation, pins):
+    """Check one batch operation and normalise its parameters.
+
+    Raises ValueError with a message for the caller on anything invalid, so
+    the whole batch can be rejected before any of it runs. ``pins`` (from
+    ``_pin_state``) is updated with the operation's pin or unpin, so a delete
+    is checked against the pins of the operations before it.
+    """
+    if not isinstance(operation, dict):
+        raise ValueError('operation must be an object')
+    kind = operation.get('op')
+    repo_type = operation.get('repo_type') or 'model'
+    if repo_type not in REPO_TYPES:
+        raise ValueError(f'invalid repo_type: {repo_type}')
+    root = operation.get('root')
+    try:
+        root_indexes(root)
+    except KeyError:
+        raise ValueError(f'cache root not found: {root}')
+
+    if kind == 'download':
+        if not operation.get('repo_id') or not operation.get('filename'):
+            raise ValueError('repo_id and filename are required')
+        rate_limit = operation.get('rate_limit')
+        # bool is an int, but true isn't a rate
+        if rate_limit is not None and (isinstance(rate_limit, bool) or not isinstance(rate_limit, (int, float))
+                                       or rate_limit < 0):
+            raise ValueError(f'invalid rate_limit: {rate_limit}')
+        return {
+            'repo_id': operation['repo_id'],
+            'filename': operation['filename'],
+            'revision': operation.get('revision'),
+            'repo_type': repo_type,
+            'rate_limit': rate_limit,
+            'root': root
+        }
+
+    if kind == 'delete':
+        # Same repo argument as /cache/remove, or a repo_id
+        repo = operation.get('repo') or (
+            repo_folder_name(repo_id=operation['repo_id'], repo_type=repo_type) if operation.get('repo_id') else None
+        )
+        if not repo:
+            raise ValueError('repo or repo_id is required')
+        cached_root, _, cached = find_repo(repo, root)
+        if cached is None:
+            raise ValueError(f'repository not found in cache: {repo}')
+        if any((cached.repo_id, cached.repo_type, cached_root.name) in pinned for pinned in pins.values()):
+            raise ValueError(f'repository {cached.repo_id} is pinned by a manifest')
+        return {'repo': str(cached.repo_path), 'repo_id': cached.repo_id, 'repo_type': cached.repo_type,
+                'root': cached_root.name}
+
+    if kind in ('pin', 'unpin'):
+        manifest = operation.get('manifest') or DEFAULT_PIN_MANIFEST
+        if not isinstance(manifest, str):
+            raise ValueError('manifest must be a string')
+        if kind == 'unpin':
+            if not operation.get('repo_id'):
+                raise ValueError('repo_id is required')
+            # Unpinning drops the repo from the manifest on every root
+            unpinned = {pin for pin in pins.get(manifest, ()) if pin[:2] == (operation['repo_id'], repo_type)}
+            if not unpinned:
+                raise ValueError(f"{operation['repo_id']} is not pinned by manifest {manifest}")
+            pins[manifest] -= unpinned
+            return {'repo_id': operation['repo_id'], 'repo_type': repo_type, 'manifest': manifest}
+        entry = {key: operation[key] for key in ('repo_id', 'repo_type', 'revision', 'patterns', 'root') if key in operation}
+        entry = normalize_entry(entry)
+        pins.setdefault(manifest, set()).add((entry['repo_id'], entry['repo_type'], entry['root']))
+        return {'entry': entry, 'manifest': manifest}
+
+    raise ValueError(f'unknown op: {kind}')
+
+
+def _apply_pin(kind, params):
+    """Add or remove a manifest entry, returning whether the manifests changed"""
+    name = params['manifest']
+    if kind == 'pin':
+        manifest = manifests.setdefault(name, {'entries': [], 'submitted': datetime.now().isoformat()})
+        if params['entry'] in manifest['entries']:
+            return False
+        manifest['entries'].append(params['entry'])
+    else:
+        manifest = manifests.get(name)
+        if manifest is None:
+            raise ValueError(f'manifest not found: {name}')
+        entries = [
+            entry for entry in manifest['entries']
+            if (entry['repo_id'], entry['repo_type']) != (params['repo_id'], params['repo_type'])
+        ]
+        if len(entries) == len(manifest['entries']):
+            raise ValueError(f"{params['repo_id']} is not pinned by manifest {name}")
+        manifest['entries'] = entries
+        if not entries:
+            del manifests[name]
+    if name in manifests:
+        manifests[name]['submitted'] = datetime.now().isoformat()
+    manifest_status.pop(name, None)
+    return True
+
+
+def _sync_downloads(batch):
+    """Copy the state of a batch's queued downloads onto its operations"""
+    for operation in batch['operations']:
+        download = downloads.get(operation.get('download_id'))
+        if download is not None:
+            operation['status'] = _DOWNLOAD_STATUS.get(download['status'], operation['status'])
+            operation['error'] = download.get('error')
+
+
+def run_batch(batch_id):
+    """Apply a batch's deletes and pins in order with one index and manifest update, then run its downloads"""
+    batch = batches[batch_id]
+    try:
+        touched = {}
+        manifests_changed = False
+        for operation in batch['operations']:
+            if operation['op'] == 'download' or batch['status'] == 'cancelled':
+                continue
+            params = operation['params']
+            try:
+                if operation['op'] == 'delete':
+                    if is_pinned(params['repo_id'], params['repo_type'], params['root']):
+                        raise ValueError(f"repository {params['repo_id']} is pinned by a manifest")
+                    _, index, repo = find_repo(params['repo'], params['root'])
+                    if repo is None:
+                        raise ValueError('repository not found in cache')
+                    shutil.rmtree(repo.repo_path)
+                    touched[id(index)] = index
+                else:
+                    manifests_changed = _apply_pin(operation['op'], params) or manifests_changed
+                operation['status'] = 'completed'
+            except Exception as e:
+                operation['status'] = 'failed'
+                operation['error'] = str(e)
+
+        # Shared bookkeeping, once for the whole batch
+        for index in touched.values():
+            index.invalidate()
+        if manifests_changed:
+            save_json(MANIFESTS_FILE, manifests)
+            reconciler.wake()
+
+        queue = deque(op for op in batch['operations'] if op['op'] == 'download' and op['status'] == 'pending')
+        while True:
+            _sync_downloads(batch)
+            if batch['status'] == 'cancelled':
+                break
+            running = sum(1 for op in batch['operations'] if op['op'] == 'download' and op['status'] == 'running')
+            while queue and running < BATCH_CONCURRENCY:
+                operation = queue.popleft()
+                try:
+                    operation['download_id'] = queue_download(**operation['params'])
+                    operation['status'] = 'running'
+                    running += 1
+                except ValueError as e:
+                    operation['status'] = 'failed'
+                    operation['error'] = str(e)
+            if not queue and not running:
+                break
+            time.sleep(BATCH_POLL_INTERVAL)
+
+        if batch['status'] != 'cancelled':
+            failed = any(op['status'] == 'failed' for op in batch['operations'])
+            batch['status'] = 'completed_with_errors' if failed else 'completed'
+    except Exception as e:
+        logger.error(f"Batch {batch_id} failed: {str(e)}")
+        batch['status'] = 'failed'
+        batch['error'] = str(e)
+    finally:
+        for operation in batch['operations']:
+            if operation['status'] == 'pending':
+                operation['status'] = 'cancelled'
+        batch['end_time'] = datetime.now().isoformat()
+
+
+def _batch_response(batch_id, operations=True):
+    """A batch with per-state counts and byte progress aggregated over its operations"""
+    batch = batches[batch_id]
+    _sync_downloads(batch)
+    counts = {state: 0 for state in ('pending', 'running', 'completed', 'failed', 'cancelled')}
+    downloaded = 0
+    total = 0
+    for operation in batch['operations']:
+        counts[operation['status']] += 1
+        download = downloads.get(operation.get('download_id'))
+        if download is not None:
+            downloaded += download.get('downloaded') or 0
+            total += download.get('total') or 0
+    done = counts['completed'] + counts['failed'] + counts['cancelled']
+    response = {
+        'batch_id': batch_id,
+        **{key: value for key, value in batch.items() if key != 'operations'},
+        'total': len(batch['operations']),
+        'counts': counts,
+        'progress': int(done * 100 / len(batch['operations'])),
+        'downloaded': downloaded,
+        'download_total': total
+    }
+    if operations:
+        response['operations'] = batch['operations']
+    return response
+
+@api_bp.route('/cache/batch', methods=['POST'])
+def start_batch():
+    """Validate a list of download/delete/pin/unpin operations and run them as one job group"""
+    data = request.get_json(silent=True) or {}
+    requested = data.get('operations')
+    if not isinstance(requested, list) or not requested:
+        return jsonify({'error': 'operations must be a non-empty list'}), 400
+    if len(requested) > MAX_BATCH_OPERATIONS:
+        return jsonify({'error': f'At most {MAX_BATCH_OPERATIONS} operations per batch'}), 400
+
+    operations = []
+    errors = []
+    pins = _pin_state()
+    for position, operation in enumerate(requested):
+        try:
+            params = validate_operation(operation, pins)
+        except ValueError as e:
+            errors.append({'index': position, 'error': str(e)})
+            continue
+        operations.append({
+            'index': position,
+            'op': operation['op'],
+            'params': params,
+            'status': 'pending',
+            'error': None
+        })
+    if errors:
+        # Nothing runs unless every operation is valid
+        return jsonify({'error': 'Invalid batch', 'errors': errors}), 400
+
+    batch_id = str(uuid.uuid4())
+    batches[batch_id] = {
+        'status': 'running',
+        'start_time': datetime.now().isoformat(),
+        'error': None,
+        'operations': operations
+    }
+
+    thread = threading.Thread(target=run_batch, args=(batch_id,))
+    thread.daemon = True
+    thread.start()
+
+    return jsonify({'batch_id': batch_id, 'total': len(operations), 'message': 'Batch started'}), 202
+
+@api_bp.route('/cache/batch', methods=['GET'])
+def list_batches():
+    """List batches with their aggregated status"""
+    return jsonify({'batches': [_batch_response(batch_id, operations=False) for batch_id in list(batches)]})
+
+@api_bp.route('/cache/batch/<batch_id>', methods=['GET'])
+def get_batch(batch_id):
+    """Get the aggregated status of a batch and the state of each operation"""
+    if batch_id not in batches:
+        return jsonify({'error': 'Batch not found'}), 404
+    return jsonify(_batch_response(batch_id))
+
+@api_bp.route('/cache/batch/<batch_id>', methods=['DELETE'])
+def cancel_batch(batch_id):
+    """Cancel a batch: operations not started yet are dropped and its running downloads cancelled"""
+    if batch_id not in batches:
+        return jsonify({'error': 'Batch not found'}), 404
+    batch = batches[batch_id]
+    if batch['status'] != 'running':
+        return jsonify({'error': f"Batch already {batch['status']}"}), 409
+    batch['status'] = 'cancelled'
+    for operation in batch['operations']:
+        download = downloads.get(operation.get('download_id'))
+        if download is not None and download['status'] == 'downloading':
+            download['status'] = 'cancelled'
+    return jsonify({'message': 'Batch cancelled'})
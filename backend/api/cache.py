@@ -1,26 +1,86 @@
-from flask import Blueprint, jsonify
-from huggingface_hub import scan_cache_dir
+from flask import jsonify, request
 from datetime import datetime
 import logging
+import os
+import shutil
+import threading
+import uuid
 
+from utils.cache_roots import CacheRoots
 from utils.formatting import format_size
+from utils.listing import CacheListing, decode_cursor, encode_cursor
 
-# Create blueprint for API routes
-api_bp = Blueprint('api', __name__)
+# Routes register on the shared package blueprint
+from . import api_bp
 
-# Cache directory setup
-cache_dir = scan_cache_dir()
+logger = logging.getLogger(__name__)
+
+# Configured cache roots, each with its own index and quota
+cache_roots = CacheRoots.from_env()
+
+# Index of the default root, rescanned whenever downloads or removals invalidate it
+cache_dir = cache_roots.default.index
+
+# Global dictionary to store repository moves between roots
+move_jobs = {}
+
+# Sorted file rows with a change log behind the paged/delta file listing
+listing = CacheListing()
+
+# Largest page the file listing serves
+MAX_PAGE_SIZE = 1000
+
+
+def root_indexes(name=None):
+    """List (root, index) pairs for one root, or all of them when name is None.
+
+    The default root's index is looked up through the module-level
+    ``cache_dir`` at call time so it can be swapped out.
+    """
+    if name is not None and name not in cache_roots:
+        raise KeyError(name)
+    return [
+        (root, cache_dir if root is cache_roots.default else root.index)
+        for root in cache_roots
+        if name is None or root.name == name
+    ]
+
+
+def find_repo(repo_path, root_name=None):
+    """Find a cached repo by folder name (models--org--name) or full path.
+
+    Returns (root, index, repo) or (None, None, None).
+    """
+    for root, index in root_indexes(root_name):
+        for repo in index.repos:
+            if repo_path in (repo.repo_path.name, str(repo.repo_path)):
+                return root, index, repo
+    return None, None, None
+
+@api_bp.route('/cache/roots', methods=['GET'])
+def get_cache_roots():
+    """List the configured cache roots with their size and quota"""
+    try:
+        return jsonify({'roots': [root.to_dict(index) for root, index in root_indexes()]})
+    except Exception as e:
+        logger.error(f"Error getting cache roots: {str(e)}")
+        return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/cache/stats', methods=['GET'])
 def get_cache_stats():
-    """Get cache statistics"""
+    """Get cache statistics, aggregated over all roots or for ?root="""
+    try:
+        selected = root_indexes(request.args.get('root'))
+    except KeyError:
+        return jsonify({'error': 'Cache root not found'}), 404
     try:
-        # The cache_dir object has size_on_disk directly
+        size = sum(index.size_on_disk for _, index in selected)
         stats = {
-            'size': cache_dir.size_on_disk,
-            'size_formatted': format_size(cache_dir.size_on_disk),
-            'folders': len(cache_dir.repos),
-            'files': sum(repo.nb_files for repo in cache_dir.repos),
+            'size': size,
+            'size_formatted': format_size(size),
+            'folders': sum(len(index.repos) for _, index in selected),
+            'files': sum(repo.nb_files for _, index in selected for repo in index.repos),
+            'roots': [root.to_dict(index) for root, index in selected],
             'last_updated': datetime.now().isoformat()
         }
         return jsonify(stats)
@@ -28,24 +88,71 @@ def get_cache_stats():
         logger.error(f"Error getting cache stats: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def _file_row(root, repo):
+    return {
+        'path': str(repo.repo_path),
+        'size': repo.size_on_disk,
+        'size_formatted': format_size(repo.size_on_disk),
+        'last_accessed': datetime.fromtimestamp(repo.last_accessed).isoformat() if repo.last_accessed and not isinstance(repo.last_accessed, (int, float)) else repo.last_accessed,
+        'folder': str(repo.repo_path),
+        'root': root.name
+    }
+
+
+def update_listing():
+    """Bring the file listing up to date with the cache indexes"""
+    selected = root_indexes()
+    # Iterate through repos (not folders as in the original code)
+    listing.update(
+        [index.repos for _, index in selected],
+        lambda: {(root.name, str(repo.repo_path)): _file_row(root, repo) for root, index in selected for repo in index.repos}
+    )
+
 @api_bp.route('/cache/files', methods=['GET'])
 def get_cache_files():
-    """Get list of cached files"""
+    """Get cached files, from all roots or for ?root=.
+
+    Without ``limit`` every file is returned. With ``limit`` the listing is
+    paged: pass the returned ``next_cursor`` as ``cursor`` for the next page.
+    With ``since`` (the ``generation`` of an earlier response) only the rows
+    changed since and the paths removed since are returned.
+    """
+    root_name = request.args.get('root')
+    try:
+        root_indexes(root_name)
+    except KeyError:
+        return jsonify({'error': 'Cache root not found'}), 404
+    try:
+        limit = min(int(request.args['limit']), MAX_PAGE_SIZE) if request.args.get('limit') else None
+        if limit is not None and limit < 1:
+            raise ValueError(f'limit must be at least 1, got {limit}')
+        cursor = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except ValueError as e:
+        return jsonify({'error': f'Invalid listing parameter: {e}'}), 400
+
     try:
-        files = []
-        # Iterate through repos (not folders as in the original code)
-        for repo in cache_dir.repos:
-            files.append({
-                'path': str(repo.repo_path),
-                'size': repo.size_on_disk,
-                'size_formatted': format_size(repo.size_on_disk),
-                'last_accessed': datetime.fromtimestamp(repo.last_accessed).isoformat() if repo.last_accessed and not isinstance(repo.last_accessed, (int, float)) else repo.last_accessed,
-                'folder': str(repo.repo_path)
+        update_listing()
+        response = {'total_count': listing.count(root_name), 'generation': listing.token}
+
+        since = request.args.get('since')
+        if since:
+            changes = listing.changes(since, root_name)
+            if changes is None:
+                # Too far behind (or the server restarted), reload from the first page
+                return jsonify({**response, 'reset': True, 'changed': [], 'removed': []})
+            changed, removed = changes
+            return jsonify({
+                **response,
+                'reset': False,
+                'changed': changed,
+                'removed': [{'root': root, 'path': path} for root, path in removed]
             })
-        
+
+        files, next_key = listing.page(cursor, limit, root_name)
         return jsonify({
+            **response,
             'files': files,
-            'total_count': len(files)
+            'next_cursor': encode_cursor(next_key) if next_key else None
         })
     except Exception as e:
         logger.error(f"Error getting cache files: {str(e)}")
@@ -53,34 +160,155 @@ def get_cache_files():
 
 @api_bp.route('/cache/clear', methods=['POST'])
 def clear_cache():
-    """Clear the entire cache"""
+    """Clear the entire cache (or ?root=), keeping repositories pinned by manifests"""
     try:
-        # Clear the cache directory
-        cache_dir.clear()
-        return jsonify({'message': 'Cache cleared successfully'})
+        selected = root_indexes(request.args.get('root'))
+    except KeyError:
+        return jsonify({'error': 'Cache root not found'}), 404
+    try:
+        # Import here to avoid circular imports
+        from .manifests import is_pinned
+
+        removed = 0
+        pinned = []
+        for root, index in selected:
+            for repo in index.repos:
+                if is_pinned(repo.repo_id, repo.repo_type, root.name):
+                    pinned.append(repo.repo_id)
+                    continue
+                shutil.rmtree(repo.repo_path)
+                removed += 1
+            index.invalidate()
+
+        return jsonify({
+            'message': 'Cache cleared successfully',
+            'removed': removed,
+            'pinned': pinned
+        })
     except Exception as e:
         logger.error(f"Error clearing cache: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/cache/remove/<repo_path>', methods=['DELETE'])
-def remove_repository(repo_name):
+def remove_repository(repo_path):
     """Remove a specific repository from cache"""
     try:
-        # Find the repository in the cache
-        import shutil
-        import os
-        
-        # Convert repo_name to a proper path
-        repo_name = os.path.expanduser(repo_path)
-        
-        # Check if the path exists in the cache
-        for repo in cache_dir.repos:
-            if str(repo.repo_name) == repo_path:
-                # Remove the repository directory
-                shutil.rmtree(repo_name)
-                return jsonify({'message': f'Repository {repo_name} removed successfully'})
-        
-        return jsonify({'error': 'Repository not found in cache'}), 404
+        # Import here to avoid circular imports
+        from .manifests import is_pinned
+
+        # Accept either the cache folder name (models--org--name) or its full path
+        root, index, repo = find_repo(repo_path, request.args.get('root'))
+        if repo is None:
+            return jsonify({'error': 'Repository not found in cache'}), 404
+        if is_pinned(repo.repo_id, repo.repo_type, root.name):
+            return jsonify({'error': f'Repository {repo.repo_id} is pinned by a manifest'}), 409
+
+        # Remove the repository directory
+        shutil.rmtree(repo.repo_path)
+        index.invalidate()
+        return jsonify({'message': f'Repository {repo.repo_id} removed successfully'})
+    except KeyError:
+        return jsonify({'error': 'Cache root not found'}), 404
     except Exception as e:
         logger.error(f"Error removing repository: {str(e)}")
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+
+def move_repository(move_id):
+    """Copy a repo folder into another root, swap it in atomically, then drop the source"""
+    job = move_jobs[move_id]
+    source_path = job['source_path']
+    target = cache_roots.get(job['target'])
+    final_path = os.path.join(target.path, os.path.basename(source_path))
+    staging_path = os.path.join(target.path, f".{os.path.basename(source_path)}.moving-{move_id}")
+    try:
+        os.makedirs(staging_path)
+        for dirpath, dirnames, filenames in os.walk(source_path):
+            relative = os.path.relpath(dirpath, source_path)
+            for dirname in dirnames:
+                os.makedirs(os.path.join(staging_path, relative, dirname), exist_ok=True)
+            for filename in filenames:
+                src = os.path.join(dirpath, filename)
+                dst = os.path.join(staging_path, relative, filename)
+                if os.path.islink(src):
+                    # Snapshot entries are relative links into blobs/, keep them as links
+                    os.symlink(os.readlink(src), dst)
+                    continue
+                # copyfile streams through sendfile where the platform supports it
+                shutil.copyfile(src, dst)
+                shutil.copystat(src, dst)
+                job['copied'] += os.path.getsize(dst)
+                job['progress'] = int(job['copied'] * 100 / job['size']) if job['size'] else 100
+
+        if os.path.exists(final_path):
+            raise FileExistsError(f"{final_path} appeared while copying")
+        # Same filesystem rename: the repo shows up in the target all at once
+        os.rename(staging_path, final_path)
+        shutil.rmtree(source_path)
+
+        job['status'] = 'completed'
+        job['progress'] = 100
+        job['target_path'] = final_path
+        logger.info(f"Moved {source_path} to {final_path}")
+    except Exception as e:
+        logger.error(f"Error moving repository {source_path}: {str(e)}")
+        job['status'] = 'failed'
+        job['error'] = str(e)
+        shutil.rmtree(staging_path, ignore_errors=True)
+    finally:
+        job['end_time'] = datetime.now().isoformat()
+        for _, index in root_indexes():
+            index.invalidate()
+
+@api_bp.route('/cache/move', methods=['POST'])
+def start_move():
+    """Move a repository to another cache root"""
+    data = request.get_json() or {}
+    repo_path = data.get('repo')
+    target_name = data.get('target')
+    if not repo_path or not target_name:
+        return jsonify({'error': 'repo and target are required'}), 400
+    if target_name not in cache_roots:
+        return jsonify({'error': 'Target cache root not found'}), 404
+
+    try:
+        source, _, repo = find_repo(repo_path, data.get('source'))
+    except KeyError:
+        return jsonify({'error': 'Source cache root not found'}), 404
+    if repo is None:
+        return jsonify({'error': 'Repository not found in cache'}), 404
+
+    target = cache_roots.get(target_name)
+    if source is target:
+        return jsonify({'error': 'Repository is already in that root'}), 400
+    if os.path.exists(os.path.join(target.path, repo.repo_path.name)):
+        return jsonify({'error': 'Repository already exists in the target root'}), 409
+    if not target.has_room_for(repo.size_on_disk, dict(root_indexes())[target]):
+        return jsonify({'error': 'Target cache root quota exceeded'}), 507
+
+    move_id = str(uuid.uuid4())
+    move_jobs[move_id] = {
+        'status': 'moving',
+        'repo_id': repo.repo_id,
+        'source': source.name,
+        'target': target.name,
+        'source_path': str(repo.repo_path),
+        'size': repo.size_on_disk,
+        'copied': 0,
+        'progress': 0,
+        'start_time': datetime.now().isoformat(),
+        'error': None
+    }
+
+    thread = threading.Thread(target=move_repository, args=(move_id,))
+    thread.daemon = True
+    thread.start()
+
+    return jsonify({'move_id': move_id, 'message': 'Move started'}), 202
+
+@api_bp.route('/cache/move/<move_id>', methods=['GET'])
+def get_move(move_id):
+    """Get the progress of a repository move"""
+    if move_id not in move_jobs:
+        return jsonify({'error': 'Move not found'}), 404
+    return jsonify(move_jobs[move_id])
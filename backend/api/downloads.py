@@ -1,19 +1,100 @@
-from flask import Blueprint, jsonify, request
+from flask import jsonify, request
 from datetime import datetime
+import os
 import threading
+import time
 import logging
-from huggingface_hub import scan_cache_dir
+
+from huggingface_hub.constants import DEFAULT_REVISION
+from huggingface_hub.file_download import REGEX_COMMIT_HASH
 
 from utils.formatting import format_size
+from utils.cache_roots import QuotaExceeded
+from utils.hub import MetadataCache, use_pooled_session
+from utils.throttle import BandwidthLimiter
+from utils.transfer import DownloadCancelled, cache_ref, download_to_cache, fetch_file_metadata, find_cached
+
+# Routes register on the shared package blueprint
+from . import api_bp
+from .cache import cache_roots, root_indexes
+from .history import usage_history
 
-# Create blueprint for API routes
-api_bp = Blueprint('api', __name__)
+logger = logging.getLogger(__name__)
 
 # Global dictionary to store download progress
 downloads = {}
 
-# Cache directory setup
-cache_dir = scan_cache_dir()
+# Token-bucket bandwidth limits shared by all download threads
+bandwidth = BandwidthLimiter()
+
+# Peer instances (their /mirror base URL) tried before the Hub, in order
+peers = [peer.strip().rstrip('/') for peer in os.environ.get('HF_WEBUI_PEERS', '').split(',') if peer.strip()]
+
+# Metadata timeout for peers, kept short so a dead peer doesn't stall the download
+PEER_ETAG_TIMEOUT = 5
+
+# One keep-alive connection pool shared by every thread talking to the Hub or peers, set up by start_hub_session
+hub_session = None
+
+# Resolved revision/etag/size per file, so re-requesting cached files skips the HEAD round trip
+metadata_cache = MetadataCache(ttl=int(os.environ.get('HF_WEBUI_METADATA_TTL', 300)),
+                               max_entries=int(os.environ.get('HF_WEBUI_METADATA_CACHE_SIZE', 4096)))
+
+# Offline mode answers downloads from cached refs only and makes no network calls
+offline_mode = os.environ.get('HF_WEBUI_OFFLINE', os.environ.get('HF_HUB_OFFLINE', '')).lower() in ('1', 'true', 'yes')
+
+
+def start_hub_session():
+    """Route huggingface_hub traffic through the shared connection pool"""
+    global hub_session
+    if hub_session is None:
+        hub_session = use_pooled_session(int(os.environ.get('HF_WEBUI_HUB_POOL_SIZE', 32)))
+    return hub_session
+
+
+def is_offline():
+    """Whether offline mode is on"""
+    return offline_mode
+
+def queue_download(repo_id, filename, revision=None, repo_type='model', rate_limit=None, force_download=False,
+                   root=None):
+    """Register a download and start it in a background thread, returning its ID"""
+    import uuid
+    download_id = str(uuid.uuid4())
+    
+    root = root or cache_roots.default.name
+    if root not in cache_roots:
+        raise ValueError(f'Cache root not found: {root}')
+    
+    # Optional per-job cap in bytes per second
+    try:
+        bandwidth.set_job_limit(download_id, rate_limit)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f'Invalid rate_limit: {e}')
+    
+    # Store download info
+    downloads[download_id] = {
+        'status': 'downloading',
+        'progress': 0,
+        'repo_id': repo_id,
+        'repo_type': repo_type,
+        'revision': revision,
+        'filename': filename,
+        'force_download': force_download,
+        'root': root,
+        'start_time': datetime.now().isoformat(),
+        'error': None,
+        'downloaded': 0,
+        'total': None,
+        'speed': 0,
+        'rate_limit': bandwidth.effective_limit(download_id)
+    }
+    
+    # Start download in background thread
+    thread = threading.Thread(target=download_model, args=(download_id,))
+    thread.daemon = True
+    thread.start()
+    return download_id
 
 @api_bp.route('/cache/download', methods=['POST'])
 def start_download():
@@ -25,25 +106,18 @@ def start_download():
         
         if not repo_id or not filename:
             return jsonify({'error': 'repo_id and filename are required'}), 400
-            
-        # Generate unique download ID
-        import uuid
-        download_id = str(uuid.uuid4())
-        
-        # Store download info
-        downloads[download_id] = {
-            'status': 'downloading',
-            'progress': 0,
-            'repo_id': repo_id,
-            'filename': filename,
-            'start_time': datetime.now().isoformat(),
-            'error': None
-        }
         
-        # Start download in background thread
-        thread = threading.Thread(target=download_model, args=(download_id,))
-        thread.daemon = True
-        thread.start()
+        try:
+            download_id = queue_download(
+                repo_id,
+                filename,
+                revision=data.get('revision'),
+                repo_type=data.get('repo_type', 'model'),
+                rate_limit=data.get('rate_limit'),
+                root=data.get('root')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
             'download_id': download_id,
@@ -70,33 +144,181 @@ def cancel_download(download_id):
     else:
         return jsonify({'error': 'Download not found'}), 404
 
+@api_bp.route('/cache/download/<download_id>/throttle', methods=['PUT'])
+def set_download_throttle(download_id):
+    """Change the bandwidth cap of a single download"""
+    if download_id not in downloads:
+        return jsonify({'error': 'Download not found'}), 404
+    
+    data = request.get_json() or {}
+    try:
+        bandwidth.set_job_limit(download_id, data.get('rate_limit'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid rate_limit: {e}'}), 400
+    
+    downloads[download_id]['rate_limit'] = bandwidth.effective_limit(download_id)
+    return jsonify(downloads[download_id])
+
+@api_bp.route('/cache/peers', methods=['GET'])
+def get_peers():
+    """Get the peer mirrors tried before the Hub"""
+    return jsonify({'peers': peers})
+
+@api_bp.route('/cache/peers', methods=['PUT'])
+def set_peers():
+    """Replace the list of peer mirrors"""
+    data = request.get_json() or {}
+    new_peers = data.get('peers')
+    if not isinstance(new_peers, list) or not all(isinstance(peer, str) and peer for peer in new_peers):
+        return jsonify({'error': 'peers must be a list of URLs'}), 400
+    peers[:] = [peer.rstrip('/') for peer in new_peers]
+    return jsonify({'peers': peers})
+
+@api_bp.route('/cache/hub', methods=['GET'])
+def get_hub_settings():
+    """Get the offline mode flag and metadata cache statistics"""
+    return jsonify({'offline': offline_mode, 'metadata_cache': metadata_cache.to_dict()})
+
+@api_bp.route('/cache/hub', methods=['PUT'])
+def set_hub_settings():
+    """Toggle offline mode and/or drop the cached file metadata"""
+    global offline_mode
+    data = request.get_json() or {}
+    if 'offline' in data:
+        if not isinstance(data['offline'], bool):
+            return jsonify({'error': 'offline must be true or false'}), 400
+        offline_mode = data['offline']
+    if data.get('clear_metadata'):
+        metadata_cache.clear()
+    return jsonify({'offline': offline_mode, 'metadata_cache': metadata_cache.to_dict()})
+
+@api_bp.route('/cache/throttle', methods=['GET'])
+def get_throttle():
+    """Get the global bandwidth limit and schedule"""
+    return jsonify(bandwidth.to_dict())
+
+@api_bp.route('/cache/throttle', methods=['PUT'])
+def set_throttle():
+    """Update the global bandwidth limit and/or time-of-day schedule"""
+    data = request.get_json() or {}
+    try:
+        bandwidth.configure(
+            # 0 lifts the global cap, a missing key leaves it unchanged
+            global_limit=(data['global_limit'] or 0) if 'global_limit' in data else None,
+            schedule=data.get('schedule')
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid throttle settings: {e}'}), 400
+    
+    return jsonify(bandwidth.to_dict())
+
 def download_model(download_id):
     """Download model with progress tracking"""
-    try:
-        # Import here to avoid circular imports
-        from huggingface_hub import hf_hub_download
+    download_info = downloads[download_id]
+    repo_id = download_info['repo_id']
+    filename = download_info['filename']
+    root, index = root_indexes(download_info['root'])[0]
+    started = time.monotonic()
+    resumed_from = None
+    
+    def on_chunk(nbytes, downloaded, total):
+        nonlocal resumed_from
+        if download_info['status'] == 'cancelled':
+            raise DownloadCancelled()
         
-        download_info = downloads[download_id]
-        repo_id = download_info['repo_id']
-        filename = download_info['filename']
+        # Throttling happens inside the transfer loop, per chunk
+        download_info['rate_limit'] = bandwidth.throttle(
+            download_id, nbytes, cancelled=lambda: download_info['status'] == 'cancelled'
+        )
+        if download_info['status'] == 'cancelled':
+            raise DownloadCancelled()
+        usage_history.add_downloaded(nbytes)
         
-        # Download the file
-        file_path = hf_hub_download(
-            repo_id=repo_id,
-            filename=filename,
-            repo_type="model",
-            etag_timeout=30,
-            token=None  # Will use default credentials if available
+        if resumed_from is None:
+            resumed_from = downloaded - nbytes
+            if total and not root.has_room_for(total - resumed_from, index):
+                raise QuotaExceeded(f'Cache root {root.name} has no room for {format_size(total)}')
+        elapsed = time.monotonic() - started
+        download_info['downloaded'] = downloaded
+        download_info['total'] = total
+        download_info['speed'] = int((downloaded - resumed_from) / elapsed) if elapsed > 0 else 0
+        if total:
+            download_info['progress'] = min(100, int(downloaded * 100 / total))
+    
+    try:
+        revision = download_info.get('revision') or DEFAULT_REVISION
+        repo_type = download_info.get('repo_type', 'model')
+        force_download = download_info.get('force_download', False)
+        # Files already cached are answered here, before any peer or the Hub is asked
+        file_path = None if force_download else find_cached(
+            repo_id,
+            filename,
+            revision=revision,
+            repo_type=repo_type,
+            cache_dir=root.path,
+            metadata_cache=metadata_cache,
+            offline=offline_mode
         )
         
+        # Peers only serve commit hashes: a branch or tag is resolved on the Hub first, never from a peer's refs
+        commit = revision if REGEX_COMMIT_HASH.match(revision) else None
+        if file_path is None and peers and commit is None and not offline_mode:
+            try:
+                commit = fetch_file_metadata(repo_id, filename, revision=revision, repo_type=repo_type,
+                                             metadata_cache=metadata_cache).commit_hash
+            except Exception as e:
+                logger.info(f"Could not resolve {repo_id}@{revision} on the Hub, skipping peers: {str(e)}")
+        
+        # Peers first, then the Hub; a partial blob left by a peer is resumed from the next upstream
+        upstreams = [(peer, PEER_ETAG_TIMEOUT, False) for peer in list(peers)] + [(None, 30, None)]
+        if offline_mode or commit is None:
+            upstreams = upstreams[-1:]
+        if file_path is not None:
+            download_info['source'] = 'cache'
+            upstreams = []
+        for endpoint, etag_timeout, token in upstreams:
+            try:
+                file_path = download_to_cache(
+                    repo_id,
+                    filename,
+                    revision=revision if endpoint is None else commit,
+                    repo_type=repo_type,
+                    cache_dir=root.path,
+                    etag_timeout=etag_timeout,
+                    force_download=force_download,
+                    endpoint=endpoint,
+                    token=token,  # None uses default credentials, peers never get them
+                    on_chunk=on_chunk,
+                    metadata_cache=metadata_cache,
+                    offline=offline_mode
+                )
+                if endpoint is not None:
+                    # The ref follows the Hub's answer, not the peer's
+                    cache_ref(root.path, repo_id, revision, commit, repo_type)
+                download_info['source'] = 'cache' if offline_mode else endpoint or 'hub'
+                break
+            except (DownloadCancelled, QuotaExceeded):
+                raise
+            except Exception as e:
+                if endpoint is None:
+                    raise
+                logger.info(f"Peer {endpoint} could not serve {repo_id}/{filename}: {str(e)}")
+        
         # Update download status
-        downloads[download_id]['status'] = 'completed'
-        downloads[download_id]['end_time'] = datetime.now().isoformat()
-        downloads[download_id]['file_path'] = file_path
+        download_info['status'] = 'completed'
+        download_info['progress'] = 100
+        download_info['end_time'] = datetime.now().isoformat()
+        download_info['file_path'] = file_path
+        index.invalidate()
         
         logger.info(f"Download completed: {repo_id}/{filename}")
+    except DownloadCancelled:
+        logger.info(f"Download cancelled: {repo_id}/{filename}")
+        download_info['end_time'] = datetime.now().isoformat()
     except Exception as e:
         logger.error(f"Download failed for {repo_id}/{filename}: {str(e)}")
-        downloads[download_id]['status'] = 'failed'
-        downloads[download_id]['error'] = str(e)
-        downloads[download_id]['end_time'] = datetime.now().isoformat()
\ No newline at end of file
+        download_info['status'] = 'failed'
+        download_info['error'] = str(e)
+        download_info['end_time'] = datetime.now().isoformat()
+    finally:
+        bandwidth.release(download_id)
@@ -0,0 +1,165 @@
+from flask import jsonify, request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import os
+import threading
+import time
+import uuid
+import logging
+
+from huggingface_hub.file_download import repo_folder_name
+
+from utils.cache_gc import GC_KINDS, lock_garbage, remove_garbage, repo_folders, repo_garbage
+from utils.formatting import format_size
+
+# Routes register on the shared package blueprint
+from . import api_bp
+from .cache import move_jobs, root_indexes
+from .downloads import downloads
+
+logger = logging.getLogger(__name__)
+
+# Global dictionary to store garbage collection jobs
+gc_jobs = {}
+
+# Threads walking repo folders and deleting files per job
+GC_WORKERS = 8
+
+# Garbage younger than this (seconds) is kept, it may belong to a transfer that is starting or finishing
+GC_MIN_AGE = int(os.environ.get('HF_WEBUI_GC_MIN_AGE', 3600))
+
+# Partial downloads can be resumed, so they are kept longer
+GC_INCOMPLETE_AGE = int(os.environ.get('HF_WEBUI_GC_INCOMPLETE_AGE', 86400))
+
+
+def active_repo_folders(root):
+    """Repo folders of a root that a download or move is working on right now"""
+    folders = {
+        repo_folder_name(repo_id=download['repo_id'], repo_type=download.get('repo_type', 'model'))
+        for download in list(downloads.values())
+        if download['status'] == 'downloading' and download.get('root') == root.name
+    }
+    folders.update(
+        os.path.basename(job['source_path']) for job in list(move_jobs.values())
+        if job['status'] == 'moving' and job['source'] == root.name
+    )
+    return folders
+
+
+def run_gc(job_id):
+    """Find the garbage of the selected roots in parallel and delete what is old enough and unused"""
+    job = gc_jobs[job_id]
+    try:
+        now = time.time()
+        with ThreadPoolExecutor(max_workers=GC_WORKERS) as pool:
+            for root, index in root_indexes(job['root']):
+                folders = repo_folders(root.path)
+                garbage = [item for found in pool.map(lambda path: repo_garbage(path, now), folders) for item in found]
+                garbage.extend(lock_garbage(root.path, now))
+                job['repos'] += len(folders)
+
+                active = active_repo_folders(root)
+                candidates = []
+                for item in garbage:
+                    item['root'] = root.name
+                    min_age = job['incomplete_age'] if item['kind'] == 'incomplete' else job['min_age']
+                    if item['repo'] in active:
+                        item['status'], item['reason'] = 'skipped', 'in use'
+                    elif item['age'] < min_age:
+                        item['status'], item['reason'] = 'skipped', 'too recent'
+                    elif job['dry_run']:
+                        item['status'] = 'reclaimable'
+                    else:
+                        candidates.append((item, min_age))
+
+                # Lock files go last so blob deletions can still take them
+                for kinds in (('orphaned_blob', 'incomplete', 'dangling_ref'), ('lock',)):
+                    batch = [(item, min_age) for item, min_age in candidates if item['kind'] in kinds]
+                    reasons = pool.map(lambda c: remove_garbage(root.path, *c), batch)
+                    for (item, _), reason in zip(batch, reasons):
+                        if reason is None:
+                            item['status'] = 'deleted'
+                        else:
+                            item['status'], item['reason'] = 'skipped', reason
+
+                job['items'].extend(garbage)
+                if any(item['status'] == 'deleted' for item in garbage):
+                    index.invalidate()
+
+        for item in job['items']:
+            totals = job['by_kind'][item['kind']]
+            totals['count'] += 1
+            totals['size'] += item['size']
+            if item['status'] in ('reclaimable', 'deleted'):
+                job['reclaimable'] += item['size']
+            if item['status'] == 'deleted':
+                job['deleted'] += 1
+                job['freed'] += item['size']
+            elif item['status'] == 'skipped':
+                job['skipped'] += 1
+        job['status'] = 'completed'
+    except Exception as e:
+        logger.error(f"Garbage collection failed: {str(e)}")
+        job['status'] = 'failed'
+        job['error'] = str(e)
+    finally:
+        job['end_time'] = datetime.now().isoformat()
+        job['reclaimable_formatted'] = format_size(job['reclaimable'])
+        job['freed_formatted'] = format_size(job['freed'])
+
+@api_bp.route('/cache/gc', methods=['POST'])
+def start_gc():
+    """Start a garbage collection pass; a dry run unless dry_run is false"""
+    data = request.get_json(silent=True) or {}
+    try:
+        root_indexes(data.get('root'))
+    except KeyError:
+        return jsonify({'error': 'Cache root not found'}), 404
+    try:
+        min_age = float(data.get('min_age', GC_MIN_AGE))
+        incomplete_age = float(data.get('incomplete_age', GC_INCOMPLETE_AGE))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid age threshold: {e}'}), 400
+    if min_age < 0 or incomplete_age < 0:
+        return jsonify({'error': 'Age thresholds must not be negative'}), 400
+    if any(job['status'] == 'running' for job in gc_jobs.values()):
+        return jsonify({'error': 'A garbage collection is already running'}), 409
+
+    job_id = str(uuid.uuid4())
+    gc_jobs[job_id] = {
+        'status': 'running',
+        'root': data.get('root'),
+        'dry_run': data.get('dry_run', True) is not False,
+        'min_age': min_age,
+        'incomplete_age': incomplete_age,
+        'start_time': datetime.now().isoformat(),
+        'repos': 0,
+        'items': [],
+        'by_kind': {kind: {'count': 0, 'size': 0} for kind in GC_KINDS},
+        'reclaimable': 0,
+        'freed': 0,
+        'deleted': 0,
+        'skipped': 0,
+        'error': None
+    }
+
+    thread = threading.Thread(target=run_gc, args=(job_id,))
+    thread.daemon = True
+    thread.start()
+
+    return jsonify({'job_id': job_id, 'message': 'Garbage collection started'}), 202
+
+@api_bp.route('/cache/gc', methods=['GET'])
+def list_gc_jobs():
+    """List garbage collection jobs, without their item lists"""
+    return jsonify({'jobs': [
+        {'job_id': job_id, **{key: value for key, value in job.items() if key != 'items'}}
+        for job_id, job in gc_jobs.items()
+    ]})
+
+@api_bp.route('/cache/gc/<job_id>', methods=['GET'])
+def get_gc_job(job_id):
+    """Get the progress, garbage found and space reclaimed of a garbage collection job"""
+    if job_id not in gc_jobs:
+        return jsonify({'error': 'Garbage collection job not found'}), 404
+    return jsonify({'job_id': job_id, **gc_jobs[job_id]})
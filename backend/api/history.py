@@ -0,0 +1,122 @@
+from flask import jsonify, request
+from datetime import datetime
+import os
+import threading
+import time
+import logging
+
+import psutil
+
+from utils.formatting import format_size
+from utils.history import TIERS, UsageHistory, growth_rate
+from utils.state import load_json, save_json
+
+# Routes register on the shared package blueprint
+from . import api_bp
+from .cache import cache_roots, root_indexes
+
+logger = logging.getLogger(__name__)
+
+# Seconds between usage samples
+SAMPLE_INTERVAL = int(os.environ.get('HF_WEBUI_SAMPLE_INTERVAL', 300))
+
+HISTORY_FILE = 'usage_history.json'
+
+# Cache usage history, downsampled into fixed-size ring buffers
+usage_history = UsageHistory()
+
+
+def take_sample():
+    """Record the current size of all cache roots, split by repo type"""
+    by_type = {}
+    size = 0
+    for _, index in root_indexes():
+        size += index.size_on_disk
+        for repo in index.repos:
+            by_type[repo.repo_type] = by_type.get(repo.repo_type, 0) + repo.size_on_disk
+    usage_history.record(time.time(), size, by_type)
+
+
+def _sample_forever():
+    try:
+        usage_history.load(load_json(HISTORY_FILE, {}))
+    except Exception as e:
+        logger.error(f"Error loading usage history: {str(e)}")
+    while True:
+        try:
+            take_sample()
+            save_json(HISTORY_FILE, usage_history.to_dict())
+        except Exception as e:
+            logger.error(f"Error sampling cache usage: {str(e)}")
+        time.sleep(SAMPLE_INTERVAL)
+
+
+# Background sampling thread, started with the app rather than on import
+sampler = None
+
+
+def start_sampler():
+    """Load the saved history and start sampling cache usage in the background"""
+    global sampler
+    if sampler is None or not sampler.is_alive():
+        sampler = threading.Thread(target=_sample_forever)
+        sampler.daemon = True
+        sampler.start()
+
+@api_bp.route('/cache/stats/history', methods=['GET'])
+def get_cache_stats_history():
+    """Get cache usage history, growth rate and a disk-full prediction"""
+    resolution = request.args.get('resolution', '1h')
+    if resolution not in usage_history.tiers:
+        return jsonify({'error': f"resolution must be one of {', '.join(name for name, _, _ in TIERS)}"}), 400
+    limit = request.args.get('limit')
+    if limit is not None and (not limit.isdigit() or int(limit) < 1):
+        return jsonify({'error': f'limit must be a positive integer, got {limit}'}), 400
+    try:
+        rows = usage_history.series(resolution)
+        if limit is not None:
+            rows = rows[-int(limit):]
+
+        samples = [{
+            'timestamp': datetime.fromtimestamp(row['timestamp']).isoformat(),
+            'size': int(row['size']),
+            'by_type': {repo_type: int(row[repo_type]) for repo_type in ('model', 'dataset', 'space')},
+            'downloaded': int(row['downloaded'])
+        } for row in rows]
+
+        slope = growth_rate(rows)
+        growth_per_day = int(slope * 86400) if slope is not None else None
+        # Roots can live on different disks; count each filesystem once
+        disks = {}
+        for root in cache_roots:
+            disk_path = root.path
+            while not os.path.exists(disk_path):
+                disk_path = os.path.dirname(disk_path)
+            disks[os.stat(disk_path).st_dev] = psutil.disk_usage(disk_path)
+        disk = {
+            'total': sum(usage.total for usage in disks.values()),
+            'used': sum(usage.used for usage in disks.values()),
+            'free': sum(usage.free for usage in disks.values())
+        }
+        days_until_full = None
+        predicted_full = None
+        if slope and slope > 0:
+            days_until_full = round(disk['free'] / slope / 86400, 1)
+            try:
+                predicted_full = datetime.fromtimestamp(time.time() + disk['free'] / slope).isoformat()
+            except (OverflowError, ValueError, OSError):
+                # Too far in the future to represent
+                pass
+
+        return jsonify({
+            'resolution': resolution,
+            'samples': samples,
+            'growth_per_day': growth_per_day,
+            'growth_per_day_formatted': format_size(abs(growth_per_day)) if growth_per_day is not None else None,
+            'disk': disk,
+            'days_until_full': days_until_full,
+            'predicted_full': predicted_full
+        })
+    except Exception as e:
+        logger.error(f"Error getting cache stats history: {str(e)}")
+        return jsonify({'error': str(e)}), 500
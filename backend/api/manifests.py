@@ -0,0 +1,299 @@
+from flask import jsonify, request
+from datetime import datetime, timedelta
+from fnmatch import fnmatch
+import os
+import threading
+import logging
+
+from huggingface_hub import HfApi
+from huggingface_hub.constants import REPO_TYPES
+
+from utils.state import load_json, save_json
+from utils.transfer import cache_ref
+
+# Routes register on the shared package blueprint
+from . import api_bp
+from .cache import cache_roots, root_indexes
+from .downloads import downloads, is_offline, queue_download
+
+logger = logging.getLogger(__name__)
+
+# Seconds between passes once every manifest has converged
+RECONCILE_INTERVAL = int(os.environ.get('HF_WEBUI_RECONCILE_INTERVAL', 300))
+
+# Seconds between passes while manifest downloads are outstanding
+PENDING_INTERVAL = 5
+
+# Maximum number of manifest downloads running at once
+MAX_IN_FLIGHT = 4
+
+MANIFESTS_FILE = 'manifests.json'
+
+# Submitted manifests by name, and the result of their latest reconciliation
+manifests = {}
+manifest_status = {}
+
+
+def normalize_entry(entry):
+    """Validate a manifest entry and fill in defaults"""
+    if not isinstance(entry, dict) or not entry.get('repo_id'):
+        raise ValueError('each entry needs a repo_id')
+    for key in ('repo_id', 'repo_type', 'revision', 'root'):
+        if entry.get(key) is not None and not isinstance(entry[key], str):
+            raise ValueError(f'{key} must be a string')
+    repo_type = entry.get('repo_type') or 'model'
+    if repo_type not in REPO_TYPES:
+        raise ValueError(f'invalid repo_type: {repo_type}')
+    root = entry.get('root') or cache_roots.default.name
+    if root not in cache_roots:
+        raise ValueError(f'cache root not found: {root}')
+    patterns = entry.get('patterns') or ['*']
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    if not isinstance(patterns, list) or not all(isinstance(pattern, str) for pattern in patterns):
+        raise ValueError('patterns must be a string or a list of strings')
+    return {
+        'repo_id': entry['repo_id'],
+        'repo_type': repo_type,
+        'revision': entry.get('revision') or 'main',
+        'patterns': list(patterns),
+        'root': root
+    }
+
+
+def entry_root(entry):
+    """The cache root of a manifest entry; entries saved before roots existed live on the default one"""
+    return entry.get('root') or cache_roots.default.name
+
+
+def is_pinned(repo_id, repo_type='model', root=None):
+    """Whether a repository (on a root, or on any root) is listed in a manifest and must not be evicted"""
+    return any(
+        entry['repo_id'] == repo_id and entry['repo_type'] == repo_type
+        and (root is None or entry_root(entry) == root)
+        for manifest in manifests.values()
+        for entry in manifest['entries']
+    )
+
+
+def _latest_downloads():
+    """Map (repo_type, repo_id, revision, filename) to its most recent download"""
+    latest = {}
+    for download_id, info in list(downloads.items()):
+        key = (info.get('repo_type', 'model'), info['repo_id'], info.get('revision'), info['filename'])
+        if key not in latest or info['start_time'] > latest[key][1]['start_time']:
+            latest[key] = (download_id, info)
+    return latest
+
+
+def reconcile_entry(entry, latest):
+    """Diff one manifest entry against the cache index and queue what's missing"""
+    root, index = root_indexes(entry.get('root'))[0]
+    result = {
+        **entry,
+        'remote_commit': None,
+        'local_commit': index.resolve_revision(entry['repo_id'], entry['repo_type'], entry['revision']),
+        'files': 0,
+        'present': 0,
+        'missing': [],
+        'outdated': [],
+        'queued': [],
+        'failed': [],
+        'offline': is_offline(),
+        'error': None
+    }
+    if result['offline']:
+        # The remote revision can't be checked, only the local state is reported
+        return result
+    try:
+        info = HfApi().repo_info(
+            entry['repo_id'],
+            repo_type=entry['repo_type'],
+            revision=entry['revision'],
+            files_metadata=True
+        )
+    except Exception as e:
+        result['error'] = str(e)
+        return result
+
+    result['remote_commit'] = info.sha
+    local_files = index.snapshot_files(entry['repo_id'], entry['repo_type'], info.sha)
+    for sibling in info.siblings or []:
+        if not any(fnmatch(sibling.rfilename, pattern) for pattern in entry['patterns']):
+            continue
+        result['files'] += 1
+        cached = local_files.get(sibling.rfilename)
+        if cached is None:
+            result['missing'].append(sibling.rfilename)
+        elif sibling.size is not None and cached.size_on_disk != sibling.size:
+            result['outdated'].append(sibling.rfilename)
+        else:
+            result['present'] += 1
+
+    retry_before = (datetime.now() - timedelta(seconds=RECONCILE_INTERVAL)).isoformat()
+    for filename in result['missing'] + result['outdated']:
+        # Downloads ask for the commit the Hub resolved, so peers can serve them too
+        key = (entry['repo_type'], entry['repo_id'], info.sha, filename)
+        download_id, download = latest.get(key, (None, None))
+        if download is not None and download['status'] == 'downloading':
+            result['queued'].append(download_id)
+            continue
+        if download is not None and download['status'] == 'failed' and download.get('end_time', '') > retry_before:
+            # Don't hammer the Hub with a file that just failed
+            result['failed'].append({'filename': filename, 'error': download['error']})
+            continue
+        if _in_flight() >= MAX_IN_FLIGHT:
+            break
+        download_id = queue_download(
+            entry['repo_id'],
+            filename,
+            revision=info.sha,
+            repo_type=entry['repo_type'],
+            force_download=filename in result['outdated'],
+            root=entry.get('root')
+        )
+        latest[key] = (download_id, downloads[download_id])
+        result['queued'].append(download_id)
+
+    if local_files and not result['missing'] and not result['outdated'] and result['local_commit'] != info.sha:
+        # Every file of the new commit is in, move the branch or tag over to it
+        cache_ref(root.path, entry['repo_id'], entry['revision'], info.sha, entry['repo_type'])
+        index.invalidate()
+        result['local_commit'] = info.sha
+
+    return result
+
+
+def _in_flight():
+    return sum(1 for info in list(downloads.values()) if info['status'] == 'downloading')
+
+
+def reconcile_manifest(name):
+    """Run one reconciliation pass over a manifest and record its status"""
+    manifest = manifests.get(name)
+    if manifest is None:
+        return None
+
+    latest = _latest_downloads()
+    entries = [reconcile_entry(entry, latest) for entry in manifest['entries']]
+    if any(entry['error'] or entry['failed'] for entry in entries):
+        status = 'error'
+    elif any(entry['offline'] for entry in entries):
+        status = 'offline'
+    elif any(entry['missing'] or entry['outdated'] for entry in entries):
+        status = 'reconciling'
+    else:
+        status = 'converged'
+
+    manifest_status[name] = {
+        'status': status,
+        'files': sum(entry['files'] for entry in entries),
+        'present': sum(entry['present'] for entry in entries),
+        'queued': sum(len(entry['queued']) for entry in entries),
+        'entries': entries,
+        'last_reconciled': datetime.now().isoformat()
+    }
+    return manifest_status[name]
+
+
+class Reconciler:
+    """Background thread that keeps the cache converged on the submitted manifests"""
+
+    def __init__(self):
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+
+    def wake(self):
+        """Run a pass now instead of waiting for the next interval"""
+        self.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.clear()
+            pending = False
+            for name in list(manifests):
+                try:
+                    status = reconcile_manifest(name)
+                    pending = pending or bool(status and status['queued'])
+                except Exception as e:
+                    logger.error(f"Error reconciling manifest {name}: {str(e)}")
+            self._wake.wait(PENDING_INTERVAL if pending else RECONCILE_INTERVAL)
+
+
+reconciler = Reconciler()
+
+
+def load_manifests():
+    """Load the saved manifests and start reconciling them, once at app startup"""
+    manifests.update(load_json(MANIFESTS_FILE, {}))
+    if manifests:
+        reconciler.start()
+
+
+def _manifest_response(name):
+    return {
+        'name': name,
+        'entries': manifests[name]['entries'],
+        'submitted': manifests[name]['submitted'],
+        **manifest_status.get(name, {'status': 'pending'})
+    }
+
+@api_bp.route('/cache/manifests', methods=['GET'])
+def list_manifests():
+    """List warm-cache manifests and their convergence status"""
+    return jsonify({'manifests': [_manifest_response(name) for name in manifests]})
+
+@api_bp.route('/cache/manifests/<name>', methods=['PUT'])
+def submit_manifest(name):
+    """Create or replace a manifest of repo/revision/pattern entries"""
+    data = request.get_json(silent=True) or {}
+    try:
+        if not isinstance(data, dict) or not isinstance(data.get('entries', []), list):
+            raise ValueError('expected an object with a list of entries')
+        entries = [normalize_entry(entry) for entry in data.get('entries', [])]
+    except ValueError as e:
+        return jsonify({'error': f'Invalid manifest: {e}'}), 400
+
+    if name in manifests and manifests[name]['entries'] == entries:
+        # Resubmitting the same manifest is a no-op
+        return jsonify(_manifest_response(name))
+
+    manifests[name] = {'entries': entries, 'submitted': datetime.now().isoformat()}
+    manifest_status.pop(name, None)
+    save_json(MANIFESTS_FILE, manifests)
+    reconciler.wake()
+    return jsonify(_manifest_response(name))
+
+@api_bp.route('/cache/manifests/<name>', methods=['GET'])
+def get_manifest(name):
+    """Get a manifest and its convergence status"""
+    if name not in manifests:
+        return jsonify({'error': 'Manifest not found'}), 404
+    return jsonify(_manifest_response(name))
+
+@api_bp.route('/cache/manifests/<name>', methods=['DELETE'])
+def delete_manifest(name):
+    """Delete a manifest, unpinning its repositories"""
+    if name not in manifests:
+        return jsonify({'error': 'Manifest not found'}), 404
+    del manifests[name]
+    manifest_status.pop(name, None)
+    save_json(MANIFESTS_FILE, manifests)
+    return jsonify({'message': f'Manifest {name} deleted'})
+
+@api_bp.route('/cache/manifests/<name>/reconcile', methods=['POST'])
+def trigger_reconcile(name):
+    """Trigger a reconciliation pass right away"""
+    if name not in manifests:
+        return jsonify({'error': 'Manifest not found'}), 404
+    reconciler.wake()
+    return jsonify({'message': 'Reconciliation triggered'}), 202
@@ -0,0 +1,67 @@
+from flask import abort, jsonify, send_file
+import os
+import logging
+
+from utils.transfer import cached_file_path
+
+# Routes register on the read-only mirror blueprint
+from . import mirror_bp
+from .cache import cache_roots
+
+logger = logging.getLogger(__name__)
+
+# Serving the cache to peers is opt-in
+mirror_enabled = os.environ.get('HF_WEBUI_PEER_MIRROR', '').lower() in ('1', 'true', 'yes')
+
+
+def find_cached_file(repo_id, repo_type, revision, filename):
+    """Locate a file in any cache root: returns (commit hash, blob path) or (None, None)"""
+    for root in cache_roots:
+        commit_hash, pointer_path = cached_file_path(root.path, repo_id, filename, revision, repo_type)
+        if pointer_path is not None:
+            return commit_hash, os.path.realpath(pointer_path)
+    return None, None
+
+
+def serve_cached_file(repo_id, repo_type, revision, filename):
+    """Answer a Hub-style resolve request from the local cache.
+
+    Sends the same metadata headers as the Hub so ``huggingface_hub`` clients
+    can use this instance as their endpoint. GET supports Range requests and
+    lets the WSGI server stream the blob with its file wrapper (sendfile
+    where available) instead of reading it through Python.
+    """
+    if not mirror_enabled:
+        abort(404)
+
+    commit_hash, blob_path = find_cached_file(repo_id, repo_type, revision, filename)
+    if blob_path is None:
+        # Same error code as the Hub so clients fall back cleanly
+        response = jsonify({'error': 'Entry not found in peer cache'})
+        response.status_code = 404
+        response.headers['X-Error-Code'] = 'EntryNotFound'
+        return response
+
+    etag = os.path.basename(blob_path)
+    response = send_file(blob_path, conditional=True, etag=False, mimetype='application/octet-stream')
+    response.headers['ETag'] = f'"{etag}"'
+    response.headers['X-Repo-Commit'] = commit_hash
+    response.headers['X-Linked-Etag'] = f'"{etag}"'
+    response.headers['X-Linked-Size'] = str(os.path.getsize(blob_path))
+    return response
+
+
+@mirror_bp.route('/<path:repo_id>/resolve/<revision>/<path:filename>', methods=['GET', 'HEAD'])
+def resolve_model_file(repo_id, revision, filename):
+    """Serve a cached model file"""
+    return serve_cached_file(repo_id, 'model', revision, filename)
+
+@mirror_bp.route('/datasets/<path:repo_id>/resolve/<revision>/<path:filename>', methods=['GET', 'HEAD'])
+def resolve_dataset_file(repo_id, revision, filename):
+    """Serve a cached dataset file"""
+    return serve_cached_file(repo_id, 'dataset', revision, filename)
+
+@mirror_bp.route('/spaces/<path:repo_id>/resolve/<revision>/<path:filename>', methods=['GET', 'HEAD'])
+def resolve_space_file(repo_id, revision, filename):
+    """Serve a cached space file"""
+    return serve_cached_file(repo_id, 'space', revision, filename)
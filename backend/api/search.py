@@ -0,0 +1,93 @@
+from flask import jsonify, request
+import threading
+import time
+import logging
+
+from utils.formatting import format_size, parse_size
+from utils.search import SearchIndex
+
+# Routes register on the shared package blueprint
+from . import api_bp
+from .cache import root_indexes
+
+logger = logging.getLogger(__name__)
+
+# Most results returned by one search
+MAX_SEARCH_RESULTS = 1000
+
+# Search index per cache root, rebuilt when a rescan of that root finds changed repos
+search_indexes = {}
+_build_lock = threading.Lock()
+
+
+def search_index(root, index):
+    """Get the search index for a root, rebuilding it if the cached repos changed"""
+    info = index.info
+    current = search_indexes.get(root.name)
+    if current is not None and current.info is info:
+        return current
+    with _build_lock:
+        current = search_indexes.get(root.name)
+        if current is None or not current.covers(info):
+            started = time.monotonic()
+            current = search_indexes[root.name] = SearchIndex(info)
+            logger.info(f"Built search index for {root.name}: {len(current)} files "
+                        f"in {time.monotonic() - started:.2f}s")
+        else:
+            # A periodic rescan that found nothing new keeps the index
+            current.info = info
+        return current
+
+@api_bp.route('/cache/search', methods=['GET'])
+def search_cache():
+    """Search cached repo ids and file paths (q, glob, min_size, max_size, repo_type, root, limit)"""
+    try:
+        selected = root_indexes(request.args.get('root'))
+    except KeyError:
+        return jsonify({'error': 'Cache root not found'}), 404
+    try:
+        min_size = parse_size(request.args['min_size']) if request.args.get('min_size') else None
+        max_size = parse_size(request.args['max_size']) if request.args.get('max_size') else None
+        limit = min(int(request.args.get('limit', 100)), MAX_SEARCH_RESULTS)
+        if limit < 1:
+            raise ValueError(f'limit must be at least 1, got {limit}')
+    except ValueError as e:
+        return jsonify({'error': f'Invalid search parameter: {e}'}), 400
+
+    try:
+        started = time.monotonic()
+        results = []
+        truncated = False
+        for root, index in selected:
+            matches = search_index(root, index).search(
+                request.args.get('q', ''),
+                pattern=request.args.get('glob'),
+                min_size=min_size,
+                max_size=max_size,
+                repo_type=request.args.get('repo_type')
+            )
+            for repo_id, repo_type, repo_path, path, size in matches:
+                if len(results) == limit:
+                    truncated = True
+                    break
+                results.append({
+                    'repo_id': repo_id,
+                    'repo_type': repo_type,
+                    'repo_path': repo_path,
+                    'path': path,
+                    'size': size,
+                    'size_formatted': format_size(size),
+                    'root': root.name
+                })
+            if truncated:
+                break
+
+        return jsonify({
+            'results': results,
+            'count': len(results),
+            'truncated': truncated,
+            'took_ms': round((time.monotonic() - started) * 1000, 2)
+        })
+    except Exception as e:
+        logger.error(f"Error searching cache: {str(e)}")
+        return jsonify({'error': str(e)}), 500
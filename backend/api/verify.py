@@ -0,0 +1,151 @@
+from flask import jsonify, request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import os
+import threading
+import time
+import uuid
+import logging
+
+from utils.formatting import format_size
+from utils.verify import VerificationStore, expected_digest, hash_blob
+
+# Routes register on the shared package blueprint
+from . import api_bp
+from .cache import root_indexes
+
+logger = logging.getLogger(__name__)
+
+# Global dictionary to store verification jobs
+verify_jobs = {}
+
+# Blobs already verified, so reruns only hash new or changed files
+verified_blobs = VerificationStore()
+
+# Hashing threads per job
+VERIFY_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def _collect_blobs(repo_id=None, repo_type=None, root=None):
+    """List (repo_id, blobs_dir, [blob paths]) for the repos to verify"""
+    targets = []
+    for repo in (repo for _, index in root_indexes(root) for repo in index.repos):
+        if repo_id and repo.repo_id != repo_id:
+            continue
+        if repo_type and repo.repo_type != repo_type:
+            continue
+        blobs_dir = os.path.join(str(repo.repo_path), 'blobs')
+        if not os.path.isdir(blobs_dir):
+            continue
+        blobs = [
+            entry.path for entry in os.scandir(blobs_dir)
+            if entry.is_file() and not entry.name.endswith('.incomplete')
+        ]
+        targets.append((repo.repo_id, blobs_dir, blobs))
+    return targets
+
+
+def _verify_blob(blob_path, full):
+    """Check one blob, returning (outcome, bytes hashed, corruption record or None)"""
+    stat = os.stat(blob_path)
+    if not full and verified_blobs.is_current(blob_path, stat):
+        if verified_blobs.get(blob_path)['ok']:
+            return 'skipped', 0, None
+        return 'skipped', 0, {'path': blob_path, 'size': stat.st_size, 'cached_result': True}
+
+    expected = expected_digest(blob_path)
+    if expected is None:
+        # Not named after a hash, nothing to compare against
+        return 'unverifiable', 0, None
+
+    kind, digest = expected
+    actual = hash_blob(blob_path, kind)
+    ok = actual == digest
+    verified_blobs.record(blob_path, stat, ok, actual)
+    if ok:
+        return 'hashed', stat.st_size, None
+    return 'hashed', stat.st_size, {'path': blob_path, 'size': stat.st_size, 'expected': digest, 'actual': actual}
+
+
+def run_verification(job_id):
+    """Hash every blob of the selected repos in parallel"""
+    job = verify_jobs[job_id]
+    started = time.monotonic()
+    try:
+        targets = _collect_blobs(job['repo_id'], job['repo_type'], job.get('root'))
+        job['total'] = sum(len(blobs) for _, _, blobs in targets)
+
+        with ThreadPoolExecutor(max_workers=VERIFY_WORKERS) as pool:
+            futures = []
+            for _, blobs_dir, blobs in targets:
+                verified_blobs.prune(blobs_dir + os.sep, set(blobs))
+                futures.extend(pool.submit(_verify_blob, blob, job['full']) for blob in blobs)
+            for future in futures:
+                try:
+                    outcome, nbytes, corrupted = future.result()
+                    job[outcome] += 1
+                    job['bytes_hashed'] += nbytes
+                    if corrupted:
+                        job['corrupted'].append(corrupted)
+                except OSError as e:
+                    # Blob removed or unreadable while we were running
+                    job['errors'].append(str(e))
+                job['checked'] += 1
+                elapsed = time.monotonic() - started
+                job['throughput'] = int(job['bytes_hashed'] / elapsed) if elapsed > 0 else 0
+
+        verified_blobs.save()
+        job['status'] = 'completed'
+    except Exception as e:
+        logger.error(f"Verification failed: {str(e)}")
+        job['status'] = 'failed'
+        job['error'] = str(e)
+    finally:
+        job['end_time'] = datetime.now().isoformat()
+        job['throughput_formatted'] = f"{format_size(job['throughput'])}/s"
+
+@api_bp.route('/cache/verify', methods=['POST'])
+def start_verification():
+    """Start a blob integrity verification job"""
+    data = request.get_json(silent=True) or {}
+    try:
+        root_indexes(data.get('root'))
+    except KeyError:
+        return jsonify({'error': 'Cache root not found'}), 404
+    job_id = str(uuid.uuid4())
+    verify_jobs[job_id] = {
+        'status': 'running',
+        'repo_id': data.get('repo_id'),
+        'repo_type': data.get('repo_type'),
+        'root': data.get('root'),
+        'full': bool(data.get('full', False)),
+        'start_time': datetime.now().isoformat(),
+        'total': 0,
+        'checked': 0,
+        'hashed': 0,
+        'skipped': 0,
+        'unverifiable': 0,
+        'bytes_hashed': 0,
+        'throughput': 0,
+        'corrupted': [],
+        'errors': [],
+        'error': None
+    }
+
+    thread = threading.Thread(target=run_verification, args=(job_id,))
+    thread.daemon = True
+    thread.start()
+
+    return jsonify({'job_id': job_id, 'message': 'Verification started'}), 202
+
+@api_bp.route('/cache/verify', methods=['GET'])
+def list_verifications():
+    """List verification jobs"""
+    return jsonify({'jobs': [{'job_id': job_id, **job} for job_id, job in verify_jobs.items()]})
+
+@api_bp.route('/cache/verify/<job_id>', methods=['GET'])
+def get_verification(job_id):
+    """Get the progress and results of a verification job"""
+    if job_id not in verify_jobs:
+        return jsonify({'error': 'Verification job not found'}), 404
+    return jsonify({'job_id': job_id, **verify_jobs[job_id]})
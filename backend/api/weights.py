@@ -0,0 +1,141 @@
+from flask import jsonify, request
+from concurrent.futures import ThreadPoolExecutor
+import os
+import struct
+import time
+import logging
+
+from utils.weights import InspectionStore, inspect_weights
+
+# Routes register on the shared package blueprint
+from . import api_bp
+from .cache import find_repo, root_indexes
+
+logger = logging.getLogger(__name__)
+
+# File types whose headers can be inspected
+WEIGHT_SUFFIXES = ('.safetensors', '.gguf')
+
+# Header reads run in parallel, mostly waiting on disk seeks
+INSPECT_WORKERS = 8
+
+# Inspection results per blob hash, shared by every snapshot holding the blob
+inspections = InspectionStore()
+
+
+def select_revision(repo, revision=None):
+    """Pick a cached revision by commit or ref, defaulting to main or else the newest"""
+    if revision:
+        for cached_revision in repo.revisions:
+            if cached_revision.commit_hash == revision or revision in cached_revision.refs:
+                return cached_revision
+        return None
+    for cached_revision in repo.revisions:
+        if 'main' in cached_revision.refs:
+            return cached_revision
+    return max(repo.revisions, key=lambda r: r.last_modified, default=None)
+
+
+def _inspect_blob(blob_path):
+    """Inspect one blob, reusing the stored result for its hash"""
+    blob_hash = os.path.basename(blob_path)
+    result = inspections.get(blob_hash)
+    if result is None:
+        try:
+            result = inspect_weights(blob_path) or {'format': None}
+        except (ValueError, struct.error, KeyError, TypeError, OSError) as e:
+            # Reported for this file only and not stored: the blob may still be
+            # partial, unreadable for now, or rewritten by a forced download
+            logger.warning(f"Could not inspect {blob_path}: {str(e)}")
+            return {'format': None, 'error': str(e)}
+        inspections.record(blob_hash, result)
+    return result
+
+
+def inspect_revision(cached_revision, pool, tensors=False):
+    """Inspect the weight files of one snapshot and total them up.
+
+    Safetensors shards add up to one model. GGUF files are usually
+    alternative quantizations of the same model, so they are reported per
+    file and the repo total is the largest of them.
+    """
+    weight_files = sorted(
+        (f for f in cached_revision.files if f.file_name.endswith(WEIGHT_SUFFIXES)),
+        key=lambda f: str(f.file_path)
+    )
+    results = list(pool.map(lambda f: _inspect_blob(str(f.blob_path)), weight_files))
+
+    files = []
+    dtypes = {}
+    safetensors_parameters = 0
+    gguf_parameters = 0
+    for cached_file, result in zip(weight_files, results):
+        entry = {
+            'path': os.path.relpath(str(cached_file.file_path), str(cached_revision.snapshot_path)),
+            'size': cached_file.size_on_disk,
+            'blob': os.path.basename(str(cached_file.blob_path)),
+            **{key: value for key, value in result.items() if tensors or key != 'tensors'}
+        }
+        files.append(entry)
+        if result.get('format') == 'safetensors':
+            safetensors_parameters += result['parameters']
+            for dtype, count in result['dtypes'].items():
+                dtypes[dtype] = dtypes.get(dtype, 0) + count
+        elif result.get('format') == 'gguf':
+            gguf_parameters = max(gguf_parameters, result['parameters'])
+
+    return {
+        'revision': cached_revision.commit_hash,
+        'refs': sorted(cached_revision.refs),
+        'parameters': safetensors_parameters or gguf_parameters,
+        'dtypes': dtypes,
+        'files': files
+    }
+
+@api_bp.route('/cache/inspect', methods=['GET'])
+def inspect_cache():
+    """Summarise parameter counts and dtypes for every cached repo (or ?root=)"""
+    try:
+        selected = root_indexes(request.args.get('root'))
+    except KeyError:
+        return jsonify({'error': 'Cache root not found'}), 404
+    try:
+        started = time.monotonic()
+        repos = []
+        with ThreadPoolExecutor(max_workers=INSPECT_WORKERS) as pool:
+            for root, index in selected:
+                for repo in sorted(index.repos, key=lambda r: (r.repo_type, r.repo_id)):
+                    cached_revision = select_revision(repo)
+                    if cached_revision is None:
+                        continue
+                    summary = inspect_revision(cached_revision, pool)
+                    if not summary['files']:
+                        continue
+                    repos.append({'repo_id': repo.repo_id, 'repo_type': repo.repo_type, 'root': root.name, **summary})
+        inspections.save()
+        return jsonify({'repos': repos, 'took_ms': round((time.monotonic() - started) * 1000, 2)})
+    except Exception as e:
+        logger.error(f"Error inspecting cache: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/cache/inspect/<repo_path>', methods=['GET'])
+def inspect_repository(repo_path):
+    """Inspect the weight files of one cached repo (?revision=, ?tensors=0 to omit tensor lists)"""
+    try:
+        root, _, repo = find_repo(repo_path, request.args.get('root'))
+    except KeyError:
+        return jsonify({'error': 'Cache root not found'}), 404
+    if repo is None:
+        return jsonify({'error': 'Repository not found in cache'}), 404
+    cached_revision = select_revision(repo, request.args.get('revision'))
+    if cached_revision is None:
+        return jsonify({'error': 'Revision not found in cache'}), 404
+
+    try:
+        with ThreadPoolExecutor(max_workers=INSPECT_WORKERS) as pool:
+            summary = inspect_revision(cached_revision, pool, tensors=request.args.get('tensors') != '0')
+        inspections.save()
+        return jsonify({'repo_id': repo.repo_id, 'repo_type': repo.repo_type, 'root': root.name, **summary})
+    except Exception as e:
+        logger.error(f"Error inspecting repository: {str(e)}")
+        return jsonify({'error': str(e)}), 500
@@ -8,7 +8,6 @@ from datetime import datetime
 import psutil
 from flask import Flask, jsonify, request, send_from_directory, send_file
 from flask_cors import CORS
-from huggingface_hub import scan_cache_dir
 import logging
 
 # Configure logging
@@ -19,14 +18,15 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)
 
-# Cache directory setup
-cache_dir = scan_cache_dir()
-print(f"Cache directory: {cache_dir}")  # Debug print
-
 # Import and register API blueprints
 from api import register_blueprints
 register_blueprints(app)
 
+# Cache roots setup, configured through HF_WEBUI_CACHE_ROOTS
+from api.cache import cache_roots
+for root in cache_roots:
+    print(f"Cache root {root.name}: {root.path}")  # Debug print
+
 # Serve frontend files for development mode
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
@@ -65,5 +65,21 @@ def serve_frontend(path):
             </html>
             """
 
+def start_background_tasks():
+    """Load persisted state and start the background threads.
+
+    Kept out of module import so that importing the app (e.g. in tests)
+    neither scans the cache nor touches the state directory.
+    """
+    from api.downloads import start_hub_session
+    from api.history import start_sampler
+    from api.manifests import load_manifests
+    start_hub_session()
+    start_sampler()
+    load_manifests()
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # The debug reloader re-runs this file in a child process, which is the one serving requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_tasks()
+    app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,180 @@
+import os
+import posixpath
+import re
+import shutil
+import tarfile
+
+from filelock import FileLock
+
+from utils.cache_roots import QuotaExceeded
+from utils.transfer import CHUNK_SIZE
+
+# Top-level folders a cache archive may contain
+REPO_FOLDER = re.compile(r'^(models|datasets|spaces)--[^/]+$')
+
+_BLOCK = tarfile.BLOCKSIZE
+
+
+def _header(name, path, **fields):
+    """Build the tar header for one cache entry, taking mode and mtime from lstat"""
+    stat = os.lstat(path)
+    info = tarfile.TarInfo(name)
+    info.mode = stat.st_mode & 0o777
+    info.mtime = int(stat.st_mtime)
+    for key, value in fields.items():
+        setattr(info, key, value)
+    # PAX headers hold names longer than the 100 bytes of a ustar header
+    return info.tobuf(tarfile.PAX_FORMAT)
+
+
+def _stream_file(path, size):
+    """Yield a regular file in CHUNK_SIZE pieces followed by the tar block padding"""
+    with open(path, 'rb') as f:
+        remaining = size
+        while remaining:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                raise IOError(f'{path} shrank while being exported')
+            remaining -= len(chunk)
+            yield chunk
+    if size % _BLOCK:
+        yield b'\0' * (_BLOCK - size % _BLOCK)
+
+
+def export_repo(repo, revisions=None):
+    """Stream a cached repo as an uncompressed tar, chunk by chunk.
+
+    ``repo`` is a ``CachedRepoInfo``; ``revisions`` optionally narrows the
+    export to some snapshots, given as commit hashes or refs. Each blob is
+    written once however many snapshots link to it, snapshot entries stay
+    relative symlinks and refs come last, so an interrupted import never
+    leaves a ref pointing at a partial snapshot.
+    """
+    selected = [
+        revision for revision in repo.revisions
+        if not revisions or revision.commit_hash in revisions or revision.refs & set(revisions)
+    ]
+    folder = repo.repo_path.name
+
+    written = set()
+    for revision in selected:
+        for cached_file in revision.files:
+            blob_path = str(cached_file.blob_path)
+            if blob_path in written:
+                continue
+            written.add(blob_path)
+            size = os.path.getsize(blob_path)
+            yield _header(f'{folder}/blobs/{os.path.basename(blob_path)}', blob_path, size=size)
+            yield from _stream_file(blob_path, size)
+
+    for revision in selected:
+        for cached_file in revision.files:
+            file_path = str(cached_file.file_path)
+            name = f'{folder}/{os.path.relpath(file_path, repo.repo_path)}'.replace(os.sep, '/')
+            if os.path.islink(file_path):
+                yield _header(name, file_path, type=tarfile.SYMTYPE, linkname=os.readlink(file_path))
+            else:
+                # Some filesystems hold snapshot files as copies instead of links
+                size = os.path.getsize(file_path)
+                yield _header(name, file_path, size=size)
+                yield from _stream_file(file_path, size)
+
+    for revision in selected:
+        for ref in sorted(revision.refs):
+            ref_path = os.path.join(str(repo.repo_path), 'refs', *ref.split('/'))
+            content = revision.commit_hash.encode()
+            yield _header(f'{folder}/refs/{ref}', ref_path, size=len(content))
+            yield content + b'\0' * (_BLOCK - len(content))
+
+    # End-of-archive marker
+    yield b'\0' * (2 * _BLOCK)
+
+
+def _member_target(member):
+    """Validate an archive member: returns (repo folder, section, path inside it)"""
+    name = posixpath.normpath(member.name)
+    parts = name.split('/')
+    if name.startswith('/') or '..' in parts or len(parts) < 3 or not REPO_FOLDER.match(parts[0]):
+        raise ValueError(f'Unexpected archive member {member.name!r}')
+    if parts[1] not in ('blobs', 'snapshots', 'refs') or (parts[1] == 'blobs' and len(parts) != 3):
+        raise ValueError(f'Unexpected archive member {member.name!r}')
+    if parts[1] == 'snapshots' and member.issym():
+        # Snapshot links have to stay inside the repo's own blobs folder
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(name), member.linkname))
+        if member.linkname.startswith('/') or not target.startswith(f'{parts[0]}/blobs/'):
+            raise ValueError(f'Archive member {member.name!r} links outside the cache')
+    elif not member.isfile():
+        raise ValueError(f'Unexpected archive member type for {member.name!r}')
+    return parts[0], parts[1], parts[2:]
+
+
+def import_archive(fileobj, cache_dir, on_repo=None, on_progress=None, max_bytes=None):
+    """Unpack a cache archive from a stream straight into the cache layout.
+
+    The tar is read sequentially (no seeking, so ``fileobj`` can be a request
+    body). Blobs are written through ``.incomplete`` files under the same
+    locks as downloads and skipped if already cached; snapshot links are
+    recreated as-is. ``on_repo(repo_path)`` is called whenever a repo folder
+    is complete so the caller can update its index, and
+    ``on_progress(bytes_written)`` after each member. ``QuotaExceeded`` is
+    raised before writing a member that would take the import past
+    ``max_bytes``, since a streamed body may not declare its length up front.
+    """
+    result = {'repos': [], 'blobs': 0, 'skipped_blobs': 0, 'files': 0, 'refs': 0, 'bytes': 0}
+    current = None
+
+    def reserve(member):
+        if max_bytes is not None and result['bytes'] + member.size > max_bytes:
+            raise QuotaExceeded(f'Archive is larger than the {max_bytes} bytes left in the cache root')
+
+    def finish(folder):
+        if folder is not None and folder not in result['repos']:
+            result['repos'].append(folder)
+            if on_repo is not None:
+                on_repo(os.path.join(cache_dir, folder))
+
+    with tarfile.open(fileobj=fileobj, mode='r|') as archive:
+        for member in archive:
+            folder, section, rest = _member_target(member)
+            if folder != current:
+                finish(current)
+                current = folder
+            path = os.path.join(cache_dir, folder, section, *rest)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            if section == 'blobs':
+                lock_path = os.path.join(cache_dir, '.locks', folder, f'{rest[0]}.lock')
+                os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+                with FileLock(lock_path):
+                    if os.path.exists(path) and os.path.getsize(path) == member.size:
+                        result['skipped_blobs'] += 1
+                        continue
+                    reserve(member)
+                    incomplete_path = path + '.incomplete'
+                    with archive.extractfile(member) as src, open(incomplete_path, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, CHUNK_SIZE)
+                    os.replace(incomplete_path, path)
+                result['blobs'] += 1
+                result['bytes'] += member.size
+            elif member.issym():
+                # Under the linked blob's lock, which garbage collection holds while removing orphans
+                blob_name = posixpath.basename(member.linkname)
+                lock_path = os.path.join(cache_dir, '.locks', folder, f'{blob_name}.lock')
+                os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+                with FileLock(lock_path):
+                    if os.path.lexists(path):
+                        os.remove(path)
+                    os.symlink(member.linkname, path)
+                result['files'] += 1
+            else:
+                reserve(member)
+                with archive.extractfile(member) as src, open(path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+                result['refs' if section == 'refs' else 'files'] += 1
+                result['bytes'] += member.size
+
+            if on_progress is not None:
+                on_progress(result['bytes'])
+
+    finish(current)
+    return result
@@ -0,0 +1,161 @@
+import os
+import time
+
+from filelock import FileLock, Timeout
+
+from utils.compact_index import REPO_TYPES, resolve_blob
+
+# Kinds of garbage a pass looks for
+GC_KINDS = ('orphaned_blob', 'incomplete', 'lock', 'dangling_ref')
+
+
+def _entry(kind, path, folder, now):
+    """A garbage item, or None if the file went away since it was listed (e.g. a finished download's .incomplete)"""
+    try:
+        stat = os.lstat(path)
+    except FileNotFoundError:
+        return None
+    return {'kind': kind, 'path': path, 'repo': folder, 'size': stat.st_size, 'age': now - stat.st_mtime}
+
+
+def _scandir(path):
+    """Entries of a folder, none if it was removed since it was found"""
+    try:
+        return list(os.scandir(path))
+    except FileNotFoundError:
+        return []
+
+
+def repo_folders(cache_dir):
+    """Paths of the repo folders of a cache directory (skipping .locks and move staging folders)"""
+    if not os.path.isdir(cache_dir):
+        return []
+    return [
+        entry.path for entry in os.scandir(cache_dir)
+        if entry.is_dir(follow_symlinks=False) and '--' in entry.name
+        and entry.name.split('--', 1)[0][:-1] in REPO_TYPES
+    ]
+
+
+def _referenced_blobs(repo_path):
+    """Names of the blobs linked from any snapshot of a repo folder"""
+    blobs_prefix = os.path.join(repo_path, 'blobs') + os.sep
+    referenced = set()
+    for dirpath, _, filenames in os.walk(os.path.join(repo_path, 'snapshots')):
+        for name in filenames:
+            blob_path = resolve_blob(os.path.join(dirpath, name), blobs_prefix)
+            if blob_path.startswith(blobs_prefix):
+                referenced.add(blob_path[len(blobs_prefix):])
+    return referenced
+
+
+def repo_garbage(repo_path, now=None):
+    """Find the garbage of one repo folder.
+
+    Builds the set of blobs linked from any snapshot, then reports blobs
+    outside it, leftover ``.incomplete`` files and refs naming a commit with
+    no snapshot folder. Unlike a cache scan this works on repos that are
+    corrupted by exactly these leftovers.
+    """
+    now = now or time.time()
+    folder = os.path.basename(repo_path)
+    blobs_dir = os.path.join(repo_path, 'blobs')
+    snapshots_dir = os.path.join(repo_path, 'snapshots')
+
+    referenced = _referenced_blobs(repo_path)
+
+    garbage = []
+    if os.path.isdir(blobs_dir):
+        for entry in _scandir(blobs_dir):
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            if entry.name.endswith('.incomplete'):
+                garbage.append(_entry('incomplete', entry.path, folder, now))
+            elif entry.name not in referenced:
+                garbage.append(_entry('orphaned_blob', entry.path, folder, now))
+
+    for dirpath, _, filenames in os.walk(os.path.join(repo_path, 'refs')):
+        for name in filenames:
+            ref_path = os.path.join(dirpath, name)
+            try:
+                with open(ref_path) as f:
+                    commit_hash = f.read().strip()
+            except FileNotFoundError:
+                continue
+            if not commit_hash or not os.path.isdir(os.path.join(snapshots_dir, commit_hash)):
+                garbage.append(_entry('dangling_ref', ref_path, folder, now))
+    return [item for item in garbage if item is not None]
+
+
+def lock_garbage(cache_dir, now=None):
+    """List the download lock files under .locks; filelock never deletes them itself"""
+    now = now or time.time()
+    locks_dir = os.path.join(cache_dir, '.locks')
+    if not os.path.isdir(locks_dir):
+        return []
+    garbage = []
+    for folder in _scandir(locks_dir):
+        if not folder.is_dir(follow_symlinks=False):
+            continue
+        for entry in _scandir(folder.path):
+            if entry.name.endswith('.lock') and entry.is_file(follow_symlinks=False):
+                garbage.append(_entry('lock', entry.path, folder.name, now))
+    return [item for item in garbage if item is not None]
+
+
+def blob_lock_path(cache_dir, item):
+    """The lock downloads and imports hold while writing the blob of an item"""
+    blob_name = os.path.basename(item['path'])
+    if blob_name.endswith('.incomplete'):
+        blob_name = blob_name[:-len('.incomplete')]
+    return os.path.join(cache_dir, '.locks', item['repo'], f'{blob_name}.lock')
+
+
+def _kept_reason(path, min_age):
+    try:
+        stat = os.lstat(path)
+    except FileNotFoundError:
+        return 'gone'
+    return 'too recent' if time.time() - stat.st_mtime < min_age else None
+
+
+def remove_garbage(cache_dir, item, min_age):
+    """Delete one garbage item unless something is using it, returning the reason it was kept or None.
+
+    Blobs and partial downloads are only removed while holding the lock that
+    downloads take for that blob, lock files only while holding themselves,
+    so an in-flight transfer is never pulled from under its writer (a lock
+    file this creates is collected by the next pass). The age is checked
+    again in case the file changed since the scan, and an orphaned blob's
+    repo is checked for links again: downloads and imports link existing
+    blobs under the same lock.
+    """
+    if item['kind'] == 'dangling_ref':
+        reason = _kept_reason(item['path'], min_age)
+        if reason is None:
+            os.remove(item['path'])
+        return reason
+
+    if item['kind'] == 'lock':
+        # Acquiring truncates the lock file and resets its age, check it first
+        reason = _kept_reason(item['path'], min_age)
+        if reason is not None:
+            return reason
+        lock = FileLock(item['path'], timeout=0)
+    else:
+        lock = FileLock(blob_lock_path(cache_dir, item), timeout=0)
+    try:
+        lock.acquire()
+    except Timeout:
+        return 'locked'
+    try:
+        reason = None if item['kind'] == 'lock' else _kept_reason(item['path'], min_age)
+        if reason is None and item['kind'] == 'orphaned_blob':
+            repo_path = os.path.dirname(os.path.dirname(item['path']))
+            if os.path.basename(item['path']) in _referenced_blobs(repo_path):
+                reason = 'referenced'
+        if reason is None:
+            os.remove(item['path'])
+        return reason
+    finally:
+        lock.release()
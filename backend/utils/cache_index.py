@@ -0,0 +1,111 @@
+import threading
+import time
+from pathlib import Path
+
+from huggingface_hub.constants import HF_HUB_CACHE
+from huggingface_hub.utils import CacheNotFound, CorruptedCacheException
+
+from utils.compact_index import CompactCacheInfo, scan_cache_compact
+
+
+class CacheIndex:
+    """Lazily refreshed view of a Hugging Face cache directory.
+
+    Exposes the same ``size_on_disk``/``repos``/``warnings`` attributes as the
+    ``HFCacheInfo`` returned by ``scan_cache_dir()``, but rescans the cache when
+    it has been invalidated (e.g. after a download) or is older than max_age.
+    Scans are held in the columnar ``CompactCacheInfo`` rather than one
+    dataclass per file, which matters for caches with millions of files.
+    """
+
+    def __init__(self, cache_dir=None, max_age=30):
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._info = None
+        self._scanned_at = 0.0
+
+    def invalidate(self):
+        """Force a rescan on next access"""
+        self._info = None
+
+    def _scan(self):
+        try:
+            self._info = scan_cache_compact(self.cache_dir or HF_HUB_CACHE)
+        except CacheNotFound:
+            self._info = CompactCacheInfo()
+        self._scanned_at = time.monotonic()
+        return self._info
+
+    def _is_stale(self, info):
+        return info is None or time.monotonic() - self._scanned_at > self.max_age
+
+    def refresh(self):
+        with self._lock:
+            return self._scan()
+
+    def update_repo(self, repo_path):
+        """Rescan a single repo folder and splice it into the current scan"""
+        with self._lock:
+            info = self._info
+            if info is None:
+                # Nothing to update, the next access scans everything anyway
+                return
+            try:
+                self._info = info.with_repo(repo_path)
+            except CorruptedCacheException:
+                self._info = None
+
+    @property
+    def info(self):
+        info = self._info
+        if self._is_stale(info):
+            with self._lock:
+                # Concurrent requests queue up here, only the first one rescans
+                info = self._info
+                if self._is_stale(info):
+                    info = self._scan()
+        return info
+
+    @property
+    def size_on_disk(self):
+        return self.info.size_on_disk
+
+    @property
+    def repos(self):
+        return self.info.repos
+
+    @property
+    def warnings(self):
+        return self.info.warnings
+
+    def repo(self, repo_id, repo_type='model'):
+        """Return the CachedRepoInfo for a repo, or None if it isn't cached"""
+        for repo in self.repos:
+            if repo.repo_id == repo_id and repo.repo_type == repo_type:
+                return repo
+        return None
+
+    def resolve_revision(self, repo_id, repo_type='model', revision='main'):
+        """Map a branch/tag/commit to the locally cached commit hash, if any"""
+        repo = self.repo(repo_id, repo_type)
+        if repo is None:
+            return None
+        for cached_revision in repo.revisions:
+            if cached_revision.commit_hash == revision or revision in cached_revision.refs:
+                return cached_revision.commit_hash
+        return None
+
+    def snapshot_files(self, repo_id, repo_type, commit_hash):
+        """Map repo-relative file names to CachedFileInfo for one snapshot"""
+        repo = self.repo(repo_id, repo_type)
+        if repo is None:
+            return {}
+        for cached_revision in repo.revisions:
+            if cached_revision.commit_hash == commit_hash:
+                snapshot_path = Path(cached_revision.snapshot_path)
+                return {
+                    Path(f.file_path).relative_to(snapshot_path).as_posix(): f
+                    for f in cached_revision.files
+                }
+        return {}
@@ -0,0 +1,77 @@
+import os
+
+from huggingface_hub.constants import HF_HUB_CACHE
+
+from utils.cache_index import CacheIndex
+from utils.formatting import format_size, parse_size
+
+
+class QuotaExceeded(Exception):
+    """Raised when a write would take a cache root over its quota"""
+
+
+class CacheRoot:
+    """A cache directory with its own index and optional size quota"""
+
+    def __init__(self, name, path, quota=None):
+        self.name = name
+        self.path = os.path.abspath(os.path.expanduser(str(path)))
+        self.quota = quota
+        self.index = CacheIndex(self.path)
+
+    def has_room_for(self, nbytes, index=None):
+        """Whether nbytes more would still fit within the quota"""
+        index = index or self.index
+        return not self.quota or index.size_on_disk + nbytes <= self.quota
+
+    def to_dict(self, index=None):
+        index = index or self.index
+        return {
+            'name': self.name,
+            'path': self.path,
+            'quota': self.quota,
+            'quota_formatted': format_size(self.quota) if self.quota else None,
+            'size': index.size_on_disk,
+            'size_formatted': format_size(index.size_on_disk),
+            'folders': len(index.repos),
+            'files': sum(repo.nb_files for repo in index.repos)
+        }
+
+
+class CacheRoots:
+    """The configured cache roots; the first one is the default.
+
+    Roots come from ``HF_WEBUI_CACHE_ROOTS`` as comma-separated
+    ``name=path[:quota]`` items, e.g. ``nvme=/mnt/nvme/hf:500G,hdd=/mnt/hdd/hf``.
+    Without it there is a single ``default`` root at the standard HF cache.
+    """
+
+    def __init__(self, roots):
+        if not roots:
+            raise ValueError('at least one cache root is required')
+        self._roots = {root.name: root for root in roots}
+        self.default = roots[0]
+
+    @classmethod
+    def from_env(cls):
+        config = os.environ.get('HF_WEBUI_CACHE_ROOTS', '').strip()
+        if not config:
+            return cls([CacheRoot('default', HF_HUB_CACHE)])
+
+        roots = []
+        for item in config.split(','):
+            name, _, spec = item.strip().partition('=')
+            path, _, quota = spec.partition(':')
+            if not name or not path:
+                raise ValueError(f'Invalid cache root {item!r}, expected name=path[:quota]')
+            roots.append(CacheRoot(name, path, parse_size(quota) if quota else None))
+        return cls(roots)
+
+    def __iter__(self):
+        return iter(self._roots.values())
+
+    def __contains__(self, name):
+        return name in self._roots
+
+    def get(self, name):
+        return self._roots.get(name)
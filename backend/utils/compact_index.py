@@ -0,0 +1,287 @@
+import os
+import sys
+from array import array
+from collections import defaultdict
+from pathlib import Path
+
+from huggingface_hub.utils import CacheNotFound, CorruptedCacheException
+
+REPO_TYPES = {'model', 'dataset', 'space'}
+
+
+class _Columns:
+    """Append-only column storage shared by successive CompactCacheInfo objects.
+
+    Blobs and files are rows in parallel arrays instead of one dataclass
+    (plus two ``Path`` objects) per file. File paths are interned relative
+    paths, so ``config.json`` is stored once however many snapshots hold it,
+    and blob names are only stored once per repo.
+    """
+
+    def __init__(self):
+        self.blob_name = []
+        self.blob_size = array('Q')
+        self.blob_atime = array('d')
+        self.blob_mtime = array('d')
+        self.file_path = array('I')
+        self.file_blob = array('I')
+        self.paths = []
+        self._path_ids = {}
+
+    def intern_path(self, path):
+        path_id = self._path_ids.get(path)
+        if path_id is None:
+            path_id = self._path_ids[path] = len(self.paths)
+            self.paths.append(path)
+        return path_id
+
+    def truncate(self, blobs, files):
+        """Drop rows appended after a repo turned out to be corrupted"""
+        del self.blob_name[blobs:]
+        del self.blob_size[blobs:]
+        del self.blob_atime[blobs:]
+        del self.blob_mtime[blobs:]
+        del self.file_path[files:]
+        del self.file_blob[files:]
+
+
+class CompactFile:
+    """Read-only view of one file row, with the attributes of ``CachedFileInfo``"""
+
+    __slots__ = ('_revision', '_row')
+
+    def __init__(self, revision, row):
+        self._revision = revision
+        self._row = row
+
+    @property
+    def _columns(self):
+        return self._revision._repo._columns
+
+    @property
+    def relative_path(self):
+        """Path of the file inside its snapshot, with forward slashes"""
+        return self._columns.paths[self._columns.file_path[self._row]]
+
+    @property
+    def file_name(self):
+        return self.relative_path.rsplit('/', 1)[-1]
+
+    @property
+    def file_path(self):
+        return self._revision.snapshot_path / self.relative_path
+
+    @property
+    def blob_path(self):
+        return self._revision._repo._blob_path(self._columns.file_blob[self._row])
+
+    @property
+    def size_on_disk(self):
+        return self._columns.blob_size[self._columns.file_blob[self._row]]
+
+    @property
+    def blob_last_accessed(self):
+        return self._columns.blob_atime[self._columns.file_blob[self._row]]
+
+    @property
+    def blob_last_modified(self):
+        return self._columns.blob_mtime[self._columns.file_blob[self._row]]
+
+
+class CompactRevision:
+    """A snapshot's file rows, with the attributes of ``CachedRevisionInfo``"""
+
+    __slots__ = ('_repo', 'commit_hash', 'refs', 'last_modified', '_file_start', '_file_end')
+
+    def __init__(self, repo, commit_hash, refs, last_modified, file_start, file_end):
+        self._repo = repo
+        self.commit_hash = commit_hash
+        self.refs = refs
+        self.last_modified = last_modified
+        self._file_start = file_start
+        self._file_end = file_end
+
+    @property
+    def snapshot_path(self):
+        return self._repo.repo_path / 'snapshots' / self.commit_hash
+
+    @property
+    def files(self):
+        return frozenset(CompactFile(self, row) for row in range(self._file_start, self._file_end))
+
+    @property
+    def nb_files(self):
+        return self._file_end - self._file_start
+
+    @property
+    def size_on_disk(self):
+        columns = self._repo._columns
+        blobs = {columns.file_blob[row] for row in range(self._file_start, self._file_end)}
+        return sum(columns.blob_size[blob] for blob in blobs)
+
+
+class CompactRepo:
+    """A cached repo over shared columns, with the attributes of ``CachedRepoInfo``"""
+
+    __slots__ = ('_columns', 'repo_id', 'repo_type', 'repo_path', 'revisions', 'size_on_disk', 'nb_files',
+                 'last_accessed', 'last_modified')
+
+    def __init__(self, columns, repo_id, repo_type, repo_path):
+        self._columns = columns
+        self.repo_id = repo_id
+        self.repo_type = repo_type
+        self.repo_path = repo_path
+        self.revisions = frozenset()
+        self.size_on_disk = 0
+        self.nb_files = 0
+        self.last_accessed = 0.0
+        self.last_modified = 0.0
+
+    @property
+    def refs(self):
+        return {ref: revision for revision in self.revisions for ref in revision.refs}
+
+    def _blob_path(self, blob):
+        name = self._columns.blob_name[blob]
+        # Blobs outside the repo's own blobs folder keep their full path
+        return Path(name) if os.path.isabs(name) else self.repo_path / 'blobs' / name
+
+
+class CompactCacheInfo:
+    """Result of a cache scan with the attributes of ``HFCacheInfo`` (size_on_disk, repos, warnings)"""
+
+    def __init__(self, columns=None, repos=frozenset(), warnings=None):
+        self._columns = columns or _Columns()
+        self.repos = frozenset(repos)
+        self.warnings = warnings or []
+        self.size_on_disk = sum(repo.size_on_disk for repo in self.repos)
+
+    def with_repo(self, repo_path):
+        """A new info with one repo folder rescanned; the columns are shared, not copied"""
+        # Full scans hold resolved paths, so a root reached through a symlink must match them
+        repo_path = Path(repo_path).expanduser().resolve()
+        repo = _scan_repo(self._columns, repo_path)
+        repos = {r for r in self.repos if r.repo_path != repo_path}
+        repos.add(repo)
+        return CompactCacheInfo(self._columns, repos, self.warnings)
+
+
+def resolve_blob(link_path, blobs_prefix):
+    """Resolve a snapshot file to its blob.
+
+    Snapshot links point straight into the repo's blobs folder, so one
+    readlink is enough; ``realpath`` (an lstat per path component) is only
+    needed for anything else.
+    """
+    try:
+        target = os.readlink(link_path)
+    except OSError:
+        return os.path.realpath(link_path)
+    blob_path = os.path.normpath(os.path.join(os.path.dirname(link_path), target))
+    if blob_path.startswith(blobs_prefix) and os.sep not in blob_path[len(blobs_prefix):]:
+        return blob_path
+    return os.path.realpath(link_path)
+
+
+def _scan_repo(columns, repo_path):
+    """Scan one repo folder into the columns, mirroring huggingface_hub's ``_scan_cached_repo``"""
+    if not repo_path.is_dir():
+        raise CorruptedCacheException(f'Repo path is not a directory: {repo_path}')
+    if '--' not in repo_path.name:
+        raise CorruptedCacheException(f'Repo path is not a valid HuggingFace cache directory: {repo_path}')
+    repo_type, repo_id = repo_path.name.split('--', maxsplit=1)
+    repo_type = repo_type[:-1]
+    if repo_type not in REPO_TYPES:
+        raise CorruptedCacheException(f'Repo type must be `dataset`, `model` or `space`, found `{repo_type}` ({repo_path}).')
+    snapshots_path = repo_path / 'snapshots'
+    if not snapshots_path.is_dir():
+        raise CorruptedCacheException(f"Snapshots dir doesn't exist in cached repo: {snapshots_path}")
+
+    refs_by_hash = defaultdict(set)
+    refs_path = repo_path / 'refs'
+    if refs_path.is_file():
+        raise CorruptedCacheException(f'Refs directory cannot be a file: {refs_path}')
+    if refs_path.is_dir():
+        for dirpath, _, filenames in os.walk(refs_path):
+            for filename in filenames:
+                ref_path = os.path.join(dirpath, filename)
+                with open(ref_path) as f:
+                    refs_by_hash[f.read()].add(os.path.relpath(ref_path, refs_path))
+
+    blob_start, file_start = len(columns.blob_size), len(columns.file_path)
+    repo = CompactRepo(columns, sys.intern(repo_id.replace('--', '/')), repo_type, repo_path)
+    blobs_prefix = str(repo_path / 'blobs') + os.sep
+    blob_ids = {}
+    try:
+        revisions = []
+        for revision_entry in os.scandir(snapshots_path):
+            if not revision_entry.is_dir():
+                raise CorruptedCacheException(f'Snapshots folder corrupted. Found a file: {revision_entry.path}')
+            revision_files = len(columns.file_path)
+            last_modified = None
+            for dirpath, _, filenames in os.walk(revision_entry.path):
+                relative_dir = os.path.relpath(dirpath, revision_entry.path)
+                for name in filenames:
+                    blob_path = resolve_blob(os.path.join(dirpath, name), blobs_prefix)
+                    blob = blob_ids.get(blob_path)
+                    if blob is None:
+                        try:
+                            stat = os.stat(blob_path)
+                        except FileNotFoundError:
+                            raise CorruptedCacheException(f'Blob missing (broken symlink): {blob_path}')
+                        blob = blob_ids[blob_path] = len(columns.blob_size)
+                        columns.blob_name.append(blob_path[len(blobs_prefix):] if blob_path.startswith(blobs_prefix) else blob_path)
+                        columns.blob_size.append(stat.st_size)
+                        columns.blob_atime.append(stat.st_atime)
+                        columns.blob_mtime.append(stat.st_mtime)
+                    relative = name if relative_dir == '.' else f'{relative_dir}/{name}'.replace(os.sep, '/')
+                    columns.file_path.append(columns.intern_path(relative))
+                    columns.file_blob.append(blob)
+                    mtime = columns.blob_mtime[blob]
+                    last_modified = mtime if last_modified is None or mtime > last_modified else last_modified
+            if last_modified is None:
+                last_modified = revision_entry.stat().st_mtime
+            revisions.append(CompactRevision(
+                repo, revision_entry.name, frozenset(refs_by_hash.pop(revision_entry.name, set())),
+                last_modified, revision_files, len(columns.file_path)
+            ))
+
+        if refs_by_hash:
+            raise CorruptedCacheException(f'Reference(s) refer to missing commit hashes: {dict(refs_by_hash)} ({repo_path}).')
+    except BaseException:
+        columns.truncate(blob_start, file_start)
+        raise
+
+    blob_end = len(columns.blob_size)
+    repo.revisions = frozenset(revisions)
+    repo.nb_files = blob_end - blob_start
+    repo.size_on_disk = sum(columns.blob_size[blob_start:blob_end])
+    if repo.nb_files:
+        repo.last_accessed = max(columns.blob_atime[blob_start:blob_end])
+        repo.last_modified = max(columns.blob_mtime[blob_start:blob_end])
+    else:
+        stat = repo_path.stat()
+        repo.last_accessed = stat.st_atime
+        repo.last_modified = stat.st_mtime
+    return repo
+
+
+def scan_cache_compact(cache_dir):
+    """Scan a cache directory into a CompactCacheInfo, like ``scan_cache_dir`` does into HFCacheInfo"""
+    cache_dir = Path(cache_dir).expanduser().resolve()
+    if not cache_dir.exists():
+        raise CacheNotFound(f'Cache directory not found: {cache_dir}', cache_dir=cache_dir)
+    if cache_dir.is_file():
+        raise ValueError(f'Scan cache expects a directory but found a file: {cache_dir}')
+
+    columns = _Columns()
+    repos = []
+    warnings = []
+    for repo_path in cache_dir.iterdir():
+        if repo_path.name == '.locks':
+            continue
+        try:
+            repos.append(_scan_repo(columns, repo_path))
+        except CorruptedCacheException as e:
+            warnings.append(e)
+    return CompactCacheInfo(columns, repos, warnings)
@@ -9,4 +9,14 @@ def format_size(size_in_bytes):
         size_in_bytes /= 1024.0
         i += 1
     
-    return f"{size_in_bytes:.1f} {size_names[i]}"
\ No newline at end of file
+    return f"{size_in_bytes:.1f} {size_names[i]}"
+
+def parse_size(value):
+    """Parse a human readable size such as 500G or 1.5TB into bytes"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip().upper().rstrip('B')
+    multipliers = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+    if text and text[-1] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(float(text))
@@ -0,0 +1,139 @@
+import base64
+import threading
+from array import array
+
+COLUMNS = ('timestamp', 'size', 'model', 'dataset', 'space', 'downloaded')
+
+# (name, bucket width in seconds, capacity): two days at 5 minutes, two
+# months hourly and three years daily
+TIERS = (
+    ('5m', 300, 576),
+    ('1h', 3600, 1440),
+    ('1d', 86400, 1095),
+)
+
+
+class RingSeries:
+    """Fixed-capacity ring buffer of samples, stored column-wise in float arrays"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.columns = {name: array('d') for name in COLUMNS}
+        # Index of the oldest sample once the buffer has wrapped
+        self.start = 0
+
+    def __len__(self):
+        return len(self.columns['timestamp'])
+
+    def append(self, sample):
+        if len(self) < self.capacity:
+            for name in COLUMNS:
+                self.columns[name].append(sample[name])
+        else:
+            for name in COLUMNS:
+                self.columns[name][self.start] = sample[name]
+            self.start = (self.start + 1) % self.capacity
+
+    def rows(self):
+        """Yield samples oldest first"""
+        size = len(self)
+        for offset in range(size):
+            index = (self.start + offset) % size
+            yield {name: self.columns[name][index] for name in COLUMNS}
+
+    def to_dict(self):
+        return {
+            'start': self.start,
+            'columns': {name: base64.b64encode(column.tobytes()).decode() for name, column in self.columns.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, capacity, data):
+        series = cls(capacity)
+        for name in COLUMNS:
+            series.columns[name].frombytes(base64.b64decode(data['columns'][name]))
+        series.start = data['start']
+        if len(series) > capacity:
+            # Capacity shrank since the file was written, start afresh
+            return cls(capacity)
+        return series
+
+
+class UsageHistory:
+    """Multi-resolution cache usage history with bounded memory.
+
+    Every sample goes into each tier; a tier keeps one open bucket that is
+    appended to its ring buffer once a sample falls into the next bucket.
+    Sizes keep the latest value of the bucket, download volume is summed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tiers = {name: RingSeries(capacity) for name, _, capacity in TIERS}
+        self._open = {name: None for name, _, _ in TIERS}
+        self._downloaded = 0
+
+    def add_downloaded(self, nbytes):
+        with self._lock:
+            self._downloaded += nbytes
+
+    def record(self, timestamp, size, by_type):
+        """Record a sample; download volume is what accumulated since the last one"""
+        with self._lock:
+            sample = {
+                'timestamp': timestamp,
+                'size': size,
+                'model': by_type.get('model', 0),
+                'dataset': by_type.get('dataset', 0),
+                'space': by_type.get('space', 0),
+                'downloaded': self._downloaded
+            }
+            self._downloaded = 0
+
+            for name, width, _ in TIERS:
+                bucket = int(timestamp // width)
+                current = self._open[name]
+                if current is not None and current['bucket'] != bucket:
+                    self.tiers[name].append(current['sample'])
+                    current = None
+                if current is None:
+                    self._open[name] = {'bucket': bucket, 'sample': dict(sample)}
+                else:
+                    downloaded = current['sample']['downloaded'] + sample['downloaded']
+                    current['sample'].update(sample, downloaded=downloaded)
+
+    def series(self, name):
+        """Samples of one tier, oldest first, including the still-open bucket"""
+        with self._lock:
+            rows = list(self.tiers[name].rows())
+            if self._open[name] is not None:
+                rows.append(dict(self._open[name]['sample']))
+            return rows
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'tiers': {name: series.to_dict() for name, series in self.tiers.items()},
+                'open': self._open
+            }
+
+    def load(self, data):
+        with self._lock:
+            for name, _, capacity in TIERS:
+                if name in data.get('tiers', {}):
+                    self.tiers[name] = RingSeries.from_dict(capacity, data['tiers'][name])
+                self._open[name] = data.get('open', {}).get(name)
+
+
+def growth_rate(rows):
+    """Least-squares slope of total size in bytes per second, or None"""
+    if len(rows) < 2:
+        return None
+    n = len(rows)
+    mean_t = sum(row['timestamp'] for row in rows) / n
+    mean_s = sum(row['size'] for row in rows) / n
+    variance = sum((row['timestamp'] - mean_t) ** 2 for row in rows)
+    if variance == 0:
+        return None
+    covariance = sum((row['timestamp'] - mean_t) * (row['size'] - mean_s) for row in rows)
+    return covariance / variance
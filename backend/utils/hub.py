@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from huggingface_hub import configure_http_backend
+from requests.adapters import HTTPAdapter
+
+
+def use_pooled_session(pool_size=32):
+    """Route all huggingface_hub traffic through one keep-alive connection pool.
+
+    ``huggingface_hub`` creates a session per thread by default, and every
+    download runs in its own thread, so nothing was reused between files.
+    The factory hands every thread the same session instead: the urllib3
+    pools behind it are thread-safe and the Hub API doesn't rely on cookies.
+    Returns the shared session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    configure_http_backend(backend_factory=lambda: session)
+    return session
+
+
+class MetadataCache:
+    """Thread-safe TTL cache of resolved file metadata (commit, etag, size, location).
+
+    Holds at most ``max_entries`` files, evicting the least recently used.
+    """
+
+    def __init__(self, ttl=300, max_entries=4096):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, metadata):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), metadata)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def to_dict(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries, 'ttl': self.ttl,
+                    'hits': self.hits, 'misses': self.misses}
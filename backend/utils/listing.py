@@ -0,0 +1,117 @@
+import base64
+import bisect
+import json
+import threading
+import uuid
+
+
+def encode_cursor(key):
+    """Turn a (root, path) sort key into an opaque URL-safe cursor"""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError for a malformed cursor"""
+    try:
+        root, path = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError(f'invalid cursor: {cursor}')
+    return str(root), str(path)
+
+
+class CacheListing:
+    """Sorted cache rows with a change log, for cursor paging and delta refreshes.
+
+    Rows are keyed by (root name, repo path). Each ``update`` diffs the
+    current scan against the previous one and stamps changed and removed
+    keys with a new generation, so a client holding a ``generation`` token
+    only needs the rows that changed since. Tokens carry a per-process epoch
+    and tombstones are bounded, so a client that is too far behind (or
+    talking to a restarted server) is told to reload instead.
+    """
+
+    def __init__(self, max_tombstones=10000):
+        self.max_tombstones = max_tombstones
+        self.epoch = uuid.uuid4().hex[:8]
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._sources = ()
+        self._rows = {}
+        self._keys = []
+        self._changed = {}
+        self._removed = {}
+        # Oldest generation the tombstones still fully cover
+        self._floor = 0
+
+    @property
+    def token(self):
+        return f'{self.epoch}:{self.generation}'
+
+    def update(self, sources, build_rows):
+        """Refresh from ``sources`` (compared by identity) using ``build_rows() -> {key: row}``"""
+        with self._lock:
+            if len(sources) == len(self._sources) and all(a is b for a, b in zip(sources, self._sources)):
+                return
+            rows = build_rows()
+            generation = self.generation + 1
+            changed = False
+            for key, row in rows.items():
+                if self._rows.get(key) != row:
+                    self._changed[key] = generation
+                    self._removed.pop(key, None)
+                    changed = True
+            for key in self._rows.keys() - rows.keys():
+                self._removed[key] = generation
+                self._changed.pop(key, None)
+                changed = True
+
+            if len(self._removed) > self.max_tombstones:
+                oldest = sorted(self._removed.items(), key=lambda item: item[1])
+                for key, removed_at in oldest[:len(self._removed) - self.max_tombstones]:
+                    del self._removed[key]
+                    self._floor = max(self._floor, removed_at)
+
+            if changed:
+                self.generation = generation
+                self._keys = sorted(rows)
+            self._rows = rows
+            self._sources = tuple(sources)
+
+    def page(self, cursor=None, limit=None, root=None):
+        """Rows after the cursor key, at most limit of them: returns (rows, next cursor key or None)"""
+        with self._lock:
+            start = bisect.bisect_right(self._keys, cursor) if cursor else 0
+            rows = []
+            last = None
+            for position in range(start, len(self._keys)):
+                key = self._keys[position]
+                if root is not None and key[0] != root:
+                    continue
+                if len(rows) == limit:
+                    return rows, last
+                rows.append(self._rows[key])
+                last = key
+            return rows, None
+
+    def changes(self, token, root=None):
+        """Rows changed and keys removed since a token, or None if the client must reload"""
+        epoch, _, generation = token.partition(':')
+        with self._lock:
+            try:
+                since = int(generation)
+            except ValueError:
+                return None
+            if epoch != self.epoch or since < self._floor or since > self.generation:
+                return None
+            changed = sorted(key for key, at in self._changed.items() if at > since and key in self._rows)
+            removed = sorted(key for key, at in self._removed.items() if at > since)
+            if root is not None:
+                changed = [key for key in changed if key[0] == root]
+                removed = [key for key in removed if key[0] == root]
+            return [self._rows[key] for key in changed], removed
+
+    def count(self, root=None):
+        with self._lock:
+            if root is None:
+                return len(self._keys)
+            return sum(1 for key in self._keys if key[0] == root)
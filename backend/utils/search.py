@@ -0,0 +1,154 @@
+import bisect
+import fnmatch
+import os
+import posixpath
+import re
+from array import array
+
+
+def trigrams(text):
+    """The set of 3-character substrings of text"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _glob_literal(pattern):
+    """Longest run of plain characters in a glob, usable as a trigram prefilter"""
+    # A bracket class matches one of its characters, none of them is required
+    return max(re.split(r'\[!?\]?[^\]]*\]?|[*?\]]', pattern.lower()), key=len)
+
+
+def repo_signature(repo):
+    """What a rescan of an unchanged repo reproduces, so rescans that found nothing new can be told apart"""
+    return (repo.repo_type, repo.repo_id, str(repo.repo_path), repo.nb_files, repo.size_on_disk, repo.last_modified,
+            frozenset((revision.commit_hash, revision.nb_files, revision.last_modified) for revision in repo.revisions))
+
+
+class SearchIndex:
+    """Prefix/trigram index over the repo ids and file paths of one cache scan.
+
+    Files are stored as parallel arrays (path id, repo id, size). Paths are
+    interned, so the trigram postings only cover distinct paths: a
+    ``config.json`` present in ten thousand repos is indexed once. ``info``
+    is the ``HFCacheInfo`` the index was built from and ``signature`` its
+    repos' ``repo_signature``, so callers can tell when it needs rebuilding.
+    """
+
+    def __init__(self, info):
+        self.info = info
+        self.signature = frozenset(repo_signature(repo) for repo in info.repos)
+        self.repos = []
+        self.paths = []
+        self.entry_path = array('I')
+        self.entry_repo = array('I')
+        self.entry_size = array('Q')
+        self.path_entries = []
+        self.repo_entries = []
+        self._postings = {}
+        self._build()
+
+    def _build(self):
+        path_ids = {}
+        for repo in sorted(self.info.repos, key=lambda r: (r.repo_type, r.repo_id)):
+            repo_idx = len(self.repos)
+            self.repos.append((repo.repo_id, repo.repo_type, str(repo.repo_path)))
+            self.repo_entries.append(array('I'))
+            seen = set()
+            for revision in repo.revisions:
+                # String slicing instead of Path.relative_to, which dominates build time
+                prefix_len = len(str(revision.snapshot_path)) + 1
+                for cached_file in revision.files:
+                    path = str(cached_file.file_path)[prefix_len:].replace(os.sep, '/')
+                    if path in seen:
+                        continue
+                    seen.add(path)
+                    path_idx = path_ids.get(path)
+                    if path_idx is None:
+                        path_idx = path_ids[path] = len(self.paths)
+                        self.paths.append(path)
+                        self.path_entries.append(array('I'))
+                    entry = len(self.entry_path)
+                    self.entry_path.append(path_idx)
+                    self.entry_repo.append(repo_idx)
+                    self.entry_size.append(cached_file.size_on_disk)
+                    self.path_entries[path_idx].append(entry)
+                    self.repo_entries[repo_idx].append(entry)
+
+        self._lower_paths = [path.lower() for path in self.paths]
+        postings = {}
+        for path_idx, path in enumerate(self._lower_paths):
+            for gram in trigrams(path):
+                postings.setdefault(gram, array('I')).append(path_idx)
+        self._postings = postings
+        # Sorted file names for prefix lookups of queries too short for trigrams
+        self._names = sorted((posixpath.basename(path), path_idx) for path_idx, path in enumerate(self._lower_paths))
+
+    def covers(self, info):
+        """Whether info holds the same repos and files this index was built from"""
+        return info is self.info or frozenset(repo_signature(repo) for repo in info.repos) == self.signature
+
+    def __len__(self):
+        return len(self.entry_path)
+
+    def _paths_containing(self, text):
+        """Ids of the distinct paths containing text (lowercase)"""
+        if len(text) < 3:
+            start = bisect.bisect_left(self._names, (text,))
+            matches = set()
+            for name, path_idx in self._names[start:]:
+                if not name.startswith(text):
+                    break
+                matches.add(path_idx)
+            return matches
+        lists = sorted((self._postings.get(gram, ()) for gram in trigrams(text)), key=len)
+        candidates = set(lists[0])
+        for postings in lists[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(postings)
+        return {path_idx for path_idx in candidates if text in self._lower_paths[path_idx]}
+
+    def search(self, query='', pattern=None, min_size=None, max_size=None, repo_type=None):
+        """Yield (repo_id, repo_type, repo_path, file path, size) for matching files.
+
+        ``query`` matches a substring of the repo id or the file path (a
+        file name prefix for one- and two-character queries), ``pattern`` is
+        a case-insensitive glob on the file path.
+        """
+        query = (query or '').lower()
+        glob = re.compile(fnmatch.translate(pattern), re.IGNORECASE).match if pattern else None
+        glob_cache = {}
+
+        def path_ok(path_idx):
+            if glob is None:
+                return True
+            ok = glob_cache.get(path_idx)
+            if ok is None:
+                ok = glob_cache[path_idx] = glob(self.paths[path_idx]) is not None
+            return ok
+
+        if query:
+            path_hits = self._paths_containing(query)
+            repo_hits = [idx for idx, repo in enumerate(self.repos) if query in repo[0].lower()]
+        else:
+            literal = _glob_literal(pattern) if pattern else ''
+            path_hits = self._paths_containing(literal) if len(literal) >= 3 else range(len(self.paths))
+            repo_hits = []
+
+        def entries():
+            for path_idx in sorted(path_hits):
+                if path_ok(path_idx):
+                    yield from self.path_entries[path_idx]
+            for repo_idx in repo_hits:
+                for entry in self.repo_entries[repo_idx]:
+                    path_idx = self.entry_path[entry]
+                    if path_idx not in path_hits and path_ok(path_idx):
+                        yield entry
+
+        for entry in entries():
+            size = self.entry_size[entry]
+            if (min_size is not None and size < min_size) or (max_size is not None and size > max_size):
+                continue
+            repo_id, entry_repo_type, repo_path = self.repos[self.entry_repo[entry]]
+            if repo_type and entry_repo_type != repo_type:
+                continue
+            yield repo_id, entry_repo_type, repo_path, self.paths[self.entry_path[entry]], size
@@ -0,0 +1,28 @@
+import json
+import os
+from pathlib import Path
+
+
+def state_dir():
+    """Directory for the backend's own persistent state (outside the HF cache)"""
+    path = Path(os.environ.get('HF_WEBUI_STATE_DIR', Path.home() / '.cache' / 'hf-cli-web-ui'))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def load_json(name, default=None):
+    """Load a JSON state file, returning default if it doesn't exist yet"""
+    path = state_dir() / name
+    if not path.exists():
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_json(name, data):
+    """Atomically write a JSON state file"""
+    path = state_dir() / name
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
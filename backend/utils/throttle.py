@@ -0,0 +1,170 @@
+import threading
+import time
+from datetime import datetime
+
+# Longest single sleep while throttling, so cancellations and new limits apply promptly
+SLEEP_SLICE = 0.5
+
+
+def parse_limit(value):
+    """Normalise a bytes-per-second limit, treating None/0 as unlimited"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        # bool is an int, but true isn't a rate
+        raise ValueError("rate limits must be numbers")
+    limit = int(value)
+    if limit < 0:
+        raise ValueError("rate limits must be positive")
+    return limit or None
+
+
+def _parse_clock(value):
+    """Parse an HH:MM string into minutes after midnight"""
+    hours, minutes = value.split(':')
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"Invalid time of day: {value}")
+    return hours * 60 + minutes
+
+
+class TokenBucket:
+    """Thread-safe token bucket measured in bytes per second"""
+
+    def __init__(self, rate=None):
+        self._lock = threading.Lock()
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        with self._lock:
+            self.rate = rate
+            # Allow up to one second worth of burst
+            self.capacity = rate or 0
+            self.tokens = self.capacity
+            self.updated = time.monotonic()
+
+    def reserve(self, nbytes):
+        """Take nbytes from the bucket and return how long the caller has to wait.
+
+        The bucket is allowed to go into debt so chunks bigger than the burst
+        size still work; the debt is paid back by the returned delay.
+        """
+        with self._lock:
+            if not self.rate:
+                return 0.0
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= nbytes
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class BandwidthLimiter:
+    """Global and per-job download rate limits with time-of-day schedules.
+
+    A schedule is a list of ``{'start': 'HH:MM', 'end': 'HH:MM', 'limit': n}``
+    windows; the first window matching the current time overrides the global
+    limit, and windows may wrap around midnight. A limit of None or 0 means
+    full speed.
+    """
+
+    def __init__(self, global_limit=None, schedule=None):
+        self._lock = threading.Lock()
+        self._global = TokenBucket()
+        self._jobs = {}
+        self.global_limit = None
+        self.schedule = []
+        self.configure(global_limit=global_limit, schedule=schedule or [])
+
+    def configure(self, global_limit=None, schedule=None):
+        """Update the global limit and/or the schedule (None leaves it unchanged).
+
+        Both are parsed before either is applied, so an invalid request changes nothing.
+        """
+        limit = parse_limit(global_limit) if global_limit is not None else None
+        windows = None
+        if schedule is not None:
+            windows = [{
+                'start': window['start'],
+                'end': window['end'],
+                'limit': parse_limit(window.get('limit')),
+                '_range': (_parse_clock(window['start']), _parse_clock(window['end'])),
+            } for window in schedule]
+        with self._lock:
+            if global_limit is not None:
+                self.global_limit = limit
+            if windows is not None:
+                self.schedule = windows
+
+    def current_global_limit(self, now=None):
+        """Return the global limit in force at the given (or current) time"""
+        now = now or datetime.now()
+        minute = now.hour * 60 + now.minute
+        for window in self.schedule:
+            start, end = window['_range']
+            if start <= end:
+                matches = start <= minute < end
+            else:
+                matches = minute >= start or minute < end
+            if matches:
+                return window['limit']
+        return self.global_limit
+
+    def set_job_limit(self, job_id, limit):
+        limit = parse_limit(limit)
+        with self._lock:
+            if limit is None:
+                self._jobs.pop(job_id, None)
+            elif job_id in self._jobs:
+                self._jobs[job_id].set_rate(limit)
+            else:
+                self._jobs[job_id] = TokenBucket(limit)
+
+    def job_limit(self, job_id):
+        bucket = self._jobs.get(job_id)
+        return bucket.rate if bucket else None
+
+    def release(self, job_id):
+        """Forget the per-job bucket once a download finishes"""
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def effective_limit(self, job_id):
+        limits = [limit for limit in (self.current_global_limit(), self.job_limit(job_id)) if limit]
+        return min(limits) if limits else None
+
+    def throttle(self, job_id, nbytes, cancelled=None):
+        """Account for nbytes transferred by a job, sleeping as needed.
+
+        The wait is taken in short slices and ends early once ``cancelled()``
+        returns true or the job's effective limit changes (the next chunk is
+        then measured against the new rate). Returns the effective limit
+        applied to the job.
+        """
+        global_limit = self.current_global_limit()
+        if self._global.rate != global_limit:
+            self._global.set_rate(global_limit)
+
+        delay = self._global.reserve(nbytes)
+        job_bucket = self._jobs.get(job_id)
+        if job_bucket is not None:
+            delay = max(delay, job_bucket.reserve(nbytes))
+        limit = self.effective_limit(job_id)
+        deadline = time.monotonic() + delay
+        while delay > 0:
+            time.sleep(min(delay, SLEEP_SLICE))
+            if (cancelled is not None and cancelled()) or self.effective_limit(job_id) != limit:
+                break
+            delay = deadline - time.monotonic()
+        return self.effective_limit(job_id)
+
+    def to_dict(self):
+        return {
+            'global_limit': self.global_limit,
+            'current_global_limit': self.current_global_limit(),
+            'schedule': [{key: value for key, value in window.items() if not key.startswith('_')}
+                         for window in self.schedule],
+            'jobs': {job_id: bucket.rate for job_id, bucket in self._jobs.items()},
+        }
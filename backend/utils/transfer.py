@@ -0,0 +1,192 @@
+import os
+
+from filelock import FileLock
+from huggingface_hub import get_hf_file_metadata, hf_hub_url
+from huggingface_hub.constants import DEFAULT_REVISION, HF_HUB_CACHE, HF_HUB_DOWNLOAD_TIMEOUT
+from huggingface_hub.file_download import (
+    REGEX_COMMIT_HASH,
+    _cache_commit_hash_for_specific_revision,
+    _chmod_and_replace,
+    _create_symlink,
+    _get_pointer_path,
+    repo_folder_name,
+)
+from huggingface_hub.utils import LocalEntryNotFoundError, build_hf_headers, get_session, hf_raise_for_status
+
+# Size of the reads in the transfer loop
+CHUNK_SIZE = 1024 * 1024
+
+
+class DownloadCancelled(Exception):
+    """Raised from a chunk callback to abort a transfer"""
+
+
+def cached_file_path(cache_dir, repo_id, filename, revision=None, repo_type="model"):
+    """Resolve a file from the cache alone: returns (commit hash, snapshot path) or (None, None)"""
+    revision = revision or DEFAULT_REVISION
+    if ".." in revision.split("/") or ".." in repo_id.split("/"):
+        return None, None
+    storage_folder = os.path.join(str(cache_dir), repo_folder_name(repo_id=repo_id, repo_type=repo_type))
+    commit_hash = revision
+    if not REGEX_COMMIT_HASH.match(revision):
+        ref_path = os.path.join(storage_folder, "refs", revision)
+        if not os.path.isfile(ref_path):
+            return None, None
+        with open(ref_path) as f:
+            commit_hash = f.read().strip()
+    try:
+        pointer_path = _get_pointer_path(storage_folder, commit_hash, os.path.join(*filename.split("/")))
+    except ValueError:
+        # Path escapes the snapshot folder
+        return None, None
+    if not os.path.isfile(pointer_path):
+        return None, None
+    return commit_hash, pointer_path
+
+
+def _metadata_key(repo_id, filename, revision, repo_type):
+    # Not keyed by endpoint: peers and the Hub resolve the same revision to the same file
+    return (repo_type, repo_id, revision or DEFAULT_REVISION, filename)
+
+
+def fetch_file_metadata(repo_id, filename, *, revision=None, repo_type="model", endpoint=None, token=None,
+                        etag_timeout=30, metadata_cache=None):
+    """HEAD a file on the Hub (or ``endpoint``) and return its metadata, with commit hash and etag resolved"""
+    url = hf_hub_url(repo_id, filename, repo_type=repo_type, revision=revision, endpoint=endpoint)
+    metadata = get_hf_file_metadata(url=url, token=token, timeout=etag_timeout)
+    if metadata.commit_hash is None or metadata.etag is None:
+        raise ValueError(f"Could not resolve commit hash and etag for {repo_id}/{filename}")
+    if metadata_cache is not None:
+        metadata_cache.put(_metadata_key(repo_id, filename, revision, repo_type), metadata)
+    return metadata
+
+
+def find_cached(repo_id, filename, *, revision=None, repo_type="model", cache_dir=None, metadata_cache=None,
+                offline=False):
+    """The snapshot path of a file if the cache alone can answer for it, else None.
+
+    That's the case for commit hashes and in offline mode, or while
+    ``metadata_cache`` still holds what the revision resolved to.
+    """
+    cache_dir = str(cache_dir or HF_HUB_CACHE)
+    revision = revision or DEFAULT_REVISION
+    if offline or REGEX_COMMIT_HASH.match(revision):
+        return cached_file_path(cache_dir, repo_id, filename, revision, repo_type)[1]
+    key = _metadata_key(repo_id, filename, revision, repo_type)
+    metadata = metadata_cache.get(key) if metadata_cache is not None else None
+    if metadata is None:
+        return None
+    # Only trusted for files already on disk; a transfer needs a fresh (signed) location
+    storage_folder = os.path.join(cache_dir, repo_folder_name(repo_id=repo_id, repo_type=repo_type))
+    pointer_path = _get_pointer_path(storage_folder, metadata.commit_hash, os.path.join(*filename.split("/")))
+    return pointer_path if os.path.exists(pointer_path) else None
+
+
+def cache_ref(cache_dir, repo_id, revision, commit_hash, repo_type="model"):
+    """Point a cached branch or tag at a commit, as the Hub resolved it"""
+    storage_folder = os.path.join(str(cache_dir), repo_folder_name(repo_id=repo_id, repo_type=repo_type))
+    _cache_commit_hash_for_specific_revision(storage_folder, revision or DEFAULT_REVISION, commit_hash)
+
+
+def download_to_cache(repo_id, filename, *, revision=None, repo_type="model", cache_dir=None,
+                      token=None, etag_timeout=30, force_download=False, endpoint=None, on_chunk=None,
+                      metadata_cache=None, offline=False):
+    """Download a single file into the Hugging Face cache layout.
+
+    Mirrors what ``hf_hub_download`` does (blobs, snapshot symlinks, refs and
+    resumable ``.incomplete`` files) but runs the transfer loop here so every
+    chunk can be reported through ``on_chunk(nbytes, downloaded, total)``.
+    The callback may raise (e.g. ``DownloadCancelled``) to stop the transfer;
+    the partial blob is kept so the next attempt resumes from it.
+    ``force_download`` refetches the blob even if it is already cached, e.g.
+    when the cached copy is known to be truncated. ``endpoint`` replaces the
+    Hub URL, e.g. with a peer instance's ``/mirror``. Refs are only written
+    from the Hub's answer: a peer resolves branches against its own, possibly
+    older, cache, so peers should be asked for commit hashes.
+
+    Files already cached make no network call when ``revision`` is a commit
+    hash, or when ``metadata_cache`` (a ``MetadataCache``) still holds the
+    revision's metadata. ``offline`` answers from the cached refs alone and
+    raises ``LocalEntryNotFoundError`` for anything not cached.
+    """
+    cache_dir = str(cache_dir or HF_HUB_CACHE)
+    revision = revision or DEFAULT_REVISION
+    storage_folder = os.path.join(cache_dir, repo_folder_name(repo_id=repo_id, repo_type=repo_type))
+
+    if not force_download:
+        pointer_path = find_cached(repo_id, filename, revision=revision, repo_type=repo_type, cache_dir=cache_dir,
+                                   metadata_cache=metadata_cache, offline=offline)
+        if pointer_path is not None:
+            return pointer_path
+    if offline:
+        raise LocalEntryNotFoundError(f"{repo_id}/{filename}@{revision} is not cached and offline mode is on")
+
+    url = hf_hub_url(repo_id, filename, repo_type=repo_type, revision=revision, endpoint=endpoint)
+    # Like refs, cached resolutions only come from the Hub
+    metadata = fetch_file_metadata(repo_id, filename, revision=revision, repo_type=repo_type, endpoint=endpoint,
+                                   token=token, etag_timeout=etag_timeout,
+                                   metadata_cache=metadata_cache if endpoint is None else None)
+
+    blob_path = os.path.join(storage_folder, "blobs", metadata.etag)
+    pointer_path = _get_pointer_path(storage_folder, metadata.commit_hash, os.path.join(*filename.split("/")))
+    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+    os.makedirs(os.path.dirname(pointer_path), exist_ok=True)
+    if endpoint is None:
+        _cache_commit_hash_for_specific_revision(storage_folder, revision, metadata.commit_hash)
+
+    if not force_download and os.path.exists(pointer_path):
+        return pointer_path
+
+    lock_path = os.path.join(cache_dir, ".locks", repo_folder_name(repo_id=repo_id, repo_type=repo_type),
+                             f"{metadata.etag}.lock")
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    with FileLock(lock_path):
+        if not force_download:
+            # Another worker may have finished the same blob while we waited
+            if os.path.exists(pointer_path):
+                return pointer_path
+            if os.path.exists(blob_path):
+                # Linked under the blob's lock, so garbage collection can't take an orphan away in between
+                _create_symlink(blob_path, pointer_path, new_blob=False)
+                return pointer_path
+
+        incomplete_path = blob_path + ".incomplete"
+        resume_size = os.path.getsize(incomplete_path) if os.path.exists(incomplete_path) else 0
+
+        headers = build_hf_headers(token=token)
+        if metadata.location != url:
+            # Don't leak the token to the CDN serving LFS blobs
+            headers.pop("authorization", None)
+        if resume_size:
+            headers["Range"] = f"bytes={resume_size}-"
+
+        with get_session().get(metadata.location, headers=headers, stream=True,
+                               timeout=HF_HUB_DOWNLOAD_TIMEOUT) as response:
+            hf_raise_for_status(response)
+            if resume_size and response.status_code != 206:
+                # The server ignored the range, start over
+                resume_size = 0
+
+            downloaded = resume_size
+            with open(incomplete_path, "ab" if resume_size else "wb") as blob_file:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if not chunk:
+                        continue
+                    blob_file.write(chunk)
+                    downloaded += len(chunk)
+                    if on_chunk is not None:
+                        on_chunk(len(chunk), downloaded, metadata.size)
+
+        if metadata.size is not None and downloaded != metadata.size:
+            if downloaded > metadata.size:
+                # Can't be resumed from, start over next time
+                os.remove(incomplete_path)
+            # The connection closed early: keep the partial blob for the next attempt to resume
+            raise EnvironmentError(
+                f"Consistency check failed: {repo_id}/{filename} should be {metadata.size} bytes "
+                f"but {downloaded} were downloaded"
+            )
+        _chmod_and_replace(incomplete_path, blob_path)
+        _create_symlink(blob_path, pointer_path, new_blob=True)
+
+    return pointer_path
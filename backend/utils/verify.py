@@ -0,0 +1,88 @@
+import hashlib
+import mmap
+import os
+import threading
+
+from utils.state import load_json, save_json
+
+# Bytes fed to the hash per update; large slices keep the GIL released
+HASH_CHUNK = 16 * 1024 * 1024
+
+
+def expected_digest(blob_path):
+    """Work out how a blob is named: (kind, digest) or None if it isn't a hash.
+
+    LFS blobs are named after their SHA256, regular git files after their git
+    blob id (SHA1 of ``blob <size>\\0`` + content).
+    """
+    name = os.path.basename(blob_path)
+    try:
+        int(name, 16)
+    except ValueError:
+        return None
+    if len(name) == 64:
+        return 'sha256', name
+    if len(name) == 40:
+        return 'git-sha1', name
+    return None
+
+
+def hash_blob(blob_path, kind):
+    """Hash a blob through mmap without copying it into Python memory"""
+    size = os.path.getsize(blob_path)
+    digest = hashlib.sha256() if kind == 'sha256' else hashlib.sha1(b'blob %d\0' % size)
+    if size:
+        with open(blob_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                for offset in range(0, size, HASH_CHUNK):
+                    digest.update(view[offset:offset + HASH_CHUNK])
+    return digest.hexdigest()
+
+
+class VerificationStore:
+    """Persistent record of verified blobs keyed by path, with size and mtime.
+
+    A blob whose size and mtime still match its record doesn't need to be
+    hashed again.
+    """
+
+    def __init__(self, filename='verified_blobs.json'):
+        self.filename = filename
+        # Reentrant so the lazy load below can run under it from record()
+        self._lock = threading.RLock()
+        self._records = None
+
+    @property
+    def records(self):
+        if self._records is None:
+            # Verification workers race to the first access, load only once
+            with self._lock:
+                if self._records is None:
+                    self._records = load_json(self.filename, {})
+        return self._records
+
+    def is_current(self, blob_path, stat):
+        record = self.records.get(blob_path)
+        return record is not None and record['size'] == stat.st_size and record['mtime'] == stat.st_mtime
+
+    def get(self, blob_path):
+        return self.records.get(blob_path)
+
+    def record(self, blob_path, stat, ok, digest):
+        with self._lock:
+            self.records[blob_path] = {
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'ok': ok,
+                'digest': digest
+            }
+
+    def prune(self, keep_prefix, existing):
+        """Drop records under keep_prefix for blobs that no longer exist"""
+        with self._lock:
+            for blob_path in [p for p in self.records if p.startswith(keep_prefix) and p not in existing]:
+                del self.records[blob_path]
+
+    def save(self):
+        with self._lock:
+            save_json(self.filename, self.records)
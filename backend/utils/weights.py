@@ -0,0 +1,173 @@
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+
+from utils.state import load_json, save_json
+
+# Refuse safetensors headers larger than this (the format itself caps them at 100MB)
+MAX_SAFETENSORS_HEADER = 100 * 1024 * 1024
+
+# GGUF metadata arrays longer than this are summarised instead of returned (e.g. tokenizer vocabularies)
+MAX_GGUF_ARRAY = 32
+
+# ggml tensor type ids, as stored in GGUF tensor infos
+GGML_TYPES = {
+    0: 'F32', 1: 'F16', 2: 'Q4_0', 3: 'Q4_1', 6: 'Q5_0', 7: 'Q5_1', 8: 'Q8_0', 9: 'Q8_1',
+    10: 'Q2_K', 11: 'Q3_K', 12: 'Q4_K', 13: 'Q5_K', 14: 'Q6_K', 15: 'Q8_K', 16: 'IQ2_XXS',
+    17: 'IQ2_XS', 18: 'IQ3_XXS', 19: 'IQ1_S', 20: 'IQ4_NL', 21: 'IQ3_S', 22: 'IQ2_S', 23: 'IQ4_XS',
+    24: 'I8', 25: 'I16', 26: 'I32', 27: 'I64', 28: 'F64', 29: 'IQ1_M', 30: 'BF16'
+}
+
+# GGUF metadata value types: struct format for the fixed-size ones
+_GGUF_SCALARS = {0: '<B', 1: '<b', 2: '<H', 3: '<h', 4: '<I', 5: '<i', 6: '<f', 7: '<?', 10: '<Q', 11: '<q', 12: '<d'}
+_GGUF_STRING = 8
+_GGUF_ARRAY = 9
+
+
+def _summarise(tensors):
+    """Totals shared by both formats from a {name: {'dtype', 'shape'}} mapping"""
+    dtypes = {}
+    parameters = 0
+    for tensor in tensors.values():
+        count = math.prod(tensor['shape'])
+        parameters += count
+        dtypes[tensor['dtype']] = dtypes.get(tensor['dtype'], 0) + count
+    return {'parameters': parameters, 'dtypes': dtypes, 'tensor_count': len(tensors), 'tensors': tensors}
+
+
+def inspect_safetensors(mapped):
+    """Parse the JSON header of a mapped safetensors file"""
+    header_size, = struct.unpack_from('<Q', mapped, 0)
+    if header_size > min(MAX_SAFETENSORS_HEADER, len(mapped) - 8):
+        raise ValueError('invalid safetensors header size')
+    header = json.loads(mapped[8:8 + header_size])
+    metadata = header.pop('__metadata__', None) or {}
+    tensors = {name: {'dtype': info['dtype'], 'shape': info['shape']} for name, info in header.items()}
+    return {'format': 'safetensors', 'metadata': metadata, **_summarise(tensors)}
+
+
+class _GGUFReader:
+    """Sequential little-endian reader over a mapped GGUF file"""
+
+    def __init__(self, mapped, version):
+        self.mapped = mapped
+        self.offset = 8
+        # Version 1 used 32-bit counts and lengths
+        self.count_format = '<I' if version == 1 else '<Q'
+
+    def unpack(self, fmt):
+        value, = struct.unpack_from(fmt, self.mapped, self.offset)
+        self.offset += struct.calcsize(fmt)
+        return value
+
+    def count(self):
+        return self.unpack(self.count_format)
+
+    def string(self):
+        length = self.count()
+        value = self.mapped[self.offset:self.offset + length]
+        if len(value) != length:
+            raise ValueError('truncated GGUF string')
+        self.offset += length
+        return value.decode('utf-8', errors='replace')
+
+    def value(self, value_type):
+        if value_type in _GGUF_SCALARS:
+            return self.unpack(_GGUF_SCALARS[value_type])
+        if value_type == _GGUF_STRING:
+            return self.string()
+        if value_type == _GGUF_ARRAY:
+            item_type = self.unpack('<I')
+            length = self.count()
+            if item_type in _GGUF_SCALARS and length > MAX_GGUF_ARRAY:
+                # Skip fixed-size items without touching their pages
+                self.offset += length * struct.calcsize(_GGUF_SCALARS[item_type])
+                return {'type': 'array', 'length': length}
+            items = [self.value(item_type) for _ in range(length)]
+            return items if length <= MAX_GGUF_ARRAY else {'type': 'array', 'length': length}
+        raise ValueError(f'unknown GGUF value type {value_type}')
+
+
+def inspect_gguf(mapped):
+    """Parse the metadata and tensor infos of a mapped GGUF file"""
+    version, = struct.unpack_from('<I', mapped, 4)
+    reader = _GGUFReader(mapped, version)
+    tensor_count = reader.count()
+    kv_count = reader.count()
+
+    metadata = {}
+    for _ in range(kv_count):
+        key = reader.string()
+        metadata[key] = reader.value(reader.unpack('<I'))
+
+    tensors = {}
+    for _ in range(tensor_count):
+        name = reader.string()
+        n_dims = reader.unpack('<I')
+        # GGUF lists dimensions fastest-varying first, reverse them to match safetensors
+        shape = [reader.count() for _ in range(n_dims)][::-1]
+        type_id = reader.unpack('<I')
+        reader.count()  # data offset
+        tensors[name] = {'dtype': GGML_TYPES.get(type_id, f'type_{type_id}'), 'shape': shape}
+    return {'format': 'gguf', 'version': version, 'metadata': metadata, **_summarise(tensors)}
+
+
+def inspect_weights(path):
+    """Read the header of a safetensors or GGUF file through mmap, without loading the weights.
+
+    Only the pages holding the header are read from disk. Returns None for
+    files in neither format.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < 16:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if mapped[:4] == b'GGUF':
+                return inspect_gguf(mapped)
+            if mapped[8:9] == b'{':
+                return inspect_safetensors(mapped)
+    return None
+
+
+class InspectionStore:
+    """Persistent inspection results keyed by blob hash.
+
+    Blobs are content-addressed, so a result never goes stale and is shared
+    by every snapshot (and cache root) holding the same blob.
+    """
+
+    def __init__(self, filename='weight_inspections.json'):
+        self.filename = filename
+        # Reentrant so the lazy load below can run under it from record()
+        self._lock = threading.RLock()
+        self._records = None
+        self._dirty = False
+
+    @property
+    def records(self):
+        if self._records is None:
+            # Inspection workers race to the first access, load only once
+            with self._lock:
+                if self._records is None:
+                    self._records = load_json(self.filename, {})
+        return self._records
+
+    def get(self, blob_hash):
+        return self.records.get(blob_hash)
+
+    def __contains__(self, blob_hash):
+        return blob_hash in self.records
+
+    def record(self, blob_hash, result):
+        with self._lock:
+            self.records[blob_hash] = result
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if self._dirty:
+                save_json(self.filename, self.records)
+                self._dirty = False
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for the cache index.
+
+Builds a synthetic Hugging Face cache (empty blobs, symlinked into snapshots)
+and compares the scan time and peak traced memory of huggingface_hub's
+scan_cache_dir() with the compact index:
+
+    python benchmark_cache_index.py --repos 200 --files 5000
+"""
+
+import argparse
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from huggingface_hub import scan_cache_dir
+from utils.compact_index import scan_cache_compact
+
+
+def build_cache(cache_dir, repos, files, revisions):
+    """Create repos with `files` blobs each, linked into every revision"""
+    for r in range(repos):
+        repo_path = cache_dir / f'models--org--model-{r}'
+        blobs = repo_path / 'blobs'
+        blobs.mkdir(parents=True)
+        for f in range(files):
+            (blobs / f'{r:08x}{f:032x}').touch()
+        for v in range(revisions):
+            commit = f'{r:08x}{v:032x}'
+            for f in range(files):
+                link = repo_path / 'snapshots' / commit / f'shard-{f // 1000}' / f'file-{f}.safetensors'
+                link.parent.mkdir(parents=True, exist_ok=True)
+                os.symlink(f'../../../blobs/{r:08x}{f:032x}', link)
+        refs = repo_path / 'refs'
+        refs.mkdir()
+        (refs / 'main').write_text(f'{r:08x}{0:032x}')
+
+
+def measure(scan, cache_dir):
+    """Scan time and peak traced memory, keeping the result alive until measured"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    info = scan(cache_dir)
+    took = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    files = sum(revision.nb_files for repo in info.repos for revision in repo.revisions)
+    return took, peak, retained, files
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare cache index memory use on a synthetic cache')
+    parser.add_argument('--repos', type=int, default=100)
+    parser.add_argument('--files', type=int, default=2000, help='files per repo')
+    parser.add_argument('--revisions', type=int, default=1, help='snapshots per repo, sharing the same blobs')
+    parser.add_argument('--cache-dir', help='reuse an existing cache instead of building one')
+    args = parser.parse_args()
+
+    temp_dir = None
+    if args.cache_dir:
+        cache_dir = Path(args.cache_dir)
+    else:
+        temp_dir = tempfile.mkdtemp(prefix='hf-cache-bench-')
+        cache_dir = Path(temp_dir)
+        started = time.perf_counter()
+        build_cache(cache_dir, args.repos, args.files, args.revisions)
+        print(f'Built {args.repos * args.files * args.revisions} files in {time.perf_counter() - started:.1f}s')
+
+    try:
+        for name, scan in (('scan_cache_dir', scan_cache_dir), ('scan_cache_compact', scan_cache_compact)):
+            took, peak, retained, files = measure(scan, cache_dir)
+            print(f'{name:20} {files:>9} files  {took:7.2f}s  peak {peak / 2**20:8.1f} MiB  '
+                  f'retained {retained / 2**20:8.1f} MiB ({retained / max(files, 1):.0f} B/file)')
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Shared test helpers that build Hugging Face cache folders on disk
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from utils.cache_roots import CacheRoots
+
+COMMIT = 'a' * 40
+
+
+def make_repo(root_path, name='models--org--model', files=None, commit=COMMIT, refs=('main',)):
+    """Create (or add a snapshot to) a cached repo and return its folder.
+
+    ``files`` maps paths inside the snapshot to ``(blob name, content)``, by
+    default a single ``model.bin``. Each file is a relative symlink to its
+    blob, like huggingface_hub creates them, and each of ``refs`` points at
+    ``commit``.
+    """
+    repo_path = Path(root_path) / name
+    snapshot = repo_path / 'snapshots' / commit
+    (repo_path / 'blobs').mkdir(parents=True, exist_ok=True)
+    (repo_path / 'refs').mkdir(exist_ok=True)
+    snapshot.mkdir(parents=True, exist_ok=True)
+    for path, (blob, content) in (files or {'model.bin': ('blob', b'weights')}).items():
+        blob_path = repo_path / 'blobs' / blob
+        blob_path.write_bytes(content)
+        link = snapshot / path
+        link.parent.mkdir(parents=True, exist_ok=True)
+        os.symlink(os.path.relpath(blob_path, link.parent), link)
+    for ref in refs:
+        (repo_path / 'refs' / ref).write_text(commit)
+    return repo_path
+
+
+class TempCacheRoots:
+    """Test case mixin: a temporary folder per test (``self.tmp``) and cache roots in it patched into the app"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def use_cache_roots(self, *roots, patches=()):
+        """Make ``roots`` the app's cache roots for this test, the first one as default.
+
+        ``patches`` are started along with them; all are stopped when the test
+        ends.
+        """
+        for patcher in (patch('api.cache.cache_roots', CacheRoots(list(roots))),
+                        patch('api.cache.cache_dir', roots[0].index), *patches):
+            patcher.start()
+            self.addCleanup(patcher.stop)
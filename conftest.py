@@ -0,0 +1,9 @@
+"""
+Shared pytest setup: keep the backend's persistent state out of the user's home directory
+"""
+
+import os
+import tempfile
+
+# Set before any test module imports the app, so nothing reads or writes the real state files
+os.environ['HF_WEBUI_STATE_DIR'] = tempfile.mkdtemp(prefix='hf-webui-test-state-')
@@ -1,12 +1,5 @@
 import React, { useState } from 'react';
-
-interface CacheFile {
-  path: string;
-  size: number;
-  size_formatted: string;
-  last_accessed: string | null;
-  folder: string;
-}
+import { CacheFile } from '../types/cache';
 
 interface RemoveRepositoryProps {
   repository: CacheFile;
@@ -24,9 +17,15 @@ const RemoveRepositoryButton: React.FC<RemoveRepositoryProps> = ({ repository, o
       return;
     }
 
+    // The same repo can be cached on several roots, remove the copy this row lists
+    const params = new URLSearchParams();
+    if (repository.root) {
+      params.set('root', repository.root);
+    }
+
     setIsRemoving(true);
     try {
-      const response = await fetch(`/api/cache/remove/${encodeURIComponent(repoName)}`, {
+      const response = await fetch(`/api/cache/remove/${encodeURIComponent(repoName)}?${params}`, {
         method: 'DELETE'
       });
       
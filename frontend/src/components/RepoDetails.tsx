@@ -0,0 +1,98 @@
+import React, { useEffect, useState } from 'react';
+import { CacheFile, RepoInspection } from '../types/cache';
+
+interface RepoDetailsProps {
+  repository: CacheFile;
+  onClose: () => void;
+}
+
+// Human readable parameter count, e.g. 6.7B
+const formatParameters = (count: number) => {
+  const units: [number, string][] = [[1e12, 'T'], [1e9, 'B'], [1e6, 'M'], [1e3, 'K']];
+  for (const [size, unit] of units) {
+    if (count >= size) return `${(count / size).toFixed(1)}${unit}`;
+  }
+  return String(count);
+};
+
+const RepoDetails: React.FC<RepoDetailsProps> = ({ repository, onClose }) => {
+  const [inspection, setInspection] = useState<RepoInspection | null>(null);
+  const [error, setError] = useState<string | null>(null);
+
+  useEffect(() => {
+    const repoName = repository.path.split('/').pop() || '';
+    const params = new URLSearchParams({ tensors: '0' });
+    if (repository.root) {
+      params.set('root', repository.root);
+    }
+    setInspection(null);
+    setError(null);
+    fetch(`/api/cache/inspect/${encodeURIComponent(repoName)}?${params}`)
+      .then(async (response) => {
+        const result = await response.json();
+        if (response.ok) {
+          setInspection(result);
+        } else {
+          setError(result.error);
+        }
+      })
+      .catch((e) => setError(String(e)));
+  }, [repository.path, repository.root]);
+
+  return (
+    <div className="border rounded p-4 mt-4">
+      <div className="flex justify-between items-center mb-2">
+        <h3 className="text-lg font-semibold">{inspection ? inspection.repo_id : repository.path}</h3>
+        <button onClick={onClose} className="text-sm text-gray-500 hover:text-gray-700">Close</button>
+      </div>
+      {error && <p className="text-red-500">Error: {error}</p>}
+      {!error && !inspection && <p>Inspecting weights...</p>}
+      {inspection && (
+        <div>
+          <p className="text-sm text-gray-600 mb-2">
+            Revision {inspection.revision.slice(0, 10)}{inspection.refs.length > 0 && ` (${inspection.refs.join(', ')})`}
+          </p>
+          {inspection.files.length === 0 ? (
+            <p>No safetensors or GGUF files in this snapshot</p>
+          ) : (
+            <>
+              <p className="mb-2">
+                <span className="font-medium">Parameters:</span> {formatParameters(inspection.parameters)}
+                {Object.keys(inspection.dtypes).length > 0 && (
+                  <span className="ml-4">
+                    <span className="font-medium">Dtypes:</span>{' '}
+                    {Object.entries(inspection.dtypes).map(([dtype, count]) => `${dtype} ${formatParameters(count)}`).join(', ')}
+                  </span>
+                )}
+              </p>
+              <table className="min-w-full text-sm">
+                <thead>
+                  <tr className="text-left text-gray-500">
+                    <th className="pr-4">File</th>
+                    <th className="pr-4">Format</th>
+                    <th className="pr-4">Parameters</th>
+                    <th className="pr-4">Tensors</th>
+                    <th>Dtypes</th>
+                  </tr>
+                </thead>
+                <tbody>
+                  {inspection.files.map((file) => (
+                    <tr key={file.path}>
+                      <td className="pr-4">{file.path}</td>
+                      <td className="pr-4">{file.format ?? 'unknown'}</td>
+                      <td className="pr-4">{file.parameters !== undefined ? formatParameters(file.parameters) : '-'}</td>
+                      <td className="pr-4">{file.tensor_count ?? '-'}</td>
+                      <td>{file.error ?? Object.keys(file.dtypes ?? {}).join(', ')}</td>
+                    </tr>
+                  ))}
+                </tbody>
+              </table>
+            </>
+          )}
+        </div>
+      )}
+    </div>
+  );
+};
+
+export default RepoDetails;
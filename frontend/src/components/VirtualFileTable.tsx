@@ -0,0 +1,80 @@
+import React, { useEffect, useState } from 'react';
+import RemoveRepositoryButton from './RemoveRepositoryButton';
+import { CacheFile } from '../types/cache';
+
+interface VirtualFileTableProps {
+  files: CacheFile[];
+  onRemoveSuccess: () => void;
+  onEndReached: () => void;
+  onSelect?: (file: CacheFile) => void;
+  rowHeight?: number;
+  height?: number;
+  overscan?: number;
+}
+
+// Renders only the rows in view (plus a few either side), so cost doesn't grow with the cache
+const VirtualFileTable: React.FC<VirtualFileTableProps> = ({
+  files,
+  onRemoveSuccess,
+  onEndReached,
+  onSelect,
+  rowHeight = 56,
+  height = 600,
+  overscan = 10
+}) => {
+  const [scrollTop, setScrollTop] = useState(0);
+
+  const start = Math.max(0, Math.floor(scrollTop / rowHeight) - overscan);
+  const end = Math.min(files.length, Math.ceil((scrollTop + height) / rowHeight) + overscan);
+
+  // Ask for the next page once the window gets close to the loaded end
+  useEffect(() => {
+    if (end >= files.length - overscan) {
+      onEndReached();
+    }
+  }, [end, files.length, overscan, onEndReached]);
+
+  const cellClass = 'px-6 whitespace-nowrap text-sm text-gray-500';
+
+  return (
+    <div
+      className="overflow-auto"
+      style={{ maxHeight: height }}
+      onScroll={(e) => setScrollTop(e.currentTarget.scrollTop)}
+    >
+      <table className="min-w-full divide-y divide-gray-200">
+        <thead className="bg-gray-50 sticky top-0">
+          <tr>
+            <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Name</th>
+            <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Size</th>
+            <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Last Accessed</th>
+            <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Actions</th>
+          </tr>
+        </thead>
+        <tbody className="bg-white divide-y divide-gray-200">
+          {start > 0 && <tr style={{ height: start * rowHeight }} />}
+          {files.slice(start, end).map((file) => (
+            <tr key={`${file.root ?? ''}:${file.path}`} style={{ height: rowHeight }}>
+              <td
+                className={`${cellClass} font-medium text-gray-900 ${onSelect ? 'cursor-pointer hover:underline' : ''}`}
+                onClick={() => onSelect?.(file)}
+              >
+                {file.path}
+              </td>
+              <td className={cellClass}>{file.size_formatted}</td>
+              <td className={cellClass}>
+                {file.last_accessed ? new Date(file.last_accessed).toLocaleString() : 'N/A'}
+              </td>
+              <td className={cellClass}>
+                <RemoveRepositoryButton repository={file} onRemoveSuccess={onRemoveSuccess} />
+              </td>
+            </tr>
+          ))}
+          {end < files.length && <tr style={{ height: (files.length - end) * rowHeight }} />}
+        </tbody>
+      </table>
+    </div>
+  );
+};
+
+export default VirtualFileTable;
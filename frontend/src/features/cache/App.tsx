@@ -1,11 +1,17 @@
 import React, { useState, useEffect } from 'react';
-import RemoveRepositoryButton from '../../components/RemoveRepositoryButton';
+import RepoDetails from '../../components/RepoDetails';
+import VirtualFileTable from '../../components/VirtualFileTable';
 import { CacheFile, CacheStats, DownloadProgress } from '../../types/cache';
+import { useCacheFiles } from './useCacheFiles';
+
+// Background refresh period; only changed rows are fetched
+const REFRESH_INTERVAL = 30000;
 
 const App: React.FC = () => {
   const [cacheStats, setCacheStats] = useState<CacheStats | null>(null);
-  const [cacheFiles, setCacheFiles] = useState<CacheFile[]>([]);
+  const { files: cacheFiles, totalCount, loadMore, refresh: refreshFiles } = useCacheFiles();
   const [downloads, setDownloads] = useState<{[key: string]: DownloadProgress}>({});
+  const [selectedRepo, setSelectedRepo] = useState<CacheFile | null>(null);
   const [repoId, setRepoId] = useState('');
   const [filename, setFilename] = useState('');
   const [loading, setLoading] = useState(false);
@@ -17,9 +23,7 @@ const App: React.FC = () => {
       const stats = await response.json();
       setCacheStats(stats);
       
-      const filesResponse = await fetch('/api/cache/files');
-      const files = await filesResponse.json();
-      setCacheFiles(files.files);
+      await refreshFiles();
     } catch (error) {
       console.error('Error fetching cache data:', error);
     }
@@ -98,9 +102,11 @@ const App: React.FC = () => {
     fetchCacheData();
   };
 
-  // Initial load
+  // Initial load, then periodic delta refreshes
   useEffect(() => {
     fetchCacheData();
+    const interval = setInterval(fetchCacheData, REFRESH_INTERVAL);
+    return () => clearInterval(interval);
   }, []);
 
   return (
@@ -215,33 +221,14 @@ const App: React.FC = () => {
       
       {/* Files Section */}
       <div className="bg-white shadow rounded-lg p-4">
-        <h2 className="text-xl font-semibold mb-2">Cached Files ({cacheFiles.length})</h2>
-        <div className="overflow-x-auto">
-          <table className="min-w-full divide-y divide-gray-200">
-            <thead className="bg-gray-50">
-              <tr>
-                <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Name</th>
-                <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Size</th>
-                <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Last Accessed</th>
-                <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Actions</th>
-              </tr>
-            </thead>
-            <tbody className="bg-white divide-y divide-gray-200">
-              {cacheFiles.map((file, index) => (
-                <tr key={index}>
-                  <td className="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">{file.path}</td>
-                  <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">{file.size_formatted}</td>
-                  <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
-                    {file.last_accessed ? new Date(file.last_accessed).toLocaleString() : 'N/A'}
-                  </td>
-                  <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
-                    <RemoveRepositoryButton repository={file} onRemoveSuccess={handleRemoveSuccess} />
-                  </td>
-                </tr>
-              ))}
-            </tbody>
-          </table>
-        </div>
+        <h2 className="text-xl font-semibold mb-2">Cached Files ({totalCount})</h2>
+        <VirtualFileTable
+          files={cacheFiles}
+          onRemoveSuccess={handleRemoveSuccess}
+          onEndReached={loadMore}
+          onSelect={setSelectedRepo}
+        />
+        {selectedRepo && <RepoDetails repository={selectedRepo} onClose={() => setSelectedRepo(null)} />}
       </div>
     </div>
   );
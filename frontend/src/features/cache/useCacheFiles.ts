@@ -0,0 +1,123 @@
+import { useCallback, useRef, useState } from 'react';
+import { CacheFile, CacheFilesDelta, CacheFilesPage } from '../../types/cache';
+
+const PAGE_SIZE = 200;
+
+// Same order as the backend's (root, path) sort key
+const rowKey = (root: string | undefined, path: string) => `${root ?? ''}\n${path}`;
+
+// Index of the first row whose key is >= key
+const lowerBound = (rows: CacheFile[], key: string) => {
+  let low = 0;
+  let high = rows.length;
+  while (low < high) {
+    const mid = (low + high) >> 1;
+    if (rowKey(rows[mid].root, rows[mid].path) < key) {
+      low = mid + 1;
+    } else {
+      high = mid;
+    }
+  }
+  return low;
+};
+
+// Apply a delta to the sorted rows, leaving rows past the loaded range to later pages
+const mergeDelta = (rows: CacheFile[], delta: CacheFilesDelta, loadedUntil: string | null) => {
+  if (delta.changed.length === 0 && delta.removed.length === 0) {
+    return rows;
+  }
+  const merged = rows.slice();
+  for (const removed of delta.removed) {
+    const key = rowKey(removed.root, removed.path);
+    const index = lowerBound(merged, key);
+    if (index < merged.length && rowKey(merged[index].root, merged[index].path) === key) {
+      merged.splice(index, 1);
+    }
+  }
+  for (const file of delta.changed) {
+    const key = rowKey(file.root, file.path);
+    const index = lowerBound(merged, key);
+    if (index < merged.length && rowKey(merged[index].root, merged[index].path) === key) {
+      merged[index] = file;
+    } else if (loadedUntil === null || key <= loadedUntil) {
+      merged.splice(index, 0, file);
+    }
+  }
+  return merged;
+};
+
+// Cached files loaded page by page from a cursor, kept fresh with delta refreshes
+export const useCacheFiles = () => {
+  const [files, setFiles] = useState<CacheFile[]>([]);
+  const [totalCount, setTotalCount] = useState(0);
+  const [hasMore, setHasMore] = useState(false);
+  const filesRef = useRef<CacheFile[]>([]);
+  const cursorRef = useRef<string | null>(null);
+  const generationRef = useRef<string | null>(null);
+  const loadingRef = useRef(false);
+
+  const applyFiles = (next: CacheFile[]) => {
+    filesRef.current = next;
+    setFiles(next);
+  };
+
+  const fetchPage = async (cursor: string | null) => {
+    const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+    if (cursor) {
+      params.set('cursor', cursor);
+    }
+    const response = await fetch(`/api/cache/files?${params}`);
+    const page: CacheFilesPage = await response.json();
+    cursorRef.current = page.next_cursor;
+    setHasMore(page.next_cursor !== null);
+    setTotalCount(page.total_count);
+    return page;
+  };
+
+  // Load the first page from scratch
+  const reload = useCallback(async () => {
+    const page = await fetchPage(null);
+    generationRef.current = page.generation;
+    applyFiles(page.files);
+  }, []);
+
+  // Append the next page, e.g. when the table is scrolled near its end
+  const loadMore = useCallback(async () => {
+    if (!cursorRef.current || loadingRef.current) return;
+    loadingRef.current = true;
+    try {
+      const page = await fetchPage(cursorRef.current);
+      applyFiles(filesRef.current.concat(page.files));
+    } catch (error) {
+      console.error('Error loading cached files:', error);
+    } finally {
+      loadingRef.current = false;
+    }
+  }, []);
+
+  // Merge the rows changed since the last sync instead of replacing the list
+  const refresh = useCallback(async () => {
+    try {
+      if (!generationRef.current) {
+        await reload();
+        return;
+      }
+      const response = await fetch(`/api/cache/files?since=${encodeURIComponent(generationRef.current)}`);
+      const delta: CacheFilesDelta = await response.json();
+      if (delta.reset) {
+        await reload();
+        return;
+      }
+      const current = filesRef.current;
+      const last = current[current.length - 1];
+      const loadedUntil = cursorRef.current && last ? rowKey(last.root, last.path) : null;
+      generationRef.current = delta.generation;
+      setTotalCount(delta.total_count);
+      applyFiles(mergeDelta(current, delta, loadedUntil));
+    } catch (error) {
+      console.error('Error refreshing cached files:', error);
+    }
+  }, [reload]);
+
+  return { files, totalCount, hasMore, loadMore, refresh };
+};
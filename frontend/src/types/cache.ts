@@ -4,6 +4,33 @@ export interface CacheFile {
   size_formatted: string;
   last_accessed: string | null;
   folder: string;
+  root?: string;
+}
+
+export interface CacheFilesPage {
+  files: CacheFile[];
+  total_count: number;
+  next_cursor: string | null;
+  generation: string;
+}
+
+export interface CacheFilesDelta {
+  changed: CacheFile[];
+  removed: { root: string; path: string }[];
+  total_count: number;
+  generation: string;
+  reset: boolean;
+}
+
+export interface CacheRoot {
+  name: string;
+  path: string;
+  quota: number | null;
+  quota_formatted: string | null;
+  size: number;
+  size_formatted: string;
+  folders: number;
+  files: number;
 }
 
 export interface CacheStats {
@@ -11,6 +38,7 @@ export interface CacheStats {
   size_formatted: string;
   folders: number;
   files: number;
+  roots?: CacheRoot[];
   last_updated: string;
 }
 
@@ -23,4 +51,36 @@ export interface DownloadProgress {
   error?: string;
   end_time?: string;
   file_path?: string;
-}
\ No newline at end of file
+  downloaded?: number;
+  total?: number | null;
+  speed?: number;
+  rate_limit?: number | null;
+}
+export interface TensorInfo {
+  dtype: string;
+  shape: number[];
+}
+
+export interface WeightFile {
+  path: string;
+  size: number;
+  blob: string;
+  format: 'safetensors' | 'gguf' | null;
+  error?: string;
+  parameters?: number;
+  dtypes?: { [dtype: string]: number };
+  tensor_count?: number;
+  metadata?: { [key: string]: unknown };
+  tensors?: { [name: string]: TensorInfo };
+}
+
+export interface RepoInspection {
+  repo_id: string;
+  repo_type: string;
+  root: string;
+  revision: string;
+  refs: string[];
+  parameters: number;
+  dtypes: { [dtype: string]: number };
+  files: WeightFile[];
+}
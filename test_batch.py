@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Tests for the batch operations API
+"""
+
+import sys
+import os
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from main import app
+from cache_fixtures import TempCacheRoots, make_repo
+from api import batch as batch_module
+from api import downloads as downloads_module
+from utils.cache_roots import CacheRoot
+
+def fake_download(download_id):
+    """Finish a download straight away, failing files named missing.bin"""
+    info = downloads_module.downloads[download_id]
+    if info['filename'] == 'missing.bin':
+        info['status'] = 'failed'
+        info['error'] = 'Entry not found'
+    else:
+        info.update(status='completed', progress=100, downloaded=10, total=10)
+
+
+class TestBatchEndpoints(TempCacheRoots, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.root = CacheRoot('default', self.tmp.name)
+        self.first = make_repo(self.tmp.name, 'models--org--first')
+        self.second = make_repo(self.tmp.name, 'models--org--second')
+        self.mock_save = MagicMock()
+        self.use_cache_roots(self.root, patches=[
+            patch('api.downloads.download_model', fake_download),
+            patch('api.batch.BATCH_POLL_INTERVAL', 0.01),
+            patch.dict('api.batch.manifests', clear=True),
+            patch.dict('api.batch.batches', clear=True),
+            patch.dict('api.downloads.downloads', clear=True),
+            patch('api.batch.save_json', self.mock_save),
+            patch('api.batch.reconciler')
+        ])
+        self.app = app.test_client()
+
+    def run_batch(self, operations):
+        response = self.app.post('/api/cache/batch', json={'operations': operations})
+        self.assertEqual(response.status_code, 202, response.get_json())
+        batch_id = response.get_json()['batch_id']
+        for _ in range(300):
+            batch = self.app.get(f'/api/cache/batch/{batch_id}').get_json()
+            if batch['status'] != 'running':
+                return batch
+            time.sleep(0.01)
+        self.fail('batch did not finish')
+
+    def test_runs_mixed_operations_as_one_group(self):
+        operations = [
+            {'op': 'delete', 'repo': 'models--org--first'},
+            {'op': 'pin', 'repo_id': 'org/second'},
+            {'op': 'download', 'repo_id': 'org/new', 'filename': 'config.json'}
+        ] + [{'op': 'download', 'repo_id': 'org/new', 'filename': f'shard-{i}.bin'} for i in range(6)]
+        batch = self.run_batch(operations)
+
+        self.assertEqual(batch['status'], 'completed')
+        self.assertEqual(batch['counts']['completed'], 9)
+        self.assertEqual(batch['progress'], 100)
+        self.assertEqual(batch['downloaded'], 70)
+        self.assertFalse(self.first.exists())
+        self.assertEqual([entry['repo_id'] for entry in batch_module.manifests['pinned']['entries']], ['org/second'])
+        # One manifest save for the whole batch
+        self.assertEqual(self.mock_save.call_count, 1)
+        self.assertEqual(self.app.get('/api/cache/stats').get_json()['folders'], 1)
+
+    def test_reports_failed_operations(self):
+        batch = self.run_batch([
+            {'op': 'pin', 'repo_id': 'org/second'},
+            {'op': 'download', 'repo_id': 'org/new', 'filename': 'missing.bin'},
+            {'op': 'unpin', 'repo_id': 'org/second'},
+            {'op': 'delete', 'repo_id': 'org/second'}
+        ])
+        self.assertEqual(batch['status'], 'completed_with_errors')
+        statuses = [(op['op'], op['status']) for op in batch['operations']]
+        # Deletes and pins apply in order, so the repo can go once it is unpinned
+        self.assertEqual(statuses, [('pin', 'completed'), ('download', 'failed'), ('unpin', 'completed'),
+                                    ('delete', 'completed')])
+        self.assertEqual(batch['operations'][1]['error'], 'Entry not found')
+        self.assertFalse(self.second.exists())
+        self.assertNotIn('pinned', batch_module.manifests)
+
+    def test_rejects_the_whole_batch_up_front(self):
+        response = self.app.post('/api/cache/batch', json={'operations': [
+            {'op': 'delete', 'repo': 'models--org--first'},
+            {'op': 'download', 'repo_id': 'org/new'},
+            {'op': 'delete', 'repo': 'models--org--nope'},
+            {'op': 'evict', 'repo_id': 'org/first'},
+            {'op': 'pin', 'repo_id': 'org/first', 'repo_type': 'bucket'},
+            {'op': 'pin', 'repo_id': 'org/second'},
+            {'op': 'delete', 'repo_id': 'org/second'},
+            {'op': 'download', 'repo_id': 'org/new', 'filename': 'config.json', 'rate_limit': True},
+            {'op': 'unpin', 'repo_id': 'org/first'},
+            {'op': 'pin', 'repo_id': 'org/first', 'patterns': 5}
+        ]})
+        self.assertEqual(response.status_code, 400)
+        errors = response.get_json()['errors']
+        self.assertEqual([error['index'] for error in errors], [1, 2, 3, 4, 6, 7, 8, 9])
+        # Pins earlier in the batch count when validating its deletes
+        self.assertIn('pinned', errors[4]['error'])
+        self.assertTrue(self.first.exists())
+        self.assertEqual(self.app.post('/api/cache/batch', json={'operations': []}).status_code, 400)
+        self.assertEqual(self.app.get('/api/cache/batch/nope').status_code, 404)
+
+    def test_cancel_drops_pending_downloads(self):
+        def stuck_download(download_id):
+            pass
+
+        with patch('api.downloads.download_model', stuck_download):
+            response = self.app.post('/api/cache/batch', json={'operations': [
+                {'op': 'download', 'repo_id': 'org/new', 'filename': f'shard-{i}.bin'} for i in range(6)
+            ]})
+            batch_id = response.get_json()['batch_id']
+            for _ in range(100):
+                if self.app.get(f'/api/cache/batch/{batch_id}').get_json()['counts']['running'] == 4:
+                    break
+                time.sleep(0.01)
+            self.assertEqual(self.app.delete(f'/api/cache/batch/{batch_id}').status_code, 200)
+            batch = self.run_until_done(batch_id)
+
+        self.assertEqual(batch['status'], 'cancelled')
+        self.assertEqual(batch['counts']['cancelled'], 6)
+        self.assertEqual(self.app.delete(f'/api/cache/batch/{batch_id}').status_code, 409)
+
+    def run_until_done(self, batch_id):
+        for _ in range(300):
+            batch = self.app.get(f'/api/cache/batch/{batch_id}').get_json()
+            if batch.get('end_time'):
+                return batch
+            time.sleep(0.01)
+        self.fail('batch did not finish')
+
+
+if __name__ == '__main__':
+    unittest.main()
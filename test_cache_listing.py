@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the paged, delta-synced cache file listing
+"""
+
+import sys
+import os
+import shutil
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from main import app
+from cache_fixtures import TempCacheRoots, make_repo
+from utils.cache_roots import CacheRoot
+from utils.listing import CacheListing
+
+
+class TestCacheListing(unittest.TestCase):
+
+    def test_changes_since_token(self):
+        listing = CacheListing(max_tombstones=1)
+        listing.update([object()], lambda: {('r', 'a'): {'v': 1}, ('r', 'b'): {'v': 1}})
+        token = listing.token
+
+        # Same sources: nothing is rebuilt
+        listing.update(listing._sources, lambda: self.fail('rebuilt'))
+        self.assertEqual(listing.changes(token), ([], []))
+
+        listing.update([object()], lambda: {('r', 'a'): {'v': 2}, ('r', 'c'): {'v': 1}})
+        self.assertEqual(listing.changes(token), ([{'v': 2}, {'v': 1}], [('r', 'b')]))
+
+        # Tombstones dropped past the limit force older clients to reload
+        newer = listing.token
+        listing.update([object()], lambda: {('r', 'a'): {'v': 2}})
+        self.assertIsNone(listing.changes(token))
+        self.assertEqual(listing.changes(newer), ([], [('r', 'c')]))
+        self.assertIsNone(listing.changes('other-epoch:1'))
+
+
+class TestPagedFilesEndpoint(TempCacheRoots, unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        super().setUp()
+        self.app = app.test_client()
+        self.root = CacheRoot('default', self.tmp.name)
+        for name in ('a', 'b', 'c', 'd', 'e'):
+            make_repo(self.tmp.name, f'models--org--{name}')
+        self.use_cache_roots(self.root, patches=[patch('api.cache.listing', CacheListing())])
+
+    def test_cursor_pages(self):
+        names = []
+        cursor = ''
+        while True:
+            data = self.app.get(f'/api/cache/files?limit=2&cursor={cursor}').get_json()
+            self.assertEqual(data['total_count'], 5)
+            self.assertLessEqual(len(data['files']), 2)
+            names.extend(Path(row['path']).name for row in data['files'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(names, [f'models--org--{name}' for name in 'abcde'])
+
+        self.assertEqual(self.app.get('/api/cache/files?limit=2&cursor=garbage').status_code, 400)
+        self.assertEqual(self.app.get('/api/cache/files?limit=-1').status_code, 400)
+        self.assertEqual(self.app.get('/api/cache/files?limit=0').status_code, 400)
+
+    def test_delta_refresh(self):
+        token = self.app.get('/api/cache/files?limit=2').get_json()['generation']
+
+        make_repo(self.tmp.name, 'models--org--f')
+        shutil.rmtree(Path(self.tmp.name) / 'models--org--a')
+        self.root.index.invalidate()
+
+        data = self.app.get(f'/api/cache/files?since={token}').get_json()
+        self.assertFalse(data['reset'])
+        self.assertEqual([Path(row['path']).name for row in data['changed']], ['models--org--f'])
+        self.assertEqual([Path(row['path']).name for row in data['removed']], ['models--org--a'])
+        self.assertEqual(data['total_count'], 5)
+
+        data = self.app.get(f'/api/cache/files?since={data["generation"]}').get_json()
+        self.assertEqual((data['changed'], data['removed']), ([], []))
+        self.assertTrue(self.app.get('/api/cache/files?since=stale:0').get_json()['reset'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for multiple cache roots
+"""
+
+import sys
+import os
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from main import app
+from cache_fixtures import COMMIT, TempCacheRoots, make_repo
+from api import cache
+from utils.cache_roots import CacheRoot, CacheRoots
+from utils.formatting import parse_size
+
+
+class TestCacheRootsConfig(unittest.TestCase):
+
+    def test_parse_size(self):
+        self.assertEqual(parse_size('500G'), 500 * 1024 ** 3)
+        self.assertEqual(parse_size('1.5KB'), 1536)
+        self.assertEqual(parse_size(42), 42)
+
+    def test_from_env(self):
+        with patch.dict(os.environ, {'HF_WEBUI_CACHE_ROOTS': 'nvme=/mnt/nvme/hf:10G, hdd=/mnt/hdd/hf'}):
+            roots = CacheRoots.from_env()
+        self.assertEqual([root.name for root in roots], ['nvme', 'hdd'])
+        self.assertEqual(roots.default.name, 'nvme')
+        self.assertEqual(roots.get('nvme').quota, 10 * 1024 ** 3)
+        self.assertIsNone(roots.get('hdd').quota)
+
+        with patch.dict(os.environ, {'HF_WEBUI_CACHE_ROOTS': 'broken'}):
+            with self.assertRaises(ValueError):
+                CacheRoots.from_env()
+
+
+class TestCacheRootsEndpoints(TempCacheRoots, unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+
+        super().setUp()
+        self.fast = CacheRoot('fast', os.path.join(self.tmp.name, 'fast'))
+        self.bulk = CacheRoot('bulk', os.path.join(self.tmp.name, 'bulk'), quota=1024)
+        self.repo_path = make_repo(self.fast.path)
+        self.use_cache_roots(self.fast, self.bulk)
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        self.app_context.pop()
+
+    def test_stats_root_filter(self):
+        data = self.app.get('/api/cache/stats').get_json()
+        self.assertEqual(data['folders'], 1)
+        self.assertEqual([root['name'] for root in data['roots']], ['fast', 'bulk'])
+
+        data = self.app.get('/api/cache/files?root=bulk').get_json()
+        self.assertEqual(data['total_count'], 0)
+
+        self.assertEqual(self.app.get('/api/cache/stats?root=nope').status_code, 404)
+
+    def test_move_repository(self):
+        cache.move_jobs['m1'] = {
+            'status': 'moving', 'target': 'bulk', 'source_path': str(self.repo_path),
+            'size': 7, 'copied': 0, 'progress': 0, 'error': None
+        }
+        cache.move_repository('m1')
+        job = cache.move_jobs.pop('m1')
+
+        self.assertEqual(job['status'], 'completed')
+        moved = Path(self.bulk.path) / self.repo_path.name
+        self.assertFalse(self.repo_path.exists())
+        link = moved / 'snapshots' / COMMIT / 'model.bin'
+        self.assertTrue(link.is_symlink())
+        self.assertEqual(link.read_bytes(), b'weights')
+
+        data = self.app.get('/api/cache/files?root=bulk').get_json()
+        self.assertEqual(data['files'][0]['root'], 'bulk')
+
+    @patch('api.cache.move_repository')
+    def test_move_validation(self, mock_move):
+        response = self.app.post('/api/cache/move', json={'repo': self.repo_path.name, 'target': 'fast'})
+        self.assertEqual(response.status_code, 400)
+
+        self.bulk.quota = 1
+        response = self.app.post('/api/cache/move', json={'repo': self.repo_path.name, 'target': 'bulk'})
+        self.assertEqual(response.status_code, 507)
+
+        self.bulk.quota = None
+        response = self.app.post('/api/cache/move', json={'repo': self.repo_path.name, 'target': 'bulk'})
+        self.assertEqual(response.status_code, 202)
+
+
+if __name__ == '__main__':
+    unittest.main()
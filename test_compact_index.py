@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Tests for the compact cache index
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from huggingface_hub import scan_cache_dir
+from utils.cache_index import CacheIndex
+from utils.compact_index import scan_cache_compact
+
+MAIN = 'a' * 40
+OLD = 'b' * 40
+
+
+def add_file(repo_path, commit, path, content):
+    """Write a blob named after its content and link it into a snapshot"""
+    blob = repo_path / 'blobs' / f'{abs(hash(content)):x}'
+    blob.parent.mkdir(parents=True, exist_ok=True)
+    blob.write_bytes(content)
+    link = repo_path / 'snapshots' / commit / path
+    link.parent.mkdir(parents=True, exist_ok=True)
+    link.symlink_to(os.path.relpath(blob, link.parent))
+
+
+def add_ref(repo_path, ref, commit):
+    ref_path = repo_path / 'refs' / ref
+    ref_path.parent.mkdir(parents=True, exist_ok=True)
+    ref_path.write_text(commit)
+
+
+def summary(info):
+    """Everything get_cache_stats/get_cache_files and the other consumers read, as plain values"""
+    repos = {}
+    for repo in info.repos:
+        revisions = {}
+        for revision in repo.revisions:
+            files = sorted(
+                (f.file_name, f.file_path, f.blob_path, f.size_on_disk, f.blob_last_accessed, f.blob_last_modified)
+                for f in revision.files
+            )
+            revisions[revision.commit_hash] = (
+                revision.refs, revision.snapshot_path, revision.last_modified, revision.size_on_disk,
+                revision.nb_files, files
+            )
+        repos[repo.repo_id] = (
+            repo.repo_type, repo.repo_path, repo.size_on_disk, repo.nb_files, repo.last_accessed,
+            repo.last_modified, {ref: r.commit_hash for ref, r in repo.refs.items()}, revisions
+        )
+    return info.size_on_disk, repos, sorted(str(w) for w in info.warnings)
+
+
+class TestCompactIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = Path(tempfile.mkdtemp()).resolve()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+
+        model = self.cache_dir / 'models--org--model'
+        add_file(model, MAIN, 'config.json', b'{"a": 1}')
+        add_file(model, MAIN, 'weights/model.safetensors', b'x' * 1000)
+        # Same blob in two snapshots is counted once for the repo
+        add_file(model, OLD, 'config.json', b'{"a": 1}')
+        add_file(model, OLD, 'tokenizer.json', b'{}')
+        add_ref(model, 'main', MAIN)
+        add_ref(model, 'refs/pr/1', OLD)
+
+        dataset = self.cache_dir / 'datasets--squad'
+        add_file(dataset, MAIN, 'data/train.parquet', b'p' * 300)
+        # Copied caches can hold plain files instead of links
+        (dataset / 'snapshots' / MAIN / 'README.md').write_bytes(b'readme')
+        (dataset / 'snapshots' / OLD).mkdir()
+
+        broken = self.cache_dir / 'models--org--broken'
+        add_file(broken, MAIN, 'config.json', b'{"b": 2}')
+        add_ref(broken, 'main', OLD)
+
+        (self.cache_dir / 'not-a-repo').mkdir()
+        (self.cache_dir / '.locks').mkdir()
+
+    def test_matches_scan_cache_dir(self):
+        self.assertEqual(summary(scan_cache_compact(self.cache_dir)), summary(scan_cache_dir(self.cache_dir)))
+
+    def test_shares_blob_and_path_rows(self):
+        info = scan_cache_compact(self.cache_dir)
+        model = next(r for r in info.repos if r.repo_id == 'org/model')
+        self.assertEqual(model.nb_files, 3)
+        self.assertEqual(model.size_on_disk, 1000 + 8 + 2)
+        # config.json is interned once across snapshots and repos
+        self.assertEqual(info._columns.paths.count('config.json'), 1)
+        # The corrupted repo's rows were dropped again
+        self.assertEqual(len(info._columns.blob_size), 5)
+        self.assertEqual(len(info.warnings), 2)
+
+    def test_with_repo_splices_one_repo(self):
+        info = scan_cache_compact(self.cache_dir)
+        model = self.cache_dir / 'models--org--model'
+        add_file(model, MAIN, 'extra.bin', b'e' * 50)
+
+        updated = info.with_repo(model)
+        self.assertEqual(updated.size_on_disk, info.size_on_disk + 50)
+        self.assertEqual(summary(updated), summary(scan_cache_dir(self.cache_dir)))
+        # The previous info still sees its own rows
+        self.assertEqual(summary(info)[0], info.size_on_disk)
+
+    def test_with_repo_through_symlinked_root(self):
+        link = Path(tempfile.mkdtemp()) / 'cache'
+        self.addCleanup(shutil.rmtree, link.parent)
+        link.symlink_to(self.cache_dir)
+        info = scan_cache_compact(link)
+
+        updated = info.with_repo(link / 'models--org--model')
+        self.assertEqual(len(updated.repos), len(info.repos))
+        self.assertEqual(updated.size_on_disk, info.size_on_disk)
+
+    def test_cache_index_uses_compact_scan(self):
+        index = CacheIndex(cache_dir=str(self.cache_dir))
+        self.assertEqual(summary(index.info), summary(scan_cache_dir(self.cache_dir)))
+
+        shutil.rmtree(self.cache_dir / 'datasets--squad' / 'snapshots')
+        index.update_repo(self.cache_dir / 'datasets--squad')
+        # A repo that no longer scans drops the index so the next access rescans
+        self.assertNotIn('squad', {r.repo_id for r in index.info.repos})
+
+    def test_missing_cache_dir(self):
+        index = CacheIndex(cache_dir=str(self.cache_dir / 'missing'))
+        self.assertEqual(index.info.size_on_disk, 0)
+        self.assertEqual(index.info.repos, frozenset())
+
+    def test_concurrent_stale_reads_scan_once(self):
+        index = CacheIndex(cache_dir=str(self.cache_dir))
+        real_scan = scan_cache_compact
+        calls = []
+
+        def slow_scan(cache_dir):
+            calls.append(cache_dir)
+            time.sleep(0.05)
+            return real_scan(cache_dir)
+
+        with patch('utils.cache_index.scan_cache_compact', slow_scan):
+            threads = [threading.Thread(target=lambda: index.info) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
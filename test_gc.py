@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Tests for cache garbage collection
+"""
+
+import sys
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from filelock import FileLock
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from main import app
+from cache_fixtures import COMMIT, TempCacheRoots, make_repo
+from utils.cache_gc import lock_garbage, remove_garbage, repo_garbage
+from utils.cache_roots import CacheRoot
+
+MISSING = 'b' * 40
+DAY = 86400
+
+
+def age(path, seconds):
+    """Backdate a file's mtime"""
+    then = time.time() - seconds
+    os.utime(path, (then, then), follow_symlinks=False)
+
+
+def make_garbage(root_path, name='models--org--model'):
+    """A repo with one linked blob and every kind of leftover, all two days old"""
+    repo_path = make_repo(root_path, name, files={'config.json': ('linked', b'l' * 10)})
+    blobs = repo_path / 'blobs'
+    (blobs / 'orphan').write_bytes(b'o' * 100)
+    (blobs / 'partial.incomplete').write_bytes(b'p' * 1000)
+    (repo_path / 'refs' / 'pr').mkdir()
+    (repo_path / 'refs' / 'pr' / '1').write_text(MISSING)
+    locks = Path(root_path) / '.locks' / name
+    locks.mkdir(parents=True)
+    (locks / 'done.lock').touch()
+    for path in (blobs / 'linked', blobs / 'orphan', blobs / 'partial.incomplete', repo_path / 'refs' / 'pr' / '1',
+                 locks / 'done.lock'):
+        age(path, 2 * DAY)
+    return repo_path
+
+
+class TestFindGarbage(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo_path = make_garbage(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_finds_every_kind(self):
+        garbage = {(item['kind'], os.path.basename(item['path'])): item for item in repo_garbage(str(self.repo_path))}
+        self.assertEqual(set(garbage), {('orphaned_blob', 'orphan'), ('incomplete', 'partial.incomplete'),
+                                        ('dangling_ref', '1')})
+        self.assertEqual(garbage[('orphaned_blob', 'orphan')]['size'], 100)
+        self.assertGreater(garbage[('orphaned_blob', 'orphan')]['age'], DAY)
+
+        locks = lock_garbage(self.tmp.name)
+        self.assertEqual([(item['kind'], item['repo']) for item in locks], [('lock', 'models--org--model')])
+
+    def test_skips_files_gone_since_listed(self):
+        # e.g. a download renaming its .incomplete file during the pass
+        with patch('utils.cache_gc.os.lstat', side_effect=FileNotFoundError):
+            self.assertEqual(repo_garbage(str(self.repo_path)), [])
+            self.assertEqual(lock_garbage(self.tmp.name), [])
+
+    def test_keeps_blob_linked_again(self):
+        orphan = next(item for item in repo_garbage(str(self.repo_path)) if item['kind'] == 'orphaned_blob')
+        # A download links the blob into a new snapshot after the scan
+        os.symlink('../../blobs/orphan', self.repo_path / 'snapshots' / COMMIT / 'model.bin')
+        self.assertEqual(remove_garbage(self.tmp.name, orphan, 0), 'referenced')
+        self.assertTrue((self.repo_path / 'blobs' / 'orphan').exists())
+
+
+class TestGCEndpoints(TempCacheRoots, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.root = CacheRoot('default', self.tmp.name)
+        self.repo_path = make_garbage(self.tmp.name)
+        self.use_cache_roots(self.root, patches=[
+            patch.dict('api.gc.gc_jobs', clear=True),
+            patch.dict('api.gc.downloads', clear=True)
+        ])
+        self.app = app.test_client()
+
+    def run_gc(self, **options):
+        response = self.app.post('/api/cache/gc', json=options)
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()['job_id']
+        for _ in range(200):
+            job = self.app.get(f'/api/cache/gc/{job_id}').get_json()
+            if job['status'] != 'running':
+                return job
+            time.sleep(0.01)
+        self.fail('garbage collection did not finish')
+
+    def statuses(self, job):
+        return {os.path.basename(item['path']): item['status'] for item in job['items']}
+
+    def test_dry_run_reports_without_deleting(self):
+        job = self.run_gc()
+        self.assertEqual(job['status'], 'completed')
+        self.assertTrue(job['dry_run'])
+        self.assertEqual(job['reclaimable'], 100 + 1000 + len(MISSING))
+        self.assertEqual(job['by_kind']['orphaned_blob'], {'count': 1, 'size': 100})
+        self.assertEqual(job['deleted'], 0)
+        self.assertTrue((self.repo_path / 'blobs' / 'orphan').exists())
+        self.assertTrue((self.repo_path / 'refs' / 'pr' / '1').exists())
+
+    def test_deletes_garbage_past_the_thresholds(self):
+        age(self.repo_path / 'blobs' / 'partial.incomplete', 2 * 3600)
+        job = self.run_gc(dry_run=False, min_age=3600)
+        statuses = self.statuses(job)
+
+        self.assertEqual(statuses['orphan'], 'deleted')
+        self.assertEqual(statuses['1'], 'deleted')
+        self.assertEqual(statuses['done.lock'], 'deleted')
+        # Partial downloads are kept for a day by default so they can be resumed
+        self.assertEqual(statuses['partial.incomplete'], 'skipped')
+        self.assertEqual(job['freed'], 100 + len(MISSING))
+        self.assertTrue((self.repo_path / 'blobs' / 'linked').exists())
+        self.assertTrue((self.repo_path / 'refs' / 'main').exists())
+        self.assertFalse((self.repo_path / 'blobs' / 'orphan').exists())
+
+        # Without the dangling ref the repo scans cleanly again
+        stats = self.app.get('/api/cache/stats').get_json()
+        self.assertEqual(stats['folders'], 1)
+
+    def test_keeps_garbage_in_use(self):
+        lock_path = Path(self.tmp.name) / '.locks' / 'models--org--model' / 'orphan.lock'
+        with FileLock(str(lock_path)):
+            job = self.run_gc(dry_run=False)
+        self.assertEqual(self.statuses(job)['orphan'], 'skipped')
+        self.assertEqual(next(i for i in job['items'] if i['kind'] == 'orphaned_blob')['reason'], 'locked')
+        self.assertTrue((self.repo_path / 'blobs' / 'orphan').exists())
+
+        # Nothing is touched in a repo with a download in progress
+        make_garbage(self.tmp.name, 'models--org--busy')
+        with patch.dict('api.gc.downloads', {'d1': {'status': 'downloading', 'repo_id': 'org/busy',
+                                                    'repo_type': 'model', 'root': 'default'}}):
+            job = self.run_gc(dry_run=False, incomplete_age=0)
+        busy = [item for item in job['items'] if item['repo'] == 'models--org--busy']
+        self.assertEqual({item['reason'] for item in busy}, {'in use'})
+        self.assertTrue((Path(self.tmp.name) / 'models--org--busy' / 'blobs' / 'orphan').exists())
+
+    def test_rejects_bad_requests(self):
+        self.assertEqual(self.app.post('/api/cache/gc', json={'min_age': 'soon'}).status_code, 400)
+        self.assertEqual(self.app.post('/api/cache/gc', json={'min_age': -1}).status_code, 400)
+        self.assertEqual(self.app.post('/api/cache/gc', json={'root': 'nope'}).status_code, 404)
+        self.assertEqual(self.app.get('/api/cache/gc/nope').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
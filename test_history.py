@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for cache usage history
+"""
+
+import sys
+import os
+import unittest
+from unittest.mock import patch
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from main import app
+from api import history as history_module
+from utils.history import RingSeries, UsageHistory, growth_rate
+
+
+class TestRingSeries(unittest.TestCase):
+
+    def test_wraps_at_capacity(self):
+        series = RingSeries(3)
+        for i in range(5):
+            series.append({'timestamp': i, 'size': i * 10, 'model': 0, 'dataset': 0, 'space': 0, 'downloaded': 0})
+        self.assertEqual(len(series), 3)
+        self.assertEqual([row['timestamp'] for row in series.rows()], [2, 3, 4])
+
+        restored = RingSeries.from_dict(3, series.to_dict())
+        self.assertEqual([row['size'] for row in restored.rows()], [20, 30, 40])
+
+
+class TestUsageHistory(unittest.TestCase):
+
+    def test_downsampling(self):
+        history = UsageHistory()
+        # Twelve 5-minute samples over one hour, 100 bytes downloaded each
+        for i in range(13):
+            history.add_downloaded(100)
+            history.record(i * 300, 1000 + i, {'model': 1000 + i})
+
+        self.assertEqual(len(history.series('5m')), 13)
+        hourly = history.series('1h')
+        self.assertEqual(len(hourly), 2)
+        self.assertEqual(hourly[0]['size'], 1011)
+        self.assertEqual(hourly[0]['downloaded'], 1200)
+        self.assertEqual(hourly[1]['downloaded'], 100)
+
+    def test_growth_rate(self):
+        rows = [{'timestamp': t, 'size': 50 + 2 * t} for t in range(10)]
+        self.assertAlmostEqual(growth_rate(rows), 2.0)
+        self.assertIsNone(growth_rate(rows[:1]))
+
+
+class TestHistoryEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        self.app_context.pop()
+
+    @patch('api.history.usage_history', new_callable=UsageHistory)
+    def test_get_history(self, mock_history):
+        mock_history.record(0, 1000, {'model': 1000})
+        mock_history.record(3600, 2000, {'model': 2000})
+
+        response = self.app.get('/api/cache/stats/history?resolution=1h')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(len(data['samples']), 2)
+        self.assertEqual(data['growth_per_day'], 1000 * 24)
+        self.assertIsNotNone(data['days_until_full'])
+
+        response = self.app.get('/api/cache/stats/history?resolution=1h&limit=1')
+        self.assertEqual(len(response.get_json()['samples']), 1)
+
+        response = self.app.get('/api/cache/stats/history?resolution=1w')
+        self.assertEqual(response.status_code, 400)
+        for limit in ('0', '-1', 'abc'):
+            response = self.app.get(f'/api/cache/stats/history?resolution=1h&limit={limit}')
+            self.assertEqual(response.status_code, 400, limit)
+
+    def test_sampler_not_started_on_import(self):
+        # main.py starts it with the server, importing the app must not scan the cache
+        self.assertIsNone(history_module.sampler)
+
+
+if __name__ == '__main__':
+    unittest.main()
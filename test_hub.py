@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Tests for the pooled Hub session, metadata cache and offline mode
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from huggingface_hub import HfFileMetadata
+from huggingface_hub.utils import LocalEntryNotFoundError, get_session
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from main import app
+from api import downloads
+from utils.hub import MetadataCache
+from utils.transfer import download_to_cache
+
+COMMIT = 'c' * 40
+
+
+class TestMetadataCache(unittest.TestCase):
+
+    @patch('utils.hub.time.monotonic')
+    def test_entries_expire(self, mock_monotonic):
+        cache = MetadataCache(ttl=60)
+        mock_monotonic.return_value = 1000
+        cache.put('key', 'metadata')
+        mock_monotonic.return_value = 1060
+        self.assertEqual(cache.get('key'), 'metadata')
+        mock_monotonic.return_value = 1061
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(cache.to_dict(), {'entries': 0, 'max_entries': 4096, 'ttl': 60, 'hits': 1, 'misses': 1})
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = MetadataCache(max_entries=2)
+        cache.put('first', 1)
+        cache.put('second', 2)
+        cache.get('first')
+        cache.put('third', 3)
+        self.assertIsNone(cache.get('second'))
+        self.assertEqual(cache.get('first'), 1)
+        self.assertEqual(cache.get('third'), 3)
+        self.assertEqual(cache.to_dict()['entries'], 2)
+
+    def test_threads_share_one_session(self):
+        downloads.start_hub_session()
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(get_session()))
+        thread.start()
+        thread.join()
+        self.assertIs(sessions[0], get_session())
+        self.assertIs(get_session(), downloads.hub_session)
+
+
+class TestCachedLookups(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        repo_path = Path(self.tmp.name) / 'models--org--model'
+        (repo_path / 'blobs').mkdir(parents=True)
+        (repo_path / 'refs').mkdir()
+        (repo_path / 'snapshots' / COMMIT).mkdir(parents=True)
+        (repo_path / 'blobs' / 'etag').write_bytes(b'weights')
+        (repo_path / 'refs' / 'main').write_text(COMMIT)
+        os.symlink('../../blobs/etag', repo_path / 'snapshots' / COMMIT / 'model.bin')
+        self.pointer = str(repo_path / 'snapshots' / COMMIT / 'model.bin')
+        self.metadata = HfFileMetadata(commit_hash=COMMIT, etag='etag', location='https://example.invalid', size=7)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @patch('utils.transfer.get_hf_file_metadata')
+    def test_known_files_make_no_network_calls(self, mock_metadata):
+        mock_metadata.return_value = self.metadata
+        cache = MetadataCache()
+
+        for _ in range(3):
+            path = download_to_cache('org/model', 'model.bin', cache_dir=self.tmp.name, metadata_cache=cache)
+            self.assertEqual(path, self.pointer)
+        self.assertEqual(mock_metadata.call_count, 1)
+
+        # Commit hashes are immutable, no lookup at all
+        download_to_cache('org/model', 'model.bin', revision=COMMIT, cache_dir=self.tmp.name)
+        self.assertEqual(mock_metadata.call_count, 1)
+
+    @patch('utils.transfer.get_hf_file_metadata')
+    def test_offline_answers_from_refs(self, mock_metadata):
+        path = download_to_cache('org/model', 'model.bin', cache_dir=self.tmp.name, offline=True)
+        self.assertEqual(path, self.pointer)
+        with self.assertRaises(LocalEntryNotFoundError):
+            download_to_cache('org/model', 'other.bin', cache_dir=self.tmp.name, offline=True)
+        with self.assertRaises(LocalEntryNotFoundError):
+            download_to_cache('org/model', 'model.bin', revision='dev', cache_dir=self.tmp.name, offline=True)
+        mock_metadata.assert_not_called()
+
+
+class TestHubEndpoints(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        self.app_context.pop()
+        downloads.offline_mode = False
+
+    def test_toggle_offline(self):
+        response = self.app.put('/api/cache/hub', json={'offline': True, 'clear_metadata': True})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()['offline'])
+        self.assertTrue(downloads.is_offline())
+        self.assertEqual(response.get_json()['metadata_cache']['entries'], 0)
+
+        self.assertEqual(self.app.put('/api/cache/hub', json={'offline': 'yes'}).status_code, 400)
+        self.assertTrue(self.app.get('/api/cache/hub').get_json()['offline'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Tests for warm-cache manifests and the reconciler
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from main import app
+from api import manifests as manifests_module
+
+
+class TestReconcileEntry(unittest.TestCase):
+
+    def setUp(self):
+        self.entry = manifests_module.normalize_entry({'repo_id': 'org/model', 'patterns': ['*.json']})
+
+    def test_normalize_entry_defaults(self):
+        self.assertEqual(self.entry['repo_type'], 'model')
+        self.assertEqual(self.entry['revision'], 'main')
+        with self.assertRaises(ValueError):
+            manifests_module.normalize_entry({'repo_type': 'model'})
+        with self.assertRaises(ValueError):
+            manifests_module.normalize_entry({'repo_id': 'x', 'repo_type': 'bucket'})
+
+    @patch('api.manifests.downloads', {})
+    @patch('api.manifests.queue_download')
+    @patch('api.manifests.root_indexes')
+    @patch('api.manifests.HfApi')
+    def test_queues_missing_and_outdated_files(self, mock_api, mock_root_indexes, mock_queue):
+        siblings = []
+        for name, size in [('config.json', 10), ('tokenizer.json', 20), ('generation_config.json', 30),
+                           ('model.safetensors', 40)]:
+            sibling = MagicMock()
+            sibling.rfilename = name
+            sibling.size = size
+            siblings.append(sibling)
+        mock_api.return_value.repo_info.return_value = MagicMock(sha='abc', siblings=siblings)
+
+        mock_cache_dir = MagicMock()
+        mock_root_indexes.return_value = [(MagicMock(), mock_cache_dir)]
+        present = MagicMock(size_on_disk=10)
+        truncated = MagicMock(size_on_disk=5)
+        mock_cache_dir.resolve_revision.return_value = 'abc'
+        mock_cache_dir.snapshot_files.return_value = {'config.json': present, 'tokenizer.json': truncated}
+
+        def fake_queue(repo_id, filename, **kwargs):
+            manifests_module.downloads[filename] = {'status': 'downloading'}
+            return filename
+        mock_queue.side_effect = fake_queue
+
+        result = manifests_module.reconcile_entry(self.entry, {})
+
+        # model.safetensors doesn't match the pattern
+        self.assertEqual(result['files'], 3)
+        self.assertEqual(result['present'], 1)
+        self.assertEqual(result['missing'], ['generation_config.json'])
+        self.assertEqual(result['outdated'], ['tokenizer.json'])
+        self.assertEqual(len(result['queued']), 2)
+        forced = {call.args[1]: call.kwargs['force_download'] for call in mock_queue.call_args_list}
+        self.assertEqual(forced, {'generation_config.json': False, 'tokenizer.json': True})
+        # Downloads ask for the commit the Hub resolved, not the branch
+        self.assertEqual({call.kwargs['revision'] for call in mock_queue.call_args_list}, {'abc'})
+
+    @patch('api.manifests.queue_download')
+    @patch('api.manifests.root_indexes')
+    @patch('api.manifests.HfApi')
+    def test_does_not_requeue_active_downloads(self, mock_api, mock_root_indexes, mock_queue):
+        sibling = MagicMock(rfilename='config.json', size=10)
+        mock_api.return_value.repo_info.return_value = MagicMock(sha='abc', siblings=[sibling])
+        mock_cache_dir = MagicMock()
+        mock_cache_dir.snapshot_files.return_value = {}
+        mock_root_indexes.return_value = [(MagicMock(), mock_cache_dir)]
+        latest = {('model', 'org/model', 'abc', 'config.json'): ('d1', {'status': 'downloading'})}
+
+        result = manifests_module.reconcile_entry(self.entry, latest)
+
+        self.assertEqual(result['queued'], ['d1'])
+        mock_queue.assert_not_called()
+
+    @patch('api.manifests.queue_download')
+    @patch('api.manifests.root_indexes')
+    @patch('api.manifests.HfApi')
+    def test_moves_ref_once_commit_is_complete(self, mock_api, mock_root_indexes, mock_queue):
+        sibling = MagicMock(rfilename='config.json', size=10)
+        mock_api.return_value.repo_info.return_value = MagicMock(sha='b' * 40, siblings=[sibling])
+        with tempfile.TemporaryDirectory() as cache:
+            mock_cache_dir = MagicMock()
+            mock_cache_dir.resolve_revision.return_value = 'a' * 40
+            mock_cache_dir.snapshot_files.return_value = {'config.json': MagicMock(size_on_disk=10)}
+            mock_root_indexes.return_value = [(MagicMock(path=cache), mock_cache_dir)]
+
+            result = manifests_module.reconcile_entry(self.entry, {})
+
+            ref = Path(cache) / 'models--org--model' / 'refs' / 'main'
+            self.assertEqual(ref.read_text(), 'b' * 40)
+        self.assertEqual(result['local_commit'], 'b' * 40)
+        mock_cache_dir.invalidate.assert_called_once()
+        mock_queue.assert_not_called()
+
+
+class TestManifestEndpoints(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        self.app_context.pop()
+
+    @patch('api.manifests.reconciler')
+    @patch('api.manifests.save_json')
+    @patch('api.manifests.manifests', {})
+    def test_submit_manifest(self, mock_save, mock_reconciler):
+        response = self.app.put('/api/cache/manifests/warm', json={'entries': [{'repo_id': 'org/model'}]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['status'], 'pending')
+        mock_reconciler.wake.assert_called_once()
+        self.assertTrue(manifests_module.is_pinned('org/model'))
+
+        # Resubmitting the same manifest doesn't trigger another pass
+        self.app.put('/api/cache/manifests/warm', json={'entries': [{'repo_id': 'org/model'}]})
+        mock_reconciler.wake.assert_called_once()
+
+        response = self.app.put('/api/cache/manifests/bad', json={'entries': [{}]})
+        self.assertEqual(response.status_code, 400)
+        for body in ({'entries': [{'repo_id': 'org/model', 'patterns': 5}]},
+                     {'entries': [{'repo_id': 'org/model', 'patterns': ['*', 5]}]},
+                     {'entries': {'repo_id': 'org/model'}},
+                     [{'repo_id': 'org/model'}]):
+            response = self.app.put('/api/cache/manifests/bad', json=body)
+            self.assertEqual(response.status_code, 400, body)
+        self.assertNotIn('bad', manifests_module.manifests)
+
+    @patch('api.manifests.manifests', {'warm': {'entries': [
+        {'repo_id': 'org/model', 'repo_type': 'model', 'revision': 'main', 'patterns': ['*'], 'root': 'nvme'}
+    ], 'submitted': ''}})
+    def test_pins_are_per_root(self):
+        self.assertTrue(manifests_module.is_pinned('org/model'))
+        self.assertTrue(manifests_module.is_pinned('org/model', root='nvme'))
+        self.assertFalse(manifests_module.is_pinned('org/model', root='hdd'))
+
+    @patch('api.manifests.manifests', {'warm': {'entries': [
+        {'repo_id': 'org/model', 'repo_type': 'model', 'revision': 'main', 'patterns': ['*']}
+    ], 'submitted': ''}})
+    @patch('api.cache.cache_dir')
+    def test_pinned_repo_cannot_be_removed(self, mock_cache_dir):
+        mock_repo = MagicMock(repo_id='org/model', repo_type='model', repo_path=Path('/cache/models--org--model'))
+        mock_cache_dir.repos = [mock_repo]
+
+        response = self.app.delete('/api/cache/remove/models--org--model')
+        self.assertEqual(response.status_code, 409)
+
+    @patch('api.manifests.reconciler')
+    @patch('api.manifests.load_json')
+    @patch.dict('api.manifests.manifests', clear=True)
+    def test_manifests_load_at_startup(self, mock_load, mock_reconciler):
+        mock_load.return_value = {'warm': {'entries': [], 'submitted': ''}}
+        manifests_module.load_manifests()
+        self.assertIn('warm', manifests_module.manifests)
+        mock_reconciler.start.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Tests for the LAN peer mirror
+"""
+
+import sys
+import os
+import hashlib
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from huggingface_hub import HfFileMetadata, get_hf_file_metadata
+from werkzeug.serving import make_server
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from main import app
+from api import downloads
+from utils.cache_roots import CacheRoot, CacheRoots
+from utils.hub import MetadataCache
+from utils.transfer import download_to_cache
+
+COMMIT = 'c' * 40
+CONTENT = b'0123456789' * 1000
+
+
+class MirrorTestCase(unittest.TestCase):
+    """Serves a temporary cache holding org/model@main:model.bin through the mirror"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.peer_root = CacheRoot('peer', os.path.join(self.tmp.name, 'peer'))
+        repo_path = Path(self.peer_root.path) / 'models--org--model'
+        self.etag = hashlib.sha256(CONTENT).hexdigest()
+        (repo_path / 'blobs').mkdir(parents=True)
+        (repo_path / 'refs').mkdir()
+        (repo_path / 'snapshots' / COMMIT).mkdir(parents=True)
+        (repo_path / 'blobs' / self.etag).write_bytes(CONTENT)
+        (repo_path / 'refs' / 'main').write_text(COMMIT)
+        os.symlink(f'../../blobs/{self.etag}', repo_path / 'snapshots' / COMMIT / 'model.bin')
+
+        self.patches = [
+            patch('api.mirror.cache_roots', CacheRoots([self.peer_root])),
+            patch('api.mirror.mirror_enabled', True)
+        ]
+        for p in self.patches:
+            p.start()
+        self.client = app.test_client()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp.cleanup()
+
+
+class TestMirrorEndpoint(MirrorTestCase):
+
+    def test_head_returns_hub_metadata(self):
+        response = self.client.head('/mirror/org/model/resolve/main/model.bin')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-Repo-Commit'], COMMIT)
+        self.assertEqual(response.headers['ETag'], f'"{self.etag}"')
+        self.assertEqual(response.headers['X-Linked-Size'], str(len(CONTENT)))
+
+    def test_range_request(self):
+        response = self.client.get(f'/mirror/org/model/resolve/{COMMIT}/model.bin', headers={'Range': 'bytes=10-19'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.data, CONTENT[10:20])
+
+    def test_missing_and_disabled(self):
+        response = self.client.get('/mirror/org/model/resolve/main/other.bin')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.headers['X-Error-Code'], 'EntryNotFound')
+        self.assertEqual(self.client.get('/mirror/org/model/resolve/main/../../../refs/main').status_code, 404)
+
+        with patch('api.mirror.mirror_enabled', False):
+            self.assertEqual(self.client.get('/mirror/org/model/resolve/main/model.bin').status_code, 404)
+
+
+class TestTwoInstances(MirrorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.endpoint = f'http://127.0.0.1:{self.server.server_port}/mirror'
+
+    def tearDown(self):
+        self.server.shutdown()
+        super().tearDown()
+
+    def test_download_from_peer(self):
+        local_cache = os.path.join(self.tmp.name, 'local')
+        path = download_to_cache('org/model', 'model.bin', revision=COMMIT, cache_dir=local_cache,
+                                 endpoint=self.endpoint, token=False)
+
+        self.assertEqual(Path(path).read_bytes(), CONTENT)
+        self.assertIn(COMMIT, path)
+        blob = Path(local_cache) / 'models--org--model' / 'blobs' / self.etag
+        self.assertTrue(blob.exists())
+
+        # A peer's answer for a branch never moves the local ref
+        download_to_cache('org/model', 'model.bin', cache_dir=local_cache, endpoint=self.endpoint, token=False)
+        self.assertFalse((Path(local_cache) / 'models--org--model' / 'refs' / 'main').exists())
+
+    def run_downloads(self, local_root, hub_commit, *filenames, metadata_cache=None):
+        """Run downloads against the peer, with the Hub resolving main to hub_commit"""
+        calls = []
+        real_metadata = get_hf_file_metadata
+
+        def fake_hub(repo_id, filename, endpoint=None, **kwargs):
+            calls.append((endpoint, kwargs['revision']))
+            if endpoint is not None:
+                return download_to_cache(repo_id, filename, endpoint=endpoint, **kwargs)
+            return 'from-hub'
+
+        def fake_metadata(url, **kwargs):
+            if url.startswith(self.endpoint):
+                return real_metadata(url, **kwargs)
+            calls.append(('head', url.rsplit('/', 1)[-1]))
+            if hub_commit is None:
+                raise ValueError('Hub unreachable')
+            return HfFileMetadata(commit_hash=hub_commit, etag=self.etag, location='https://example.invalid',
+                                  size=len(CONTENT))
+
+        download_model = downloads.download_model
+        with patch('api.downloads.peers', [self.endpoint]), \
+                patch('api.downloads.cache_roots', CacheRoots([local_root])), \
+                patch('api.downloads.root_indexes', lambda name=None: [(local_root, local_root.index)]), \
+                patch('api.downloads.metadata_cache', metadata_cache or MetadataCache()), \
+                patch('utils.transfer.get_hf_file_metadata', side_effect=fake_metadata), \
+                patch('api.downloads.download_to_cache', side_effect=fake_hub):
+            # Run the downloads here rather than in background threads
+            with patch('api.downloads.download_model'):
+                download_ids = [downloads.queue_download('org/model', filename) for filename in filenames]
+            for download_id in download_ids:
+                download_model(download_id)
+        return download_ids, calls
+
+    def test_falls_back_to_hub(self):
+        local_root = CacheRoot('local', os.path.join(self.tmp.name, 'local'))
+        (found, missing), calls = self.run_downloads(local_root, COMMIT, 'model.bin', 'missing.bin')
+
+        self.assertEqual(downloads.downloads[found]['source'], self.endpoint)
+        self.assertEqual(downloads.downloads[missing]['source'], 'hub')
+        # Peers are asked for the commit the Hub resolved, the Hub for the branch
+        self.assertEqual(calls, [('head', 'model.bin'), (self.endpoint, COMMIT),
+                                 ('head', 'missing.bin'), (self.endpoint, COMMIT), (None, 'main')])
+        self.assertEqual((Path(local_root.path) / 'models--org--model' / 'refs' / 'main').read_text(), COMMIT)
+
+    def test_stale_peer_is_not_used_for_branches(self):
+        local_root = CacheRoot('local', os.path.join(self.tmp.name, 'local'))
+        newer = 'd' * 40
+        (download_id,), calls = self.run_downloads(local_root, newer, 'model.bin')
+        # The peer only has the older commit of main
+        self.assertEqual(downloads.downloads[download_id]['source'], 'hub')
+        self.assertEqual(calls, [('head', 'model.bin'), (self.endpoint, newer), (None, 'main')])
+        self.assertFalse((Path(local_root.path) / 'models--org--model' / 'refs' / 'main').exists())
+
+        # Without the Hub's commit, peers are skipped
+        (download_id,), calls = self.run_downloads(local_root, None, 'model.bin')
+        self.assertEqual(calls, [('head', 'model.bin'), (None, 'main')])
+
+    def test_cached_files_ask_no_upstream(self):
+        local_root = CacheRoot('local', os.path.join(self.tmp.name, 'local'))
+        cache = MetadataCache()
+        self.run_downloads(local_root, COMMIT, 'model.bin', metadata_cache=cache)
+
+        # The Hub's resolution is reused, neither the peer nor the Hub is asked again
+        (download_id,), calls = self.run_downloads(local_root, COMMIT, 'model.bin', metadata_cache=cache)
+        self.assertEqual(calls, [])
+        self.assertEqual(downloads.downloads[download_id]['source'], 'cache')
+        self.assertEqual(downloads.downloads[download_id]['status'], 'completed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for the cache search index
+"""
+
+import sys
+import os
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from main import app
+from api import search as search_module
+from utils.search import SearchIndex
+
+
+def fake_repo(repo_id, files, repo_type='model'):
+    """Build a CachedRepoInfo-like object with one snapshot holding files ({path: size})"""
+    repo_path = Path('/cache') / f'{repo_type}s--{repo_id.replace("/", "--")}'
+    snapshot = repo_path / 'snapshots' / ('a' * 40)
+    revision = SimpleNamespace(
+        commit_hash='a' * 40,
+        snapshot_path=snapshot,
+        last_modified=0.0,
+        nb_files=len(files),
+        files=[SimpleNamespace(file_path=snapshot / path, size_on_disk=size) for path, size in files.items()]
+    )
+    return SimpleNamespace(repo_id=repo_id, repo_type=repo_type, repo_path=repo_path, revisions=[revision],
+                           nb_files=len(files), size_on_disk=sum(files.values()), last_modified=0.0)
+
+
+def fake_info():
+    return SimpleNamespace(repos=[
+        fake_repo('TheBloke/Llama-2-7B-GGUF', {'llama-2-7b.Q4_K_M.gguf': 4000, 'config.json': 10}),
+        fake_repo('meta-llama/Llama-2-7b-hf', {'tokenizer.json': 200, 'config.json': 10, 'weights/model.safetensors': 9000}),
+        fake_repo('squad', {'data/train.parquet': 500, 'README.md': 5}, repo_type='dataset')
+    ])
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = SearchIndex(fake_info())
+
+    def search(self, *args, **kwargs):
+        return [(repo_id, path) for repo_id, _, _, path, _ in self.index.search(*args, **kwargs)]
+
+    def test_interns_paths(self):
+        self.assertEqual(len(self.index), 7)
+        self.assertEqual(len(self.index.paths), 6)
+
+    def test_substring_query(self):
+        self.assertEqual(self.search('tokenizer'), [('meta-llama/Llama-2-7b-hf', 'tokenizer.json')])
+        # Repo id matches return every file of the repo
+        self.assertEqual(len(self.search('thebloke')), 2)
+        self.assertEqual(self.search('no such thing'), [])
+
+    def test_short_query_is_a_name_prefix(self):
+        self.assertEqual(self.search('re'), [('squad', 'README.md')])
+        self.assertEqual(self.search('mo'), [('meta-llama/Llama-2-7b-hf', 'weights/model.safetensors')])
+
+    def test_filters(self):
+        self.assertEqual(self.search(pattern='*.gguf'), [('TheBloke/Llama-2-7B-GGUF', 'llama-2-7b.Q4_K_M.gguf')])
+        self.assertEqual(self.search(pattern='*.SAFETENSORS'), [('meta-llama/Llama-2-7b-hf', 'weights/model.safetensors')])
+        self.assertEqual(len(self.search('llama', pattern='*.json')), 3)
+        self.assertEqual(len(self.search(min_size=400, max_size=5000)), 2)
+        self.assertEqual(len(self.search(repo_type='dataset')), 2)
+
+    def test_glob_bracket_classes(self):
+        # Characters inside [] are alternatives, not a required literal
+        self.assertEqual(self.search(pattern='*[0-9]*.gguf'), [('TheBloke/Llama-2-7B-GGUF', 'llama-2-7b.Q4_K_M.gguf')])
+        self.assertEqual(self.search(pattern='*/[lmn]*'), [('meta-llama/Llama-2-7b-hf', 'weights/model.safetensors')])
+        self.assertEqual(self.search(pattern='data/[!x]rain.parquet'), [('squad', 'data/train.parquet')])
+
+
+class TestSearchEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        self.app_context.pop()
+
+    @patch.dict('api.search.search_indexes', clear=True)
+    @patch('api.search.root_indexes')
+    def test_search_endpoint(self, mock_root_indexes):
+        root = MagicMock()
+        root.name = 'default'
+        index = MagicMock(info=fake_info())
+        mock_root_indexes.return_value = [(root, index)]
+
+        response = self.app.get('/api/cache/search?glob=*.json&min_size=100')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual([r['path'] for r in data['results']], ['tokenizer.json'])
+        self.assertEqual(data['results'][0]['root'], 'default')
+
+        data = self.app.get('/api/cache/search?q=llama&limit=2').get_json()
+        self.assertEqual(data['count'], 2)
+        self.assertTrue(data['truncated'])
+
+        self.assertEqual(self.app.get('/api/cache/search?min_size=lots').status_code, 400)
+        self.assertEqual(self.app.get('/api/cache/search?limit=-1').status_code, 400)
+        self.assertEqual(self.app.get('/api/cache/search?limit=0').status_code, 400)
+
+        # A rescan that found the same repos keeps the index, a changed repo rebuilds it
+        built = search_module.search_indexes['default']
+        index.info = fake_info()
+        self.app.get('/api/cache/search?q=llama')
+        self.assertIs(search_module.search_indexes['default'], built)
+        index.info = fake_info()
+        index.info.repos[2].revisions[0].files.append(SimpleNamespace(
+            file_path=index.info.repos[2].revisions[0].snapshot_path / 'data/test.parquet', size_on_disk=50))
+        index.info.repos[2].nb_files += 1
+        data = self.app.get('/api/cache/search?q=test.parquet').get_json()
+        self.assertEqual([r['path'] for r in data['results']], ['data/test.parquet'])
+
+        mock_root_indexes.side_effect = KeyError('missing')
+        self.assertEqual(self.app.get('/api/cache/search?q=x&root=missing').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
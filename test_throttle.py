@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Tests for download bandwidth throttling
+"""
+
+import sys
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+from huggingface_hub import HfFileMetadata
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from main import app
+from utils.throttle import BandwidthLimiter, TokenBucket
+from utils.transfer import download_to_cache
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_unlimited_never_waits(self):
+        bucket = TokenBucket()
+        self.assertEqual(bucket.reserve(10 ** 9), 0.0)
+
+    def test_debt_is_paid_back_with_delay(self):
+        bucket = TokenBucket(1000)
+        # The first second of burst is free, the rest has to wait
+        self.assertEqual(bucket.reserve(1000), 0.0)
+        self.assertAlmostEqual(bucket.reserve(500), 0.5, places=1)
+
+
+class TestBandwidthLimiter(unittest.TestCase):
+
+    def test_schedule_wraps_midnight(self):
+        limiter = BandwidthLimiter(global_limit=1000, schedule=[
+            {'start': '22:00', 'end': '06:00', 'limit': 0}
+        ])
+        self.assertIsNone(limiter.current_global_limit(datetime(2024, 1, 1, 23, 30)))
+        self.assertIsNone(limiter.current_global_limit(datetime(2024, 1, 1, 5, 59)))
+        self.assertEqual(limiter.current_global_limit(datetime(2024, 1, 1, 12, 0)), 1000)
+
+    def test_effective_limit_is_tightest_cap(self):
+        limiter = BandwidthLimiter(global_limit=1000)
+        limiter.set_job_limit('job', 200)
+        self.assertEqual(limiter.effective_limit('job'), 200)
+        limiter.set_job_limit('job', 5000)
+        self.assertEqual(limiter.effective_limit('job'), 1000)
+        limiter.release('job')
+        self.assertEqual(limiter.effective_limit('job'), 1000)
+
+    @patch('utils.throttle.SLEEP_SLICE', 0.01)
+    def test_throttle_wait_can_be_interrupted(self):
+        limiter = BandwidthLimiter()
+        limiter.set_job_limit('job', 10)
+        checks = []
+
+        def cancelled():
+            checks.append(1)
+            return len(checks) == 3
+
+        # A megabyte at 10 B/s would otherwise sleep for a day
+        started = time.monotonic()
+        limiter.throttle('job', 10 ** 6, cancelled=cancelled)
+        self.assertEqual(len(checks), 3)
+
+        def lifted():
+            limiter.set_job_limit('job', None)
+            return False
+
+        self.assertIsNone(limiter.throttle('job', 10 ** 6, cancelled=lifted))
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_boolean_limits_rejected(self):
+        limiter = BandwidthLimiter()
+        with self.assertRaises(ValueError):
+            limiter.configure(global_limit=True)
+        with self.assertRaises(ValueError):
+            limiter.set_job_limit('job', True)
+
+    def test_invalid_schedule_rejected(self):
+        limiter = BandwidthLimiter()
+        with self.assertRaises(ValueError):
+            limiter.configure(schedule=[{'start': '25:00', 'end': '06:00'}])
+
+    def test_invalid_schedule_leaves_global_limit(self):
+        limiter = BandwidthLimiter(global_limit=1000)
+        with self.assertRaises(ValueError):
+            limiter.configure(global_limit=5000, schedule=[{'start': '25:00', 'end': '06:00'}])
+        self.assertEqual(limiter.global_limit, 1000)
+
+
+class TestTransfer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @patch('utils.transfer.get_session')
+    @patch('utils.transfer.get_hf_file_metadata')
+    def test_short_body_is_kept_for_resume(self, mock_metadata, mock_session):
+        mock_metadata.return_value = HfFileMetadata(commit_hash='a' * 40, etag='etag', location='https://cdn.invalid',
+                                                    size=1000)
+        response = mock_session.return_value.get.return_value.__enter__.return_value
+        response.status_code = 200
+        response.iter_content.return_value = [b'x' * 10]
+
+        with self.assertRaises(EnvironmentError):
+            download_to_cache('org/model', 'model.bin', cache_dir=self.tmp.name)
+        blobs = Path(self.tmp.name) / 'models--org--model' / 'blobs'
+        self.assertFalse((blobs / 'etag').exists())
+        self.assertEqual((blobs / 'etag.incomplete').stat().st_size, 10)
+        self.assertFalse((Path(self.tmp.name) / 'models--org--model' / 'snapshots' / ('a' * 40) / 'model.bin').exists())
+
+
+class TestThrottleEndpoints(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        self.app_context.pop()
+
+    @patch('api.downloads.bandwidth', new_callable=BandwidthLimiter)
+    def test_update_global_throttle(self, mock_bandwidth):
+        response = self.app.put('/api/cache/throttle', json={
+            'global_limit': 2048,
+            'schedule': [{'start': '00:00', 'end': '00:00', 'limit': 0}]
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['global_limit'], 2048)
+        self.assertEqual(len(data['schedule']), 1)
+
+        response = self.app.put('/api/cache/throttle', json={'schedule': [{'start': 'soon'}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.app.put('/api/cache/throttle', json={'global_limit': True}).status_code, 400)
+        self.assertEqual(mock_bandwidth.global_limit, 2048)
+
+    @patch('api.downloads.bandwidth', new_callable=BandwidthLimiter)
+    @patch('api.downloads.downloads', {'abc': {'status': 'downloading', 'rate_limit': None}})
+    def test_update_job_throttle(self, mock_bandwidth):
+        response = self.app.put('/api/cache/download/abc/throttle', json={'rate_limit': 4096})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['rate_limit'], 4096)
+        response = self.app.put('/api/cache/download/abc/throttle', json={'rate_limit': True})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.app.put('/api/cache/download/missing/throttle', json={'rate_limit': 1})
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for blob integrity verification
+"""
+
+import sys
+import os
+import hashlib
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from main import app
+from api import verify
+from utils.verify import VerificationStore, expected_digest, hash_blob
+
+
+class TestVerification(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo_path = Path(self.tmp.name) / 'models--org--model'
+        self.blobs = self.repo_path / 'blobs'
+        self.blobs.mkdir(parents=True)
+
+        content = b'weights' * 1000
+        self.good = self.blobs / hashlib.sha256(content).hexdigest()
+        self.good.write_bytes(content)
+        self.bad = self.blobs / hashlib.sha256(b'something else').hexdigest()
+        self.bad.write_bytes(b'truncated')
+        git_content = b'{"a": 1}'
+        self.git_blob = self.blobs / hashlib.sha1(b'blob %d\0' % len(git_content) + git_content).hexdigest()
+        self.git_blob.write_bytes(git_content)
+
+        self.env = patch.dict(os.environ, {'HF_WEBUI_STATE_DIR': os.path.join(self.tmp.name, 'state')})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def test_expected_digest(self):
+        self.assertEqual(expected_digest(str(self.good))[0], 'sha256')
+        self.assertEqual(expected_digest(str(self.git_blob))[0], 'git-sha1')
+        self.assertIsNone(expected_digest('/cache/blobs/not-a-hash'))
+
+    def test_hash_blob_matches_filename(self):
+        self.assertEqual(hash_blob(str(self.good), 'sha256'), self.good.name)
+        self.assertEqual(hash_blob(str(self.git_blob), 'git-sha1'), self.git_blob.name)
+
+    def _run_job(self, full=False):
+        job_id = 'job-full' if full else 'job'
+        verify.verify_jobs[job_id] = {
+            'status': 'running', 'repo_id': None, 'repo_type': None, 'full': full,
+            'total': 0, 'checked': 0, 'hashed': 0, 'skipped': 0, 'unverifiable': 0,
+            'bytes_hashed': 0, 'throughput': 0, 'corrupted': [], 'errors': [], 'error': None
+        }
+        verify.run_verification(job_id)
+        return verify.verify_jobs.pop(job_id)
+
+    @patch('api.verify.root_indexes')
+    def test_incremental_verification(self, mock_root_indexes):
+        mock_cache_dir = MagicMock()
+        mock_cache_dir.repos = [MagicMock(repo_id='org/model', repo_type='model', repo_path=self.repo_path)]
+        mock_root_indexes.return_value = [(MagicMock(), mock_cache_dir)]
+        with patch('api.verify.verified_blobs', VerificationStore()):
+            job = self._run_job()
+            self.assertEqual(job['status'], 'completed')
+            self.assertEqual(job['hashed'], 3)
+            self.assertEqual([c['path'] for c in job['corrupted']], [str(self.bad)])
+
+            # Unchanged blobs are skipped on the second run, but stay reported
+            job = self._run_job()
+            self.assertEqual(job['hashed'], 0)
+            self.assertEqual(job['skipped'], 3)
+            self.assertEqual(len(job['corrupted']), 1)
+
+            # A full run rehashes everything
+            job = self._run_job(full=True)
+            self.assertEqual(job['hashed'], 3)
+
+
+class TestVerifyEndpoints(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        self.app = app.test_client()
+        self.app_context = app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        """Clean up after each test method."""
+        self.app_context.pop()
+
+    @patch('api.verify.run_verification')
+    def test_start_and_get_verification(self, mock_run):
+        response = self.app.post('/api/cache/verify', json={'repo_id': 'org/model'})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()['job_id']
+
+        response = self.app.get(f'/api/cache/verify/{job_id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['repo_id'], 'org/model')
+
+        self.assertEqual(self.app.get('/api/cache/verify/missing').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
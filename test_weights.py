@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Tests for safetensors/GGUF header inspection
+"""
+
+import sys
+import os
+import json
+import struct
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from main import app
+from api import weights
+from cache_fixtures import COMMIT, TempCacheRoots, make_repo
+from utils.cache_roots import CacheRoot
+from utils.weights import InspectionStore, inspect_weights
+
+
+def safetensors_bytes():
+    header = {
+        '__metadata__': {'format': 'pt'},
+        'embed.weight': {'dtype': 'BF16', 'shape': [32, 8], 'data_offsets': [0, 512]},
+        'norm.weight': {'dtype': 'F32', 'shape': [8], 'data_offsets': [512, 544]}
+    }
+    encoded = json.dumps(header).encode()
+    return struct.pack('<Q', len(encoded)) + encoded + b'\0' * 544
+
+
+def gguf_string(value):
+    encoded = value.encode()
+    return struct.pack('<Q', len(encoded)) + encoded
+
+
+def gguf_bytes():
+    data = b'GGUF' + struct.pack('<IQQ', 3, 2, 3)
+    data += gguf_string('general.architecture') + struct.pack('<I', 8) + gguf_string('llama')
+    data += gguf_string('llama.context_length') + struct.pack('<II', 4, 4096)
+    tokens = [f'tok{i}' for i in range(100)]
+    data += gguf_string('tokenizer.ggml.tokens') + struct.pack('<IIQ', 9, 8, len(tokens))
+    data += b''.join(gguf_string(token) for token in tokens)
+    # Tensor infos: name, n_dims, dims (fastest first), type, offset
+    data += gguf_string('token_embd.weight') + struct.pack('<IQQIQ', 2, 8, 32, 12, 0)
+    data += gguf_string('output_norm.weight') + struct.pack('<IQIQ', 1, 8, 0, 256)
+    return data + b'\0' * 1024
+
+
+class TestInspectWeights(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_safetensors(self):
+        result = inspect_weights(self._write('model.safetensors', safetensors_bytes()))
+        self.assertEqual(result['format'], 'safetensors')
+        self.assertEqual(result['parameters'], 264)
+        self.assertEqual(result['dtypes'], {'BF16': 256, 'F32': 8})
+        self.assertEqual(result['tensors']['embed.weight']['shape'], [32, 8])
+        self.assertEqual(result['metadata'], {'format': 'pt'})
+
+    def test_gguf(self):
+        result = inspect_weights(self._write('model.gguf', gguf_bytes()))
+        self.assertEqual(result['format'], 'gguf')
+        self.assertEqual(result['metadata']['general.architecture'], 'llama')
+        self.assertEqual(result['metadata']['llama.context_length'], 4096)
+        self.assertEqual(result['metadata']['tokenizer.ggml.tokens'], {'type': 'array', 'length': 100})
+        self.assertEqual(result['tensors']['token_embd.weight'], {'dtype': 'Q4_K', 'shape': [32, 8]})
+        self.assertEqual(result['dtypes'], {'Q4_K': 256, 'F32': 8})
+
+    def test_other_files(self):
+        self.assertIsNone(inspect_weights(self._write('config.json', b'{"hidden_size": 8, "layers": 2}')))
+        with self.assertRaises(ValueError):
+            inspect_weights(self._write('bad.safetensors', struct.pack('<Q', 10 ** 9) + b'{' * 16))
+
+
+class TestInspectEndpoints(TempCacheRoots, unittest.TestCase):
+
+    def setUp(self):
+        """Set up test fixtures before each test method."""
+        super().setUp()
+        self.app = app.test_client()
+        self.root = CacheRoot('default', os.path.join(self.tmp.name, 'cache'))
+        make_repo(self.root.path, files={
+            'model-00001.safetensors': ('b' * 64, safetensors_bytes()),
+            'model-00002.safetensors': ('c' * 64, safetensors_bytes()),
+            'model.Q4_K_M.gguf': ('d' * 64, gguf_bytes()),
+            'config.json': ('e' * 40, b'{}')
+        })
+        self.use_cache_roots(self.root, patches=[
+            patch.dict(os.environ, {'HF_WEBUI_STATE_DIR': os.path.join(self.tmp.name, 'state')}),
+            patch('api.weights.inspections', InspectionStore())
+        ])
+
+    def test_repo_drill_down(self):
+        response = self.app.get('/api/cache/inspect/models--org--model')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['revision'], COMMIT)
+        # Shards add up, the GGUF variant doesn't
+        self.assertEqual(data['parameters'], 528)
+        self.assertEqual(data['dtypes'], {'BF16': 512, 'F32': 16})
+        self.assertEqual([f['path'] for f in data['files']],
+                         ['model-00001.safetensors', 'model-00002.safetensors', 'model.Q4_K_M.gguf'])
+        self.assertIn('tensors', data['files'][0])
+
+        self.assertEqual(self.app.get('/api/cache/inspect/models--org--model?revision=dev').status_code, 404)
+        self.assertEqual(self.app.get('/api/cache/inspect/models--org--missing').status_code, 404)
+
+    def test_results_cached_per_blob(self):
+        with patch('api.weights.inspect_weights', wraps=inspect_weights) as mock_inspect:
+            data = self.app.get('/api/cache/inspect').get_json()
+            self.assertEqual(mock_inspect.call_count, 3)
+            self.assertNotIn('tensors', data['repos'][0]['files'][0])
+
+            self.app.get('/api/cache/inspect/models--org--model')
+            self.assertEqual(mock_inspect.call_count, 3)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, 'state', 'weight_inspections.json')))
+
+    def test_bad_files_reported_per_file(self):
+        snapshot = Path(self.root.path) / 'models--org--model' / 'snapshots' / COMMIT
+        header = json.dumps({'x.weight': {'dtype': 'F32'}}).encode()
+        for name, blob, data in (('truncated.gguf', 'f' * 64, gguf_bytes()[:60]),
+                                 ('no-shape.safetensors', '1' * 64, struct.pack('<Q', len(header)) + header)):
+            (snapshot.parent.parent / 'blobs' / blob).write_bytes(data)
+            os.symlink(f'../../blobs/{blob}', snapshot / name)
+
+        response = self.app.get('/api/cache/inspect')
+        self.assertEqual(response.status_code, 200)
+        files = {f['path']: f for f in response.get_json()['repos'][0]['files']}
+        self.assertIn('error', files['truncated.gguf'])
+        self.assertIn('error', files['no-shape.safetensors'])
+        self.assertEqual(files['model-00001.safetensors']['parameters'], 264)
+        # Failures are retried next time rather than stored
+        self.assertNotIn('f' * 64, weights.inspections)
+        self.assertIn('b' * 64, weights.inspections)
+
+
+if __name__ == '__main__':
+    unittest.main()